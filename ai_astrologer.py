@@ -5,6 +5,7 @@ import swisseph as swe
 from datetime import datetime
 import math
 import openai   # pip install openai
+from aspects import western_aspects
 
 app = Flask(__name__)
 
@@ -26,21 +27,8 @@ def get_house_for_rasi(rasi_planet, asc_deg):
     return ((rasi_planet - asc_rasi) % 12) + 1
 
 def detect_aspects(planet_positions, orb_major=8):
-    """planet_positions: dict name->global_degree"""
-    aspects = []
-    names = list(planet_positions.keys())
-    for i in range(len(names)):
-        for j in range(i+1, len(names)):
-            a = planet_positions[names[i]]
-            b = planet_positions[names[j]]
-            diff = abs((a - b + 180) % 360 - 180)
-            # basic aspects:
-            if diff <= 8: aspects.append((names[i], names[j], 'conjunction', diff))
-            if abs(diff - 180) <= 8: aspects.append((names[i], names[j], 'opposition', diff))
-            if abs(diff - 120) <= 6: aspects.append((names[i], names[j], 'trine', diff))
-            if abs(diff - 90) <= 6: aspects.append((names[i], names[j], 'square', diff))
-            if abs(diff - 60) <= 5: aspects.append((names[i], names[j], 'sextile', diff))
-    return aspects
+    """planet_positions: dict name->global_degree; orb_major applies to conjunction/opposition"""
+    return western_aspects(planet_positions, orbs={'conjunction': orb_major, 'opposition': orb_major})
 
 # Build a compact "fact list" from kundali JSON
 def build_fact_list(kundali_json):
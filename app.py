@@ -2,10 +2,14 @@ from flask import Flask, request, jsonify
 import swisseph as swe
 from datetime import datetime, timedelta
 import math
+from sun_times import day_sun_times
+from ephemeris import LAHIRI
+from dasha import DashaTimeline
+from ephemeris_events import is_retrograde
 
 app = Flask(__name__)
-swe.set_ephe_path(r'D:\python\astro-py\ephe')
-swe.set_sid_mode(swe.SIDM_LAHIRI)  # Set Lahiri Ayanamsa
+# Lahiri ayanamsa and the ephemeris path travel with every call (see ephemeris.EphemerisContext)
+EPHE = LAHIRI
 
 # Planet constants used by swisseph
 PLANETS = {
@@ -94,6 +98,13 @@ def get_nakshatra_info(deg):
     lord = NAKSHATRA_LORDS[idx]
     return idx + 1, name, pada, lord
 
+def format_local_time(jd, tz):
+    """Julian day (UT) as local HH:MM, or '-' when there is no such event"""
+    if jd is None:
+        return "-"
+    y, m, d, hours = swe.revjul(jd + tz / 24.0)
+    return (datetime(y, m, d) + timedelta(hours=hours)).strftime("%H:%M")
+
 def get_house_for_rasi(rasi_planet, asc_deg):
     asc_rasi = sign_index_from_degree(asc_deg) + 1
     house = ((rasi_planet - asc_rasi) % 12) + 1
@@ -109,9 +120,10 @@ def compute_vimshottari_dasa(moon_nak_index, birth_dt):
         seq = order[:]
     return ">".join(seq[:3])
 
-def compute_current_dasa(birth_dt):
-    # Placeholder for current dasa calculation
-    return "Ra>Ra>Ra"
+def compute_current_dasa(birth_dt, moon_deg):
+    """Running maha > antar > pratyantar lords, abbreviated like 'Ra>Ju>Sa'"""
+    chain = DashaTimeline(birth_dt, moon_deg).active(datetime.now(), depth=3)
+    return ">".join(p.lord[:2] for p in chain) or "-"
 
 @app.route('/kundali', methods=['POST'])
 def generate_kundali():
@@ -124,22 +136,16 @@ def generate_kundali():
         tz = float(data.get('tz', 5.5))
         dt = datetime.strptime(f"{dob_str} {time_str}", "%Y-%m-%d %H:%M")
         jd = swe.julday(dt.year, dt.month, dt.day, dt.hour + dt.minute / 60.0 - tz)
-        cusps, ascmc = swe.houses(jd, lat, lon, b'P')
+        cusps, ascmc = EPHE.houses(jd, lat, lon, b'P')
         ascendant_deg = ascmc[0]
         planet_results = {}
 
         for pname, pcode in PLANETS.items():
-            pos1, flags1 = swe.calc_ut(jd, pcode)
-            pos2, flags2 = swe.calc_ut(jd + 1.0 / 24.0, pcode)
+            pos1, flags1 = EPHE.calc_ut(jd, pcode)
             lon1 = float(pos1[0])
-            lon2 = float(pos2[0])
-            diff = (lon2 - lon1)
-            if diff > 180:
-                diff -= 360
-            if diff < -180:
-                diff += 360
-            deg_per_day = diff / (1.0 / 24.0)
-            retro = deg_per_day < 0
+            deg_per_day = float(pos1[3])
+            # Ketu here is the true node, which is sometimes direct: trust its speed
+            retro = deg_per_day < 0 if pname in ('Rahu', 'Ketu') else is_retrograde(pname, jd)
             gdeg = normalize_angle(lon1)
             rasi_idx = sign_index_from_degree(gdeg)
             rasi_no = rasi_idx + 1
@@ -163,7 +169,7 @@ def generate_kundali():
             is_combust = False
             if pname not in ('Rahu', 'Ketu', 'Moon'):
                 if 'Sun' not in planet_results:
-                    sun_pos, _ = swe.calc_ut(jd, swe.SUN)
+                    sun_pos, _ = EPHE.calc_ut(jd, swe.SUN)
                     sun_deg_tmp = float(sun_pos[0])
                 else:
                     sun_deg_tmp = planet_results['Sun']['global_degree']
@@ -268,23 +274,24 @@ def generate_kundali():
 
         moon_nak_idx = get_nakshatra_info(planet_results['Moon']['global_degree'])[0]
         birth_dasa = compute_vimshottari_dasa(moon_nak_idx, dt)
-        current_dasa = compute_current_dasa(dt)
+        current_dasa = compute_current_dasa(dt, planet_results['Moon']['global_degree'])
 
         lucky_gems = ["ruby"] if "Sun" in birth_dasa else ["emerald"]
         lucky_nums = [1] if "Sun" in birth_dasa else [3]
         lucky_colors = ["copper"] if "Sun" in birth_dasa else ["blue"]
         lucky_letters = ["B", "G"] if "Sun" in birth_dasa else ["C", "L"]
 
-        ayan = swe.get_ayanamsa(jd)
+        ayan = EPHE.get_ayanamsa(jd)
         weekday = dt.strftime("%A")
+        sun_times = day_sun_times(dt.date(), lat, lon, tz)
         panchang = {
             "ayanamsa": ayan,
             "ayanamsa_name": "Lahiri",
             "day_of_birth": weekday,
             "day_lord": "Sun",
             "hora_lord": "Venus",
-            "sunrise_at_birth": "-",
-            "sunset_at_birth": "-",
+            "sunrise_at_birth": format_local_time(sun_times["sunrise_jd"], tz),
+            "sunset_at_birth": format_local_time(sun_times["sunset_jd"], tz),
             "tithi": "Dwitiya",
             "yoga": "Vyaghata",
             "karana": "Balava"
@@ -7,13 +7,19 @@ import uuid
 import os
 from groq import Groq   # pip install groq
 import traceback
+from ephemeris import LAHIRI
+from dasha import DashaTimeline
+from ephemeris_events import is_retrograde
+from houses import house_positions
+from aspects import western_aspects
 
 app = Flask(__name__)
 
 # ----------------------------
 # Configuration
 # ----------------------------
-swe.set_ephe_path(r'D:\python\astro-py\ephe')   # your ephemeris folder
+# Lahiri ayanamsa and the ephemeris path travel with every call (see ephemeris.EphemerisContext)
+EPHE = LAHIRI
 
 # server-side session store (in-memory)
 # session_id -> { "kundali": {...}, "chats": [ {user,bot,ts} ], "created_at": dt }
@@ -49,10 +55,8 @@ NAKSHATRA_LORDS = [
     "Jupiter","Saturn","Mercury"
 ]
 
-# Vimshottari order & durations (years)
+# Vimshottari order (durations live in dasha.VIMSHOTTARI)
 VIM_ORDER = ["Ketu","Venus","Sun","Moon","Mars","Rahu","Jupiter","Saturn","Mercury"]
-VIM_YEARS = {"Ketu":7,"Venus":20,"Sun":6,"Moon":10,"Mars":7,"Rahu":18,"Jupiter":16,"Saturn":19,"Mercury":17}
-TOTAL_VIM_YEARS = sum(VIM_YEARS.values())  # 120
 
 # ----------------------------
 # Utilities
@@ -85,126 +89,48 @@ def round2(v):
         return v
 
 # ----------------------------
-# Vimshottari calculation (approximate practical implementation)
+# Vimshottari calculation (lazy dasha tree, see dasha.py)
 # ----------------------------
 def compute_vimshottari_for_birth(birth_dt, moon_global_deg):
     """
     Returns:
-      - mahadasha_sequence: list of dicts {lord, start_dt, end_dt, years_duration}
-      - current info: {current_maha, maha_index, days_into_maha, remaining_days, current_antar (approx)}
+      - mahadashas: from birth through the one running now (at least one full cycle),
+        the first starting at birth with its balance years
+      - antar_sequence: antardashas of the current mahadasha
+      - current maha / antar, and current_periods from maha down to prana
     """
-    # moon nakshatra index and fraction within nakshatra
-    span = 360.0 / 27.0
-    nak_index = int(moon_global_deg // span)  # 0-based
-    pos_in_nak = (moon_global_deg % span) / span  # 0..1 (fraction inside nakshatra)
-    # start dasa lord
-    start_lord = NAKSHATRA_LORDS[nak_index]  # string like "Ketu"
-    # rotate VIM_ORDER so it starts from start_lord
-    if start_lord in VIM_ORDER:
-        si = VIM_ORDER.index(start_lord)
-        seq = VIM_ORDER[si:] + VIM_ORDER[:si]
-    else:
-        seq = VIM_ORDER[:]  # fallback
+    timeline = DashaTimeline(birth_dt, moon_global_deg, "vimshottari")
+    now = datetime.utcnow()
 
-    # Remaining fraction of the starting dasha at birth:
-    remaining_fraction = 1.0 - pos_in_nak  # portion of that dasha left
-    # Compute mahadasha durations and start/end datetimes
     mahadashas = []
-    cur_start = birth_dt
-    # first dasa remaining duration = remaining_fraction * VIM_YEARS[start_lord]
-    first_years = remaining_fraction * VIM_YEARS[start_lord]
-    first_days = first_years * 365.25
-    cur_end = cur_start + timedelta(days=first_days)
-    mahadashas.append({
-        "lord": start_lord,
-        "start": cur_start,
-        "end": cur_end,
-        "years": first_years
-    })
-    # subsequent full dashas
-    for lord in seq[1:]:
-        years = VIM_YEARS[lord]
-        days = years * 365.25
-        s = cur_end
-        e = s + timedelta(days=days)
-        mahadashas.append({"lord": lord, "start": s, "end": e, "years": years})
-        cur_end = e
-    # then continue looping full cycles until coverage up to, say, birth + 130 years
-    # find how many cycles needed to cover now
-    now = datetime.utcnow()
-    while mahadashas[-1]["end"] < now:
-        for lord in seq:
-            years = VIM_YEARS[lord]
-            days = years * 365.25
-            s = mahadashas[-1]["end"]
-            e = s + timedelta(days=days)
-            mahadashas.append({"lord": lord, "start": s, "end": e, "years": years})
-            if mahadashas[-1]["end"] >= now:
-                break
-
-    # find current mahadasha index
-    current = None
-    for idx, m in enumerate(mahadashas):
-        if m["start"] <= now < m["end"]:
-            current = {"index": idx, "maha": m}
-            break
-    if current is None:
-        current = {"index": len(mahadashas)-1, "maha": mahadashas[-1]}
-
-    # compute antar (sub-dasa) within current mahadasha (approx)
-    # Antar proportions use the full sequence order and durations scaled to maha years.
-    maha_lord = current["maha"]["lord"]
-    maha_years = current["maha"]["years"]
-    # antar sequence ALWAYS starts from maha_lord in normal order
-    # find order index in VIM_ORDER
-    base_order = VIM_ORDER[:]
-    start_idx = base_order.index(maha_lord) if maha_lord in base_order else 0
-    antar_seq = base_order[start_idx:] + base_order[:start_idx]
-    # antar durations (years) = (planet_years / 120) * maha_total_years
-    antar_list = []
-    maha_start = current["maha"]["start"]
-    for p in antar_seq:
-        fraction = VIM_YEARS[p] / TOTAL_VIM_YEARS
-        p_years = fraction * maha_years
-        p_days = p_years * 365.25
-        s = maha_start
-        e = s + timedelta(days=p_days)
-        antar_list.append({"lord": p, "start": s, "end": e, "years": p_years})
-        maha_start = e
-        if maha_start > current["maha"]["end"]:
+    for m in timeline.mahadashas():
+        mahadashas.append(m)
+        if len(mahadashas) >= len(VIM_ORDER) and m.end > now:
             break
 
-    # find current antar
-    current_antar = None
-    for a in antar_list:
-        if a["start"] <= datetime.utcnow() < a["end"]:
-            current_antar = a
-            break
+    current_periods = timeline.active(now, depth=5)
+    if current_periods:
+        current_maha = current_periods[0]
+        current_index = next(i for i, m in enumerate(mahadashas) if m.start == current_maha.start)
+    else:
+        current_index, current_maha = len(mahadashas) - 1, mahadashas[-1]
+    current_antar = current_periods[1] if len(current_periods) > 1 else None
 
     # simplify outputs: convert datetimes to ISO strings
-    def iso(dt): return dt.isoformat()
-
-    mahadashas_simple = [
-        {"lord": m["lord"], "start": iso(m["start"]), "end": iso(m["end"]), "years": round(m["years"], 6)}
-        for m in mahadashas
-    ]
-
-    antar_simple = [
-        {"lord": a["lord"], "start": iso(a["start"]), "end": iso(a["end"]), "years": round(a["years"],6)}
-        for a in antar_list
-    ]
+    def simple(p):
+        if p.level == "maha" and p.start < birth_dt:
+            # the dasha running at birth is shown from birth, with its balance
+            return {"lord": p.lord, "start": birth_dt.isoformat(), "end": p.end.isoformat(),
+                    "years": round(timeline.balance_years, 6)}
+        return {"lord": p.lord, "start": p.start.isoformat(), "end": p.end.isoformat(), "years": round(p.years, 6)}
 
     result = {
-        "mahadashas": mahadashas_simple,
-        "antar_sequence": antar_simple,
-        "current_maha_index": current["index"],
-        "current_maha": {
-            "lord": current["maha"]["lord"],
-            "start": iso(current["maha"]["start"]),
-            "end": iso(current["maha"]["end"]),
-            "years": round(current["maha"]["years"],6)
-        },
-        "current_antar": ({"lord": current_antar["lord"], "start": iso(current_antar["start"]), "end": iso(current_antar["end"]), "years": round(current_antar["years"],6)} if current_antar else None)
+        "mahadashas": [simple(m) for m in mahadashas],
+        "antar_sequence": [simple(a) for a in current_maha.children()],
+        "current_maha_index": current_index,
+        "current_maha": simple(current_maha),
+        "current_antar": simple(current_antar) if current_antar else None,
+        "current_periods": [p.to_dict() for p in current_periods]
     }
     return result
 
@@ -223,22 +149,16 @@ def generate_kundali(dob, time_str, lat, lon):
     planet_positions = {}
     speeds = {}
 
-    # planets positions and speed estimate (1 hour)
-    jd2 = jd + (1.0/24.0)
+    # planet positions and speeds
     for pname, pcode in PLANETS.items():
-        pos1, flags1 = swe.calc_ut(jd, pcode)
-        pos2, flags2 = swe.calc_ut(jd2, pcode)
+        pos1, flags1 = EPHE.calc_ut(jd, pcode)
 
         lon1 = float(pos1[0])
-        lon2 = float(pos2[0])
 
-        # compute delta deg/day properly (handle wrap)
-        diff = (lon2 - lon1)
-        if diff > 180: diff -= 360
-        if diff < -180: diff += 360
-        deg_per_day = diff / (1.0/24.0)  # since diff over 1 hour
+        # speed comes with the position; stations are looked up, not estimated
+        deg_per_day = float(pos1[3])
         rad_per_day = deg_per_day * math.pi / 180.0
-        retro = deg_per_day < 0
+        retro = is_retrograde(pname, jd)
 
         # Ketu opposite Rahu for representation: compute Rahu as mean node, Ketu as opposite
         if pname == 'Ketu':
@@ -250,7 +170,7 @@ def generate_kundali(dob, time_str, lat, lon):
         speeds[pname] = {"deg_per_day": deg_per_day, "rad_per_day": rad_per_day, "retro": retro}
 
     # houses & ascendant
-    cusps, ascmc = swe.houses(jd, lat, lon, b'P')
+    cusps, ascmc = EPHE.houses(jd, lat, lon, b'P')
     ascendant = float(ascmc[0])
 
     # build planet detailed entries (matching your desired advanced format)
@@ -278,8 +198,9 @@ def generate_kundali(dob, time_str, lat, lon):
     response[str(idx)] = asc_info
     idx += 1
 
-    # Planet entries in standard order
+    # Planet entries in standard order, Placidus houses for all of them in one lookup
     order = ["Sun","Moon","Mars","Mercury","Jupiter","Venus","Saturn","Rahu","Ketu"]
+    planet_houses = house_positions({p: planet_positions[p] for p in order}, cusps)
     for p in order:
         gdeg = planet_positions[p]
         local_deg = degree_in_sign(gdeg)
@@ -294,7 +215,7 @@ def generate_kundali(dob, time_str, lat, lon):
             "progress_in_percentage": round2((local_deg/30.0)*100.0),
             "rasi_no": rasi_idx + 1,
             "zodiac": ["Aries","Taurus","Gemini","Cancer","Leo","Virgo","Libra","Scorpio","Sagittarius","Capricorn","Aquarius","Pisces"][rasi_idx],
-            "house": None,  # we will fill by finding which house cusp contains this degree
+            "house": planet_houses[p],
             "speed_radians_per_day": round2(sp["rad_per_day"]),
             "retro": bool(sp["retro"]),
             "nakshatra": nak_info[1],
@@ -305,23 +226,6 @@ def generate_kundali(dob, time_str, lat, lon):
             "basic_avastha": "-",   # placeholder heuristics, can be improved
             "lord_status": "-"
         }
-        # determine house by checking cusps: house i spans cusp[i-1]..cusp[i] (Placidus has cusps list)
-        # We'll use simple logic: find first cusp > degree, house number = that index
-        hno = None
-        for i in range(12):
-            c = cusps[i]
-            nxt = cusps[(i+1) % 12]
-            # handle wrap
-            if c <= nxt:
-                if c <= gdeg < nxt:
-                    hno = i+1
-                    break
-            else:
-                # wrap around 360
-                if gdeg >= c or gdeg < nxt:
-                    hno = i+1
-                    break
-        entry["house"] = hno if hno else 12
         response[str(idx)] = entry
         idx += 1
 
@@ -330,7 +234,7 @@ def generate_kundali(dob, time_str, lat, lon):
     dasha_info = compute_vimshottari_for_birth(dt, moon_deg)
 
     # panchang basics
-    ayan = swe.get_ayanamsa(jd)
+    ayan = EPHE.get_ayanamsa(jd)
     weekday = dt.strftime("%A")
     panchang = {
         "ayanamsa": ayan,
@@ -383,23 +287,7 @@ def build_fact_list_from_stored(kundali_full):
 
     # aspects
     # detect aspects using planet_positions
-    aspects = []
-    names = list(planet_positions.keys())
-    for i in range(len(names)):
-        for j in range(i+1, len(names)):
-            a = planet_positions[names[i]]
-            b = planet_positions[names[j]]
-            diff = abs((a - b + 180) % 360 - 180)
-            if diff <= 8:
-                aspects.append(f"{names[i]}-{names[j]} conjunction (orb {diff:.2f})")
-            elif abs(diff-180) <= 8:
-                aspects.append(f"{names[i]}-{names[j]} opposition (orb {diff:.2f})")
-            elif abs(diff-120) <= 6:
-                aspects.append(f"{names[i]}-{names[j]} trine (orb {diff:.2f})")
-            elif abs(diff-90) <= 6:
-                aspects.append(f"{names[i]}-{names[j]} square (orb {diff:.2f})")
-            elif abs(diff-60) <= 5:
-                aspects.append(f"{names[i]}-{names[j]} sextile (orb {diff:.2f})")
+    aspects = [f"{a}-{b} {typ} (orb {orb:.2f})" for a, b, typ, orb in western_aspects(planet_positions)]
     facts.append("Aspects: " + (", ".join(aspects) if aspects else "None"))
 
     # dasha summary
@@ -0,0 +1,125 @@
+import numpy as np
+
+# -------------------------------------------------
+# RULES
+# -------------------------------------------------
+# Parashara's benefic places: for each planet's Bhinnashtakavarga, the houses
+# counted from each contributor (the seven planets and the lagna) whose sign
+# receives a bindu. Totals are 48, 49, 39, 54, 56, 52 and 39 (SAV 337).
+PLANETS = ["Sun", "Moon", "Mars", "Mercury", "Jupiter", "Venus", "Saturn"]
+CONTRIBUTORS = PLANETS + ["Ascendant"]
+
+BENEFIC_HOUSES = {
+    "Sun": {
+        "Sun": [1, 2, 4, 7, 8, 9, 10, 11], "Moon": [3, 6, 10, 11],
+        "Mars": [1, 2, 4, 7, 8, 9, 10, 11], "Mercury": [3, 5, 6, 9, 10, 11, 12],
+        "Jupiter": [5, 6, 9, 11], "Venus": [6, 7, 12],
+        "Saturn": [1, 2, 4, 7, 8, 9, 10, 11], "Ascendant": [3, 4, 6, 10, 11, 12]
+    },
+    "Moon": {
+        "Sun": [3, 6, 7, 8, 10, 11], "Moon": [1, 3, 6, 7, 10, 11],
+        "Mars": [2, 3, 5, 6, 9, 10, 11], "Mercury": [1, 3, 4, 5, 7, 8, 10, 11],
+        "Jupiter": [1, 4, 7, 8, 10, 11, 12], "Venus": [3, 4, 5, 7, 9, 10, 11],
+        "Saturn": [3, 5, 6, 11], "Ascendant": [3, 6, 10, 11]
+    },
+    "Mars": {
+        "Sun": [3, 5, 6, 10, 11], "Moon": [3, 6, 11],
+        "Mars": [1, 2, 4, 7, 8, 10, 11], "Mercury": [3, 5, 6, 11],
+        "Jupiter": [6, 10, 11, 12], "Venus": [6, 8, 11, 12],
+        "Saturn": [1, 4, 7, 8, 9, 10, 11], "Ascendant": [1, 3, 6, 10, 11]
+    },
+    "Mercury": {
+        "Sun": [5, 6, 9, 11, 12], "Moon": [2, 4, 6, 8, 10, 11],
+        "Mars": [1, 2, 4, 7, 8, 9, 10, 11], "Mercury": [1, 3, 5, 6, 9, 10, 11, 12],
+        "Jupiter": [6, 8, 11, 12], "Venus": [1, 2, 3, 4, 5, 8, 9, 11],
+        "Saturn": [1, 2, 4, 7, 8, 9, 10, 11], "Ascendant": [1, 2, 4, 6, 8, 10, 11]
+    },
+    "Jupiter": {
+        "Sun": [1, 2, 3, 4, 7, 8, 9, 10, 11], "Moon": [2, 5, 7, 9, 11],
+        "Mars": [1, 2, 4, 7, 8, 10, 11], "Mercury": [1, 2, 4, 5, 6, 9, 10, 11],
+        "Jupiter": [1, 2, 3, 4, 7, 8, 10, 11], "Venus": [2, 5, 6, 9, 10, 11],
+        "Saturn": [3, 5, 6, 12], "Ascendant": [1, 2, 4, 5, 6, 7, 9, 10, 11]
+    },
+    "Venus": {
+        "Sun": [8, 11, 12], "Moon": [1, 2, 3, 4, 5, 8, 9, 11, 12],
+        "Mars": [3, 5, 6, 9, 11, 12], "Mercury": [3, 5, 6, 9, 11],
+        "Jupiter": [5, 8, 9, 10, 11], "Venus": [1, 2, 3, 4, 5, 8, 9, 10, 11],
+        "Saturn": [3, 4, 5, 8, 9, 10, 11], "Ascendant": [1, 2, 3, 4, 5, 8, 9, 11]
+    },
+    "Saturn": {
+        "Sun": [1, 2, 4, 7, 8, 10, 11], "Moon": [3, 6, 11],
+        "Mars": [3, 5, 6, 10, 11, 12], "Mercury": [6, 8, 9, 10, 11, 12],
+        "Jupiter": [5, 6, 11, 12], "Venus": [6, 11, 12],
+        "Saturn": [3, 5, 6, 11], "Ascendant": [1, 3, 4, 6, 10, 11]
+    }
+}
+
+# -------------------------------------------------
+# BITMASK TABLES
+# -------------------------------------------------
+# Each rule is a 12-bit mask (bit h-1 for house h). Placing the contributor
+# in sign s rotates the mask left by s, giving the signs that get a bindu.
+# The rotated mask is then spread to one 4-bit lane per sign in a uint64, so
+# adding the eight contributors' words counts bindus in every sign at once
+# (at most 8 per lane, no carries). RULE_WORDS[planet, contributor, sign]
+# holds those words; a chart's BAV row is 8 lookups and 7 additions.
+LANE_BITS = 4
+LANE_MASK = (1 << LANE_BITS) - 1
+
+RULE_MASKS = np.array([
+    [sum(1 << (house - 1) for house in BENEFIC_HOUSES[planet][contributor]) for contributor in CONTRIBUTORS]
+    for planet in PLANETS
+], dtype=np.int64)
+
+def _rotate12(mask, shift):
+    return ((mask << shift) | (mask >> (12 - shift))) & 0xFFF
+
+def _spread(mask):
+    return sum(1 << (LANE_BITS * sign) for sign in range(12) if mask >> sign & 1)
+
+RULE_WORDS = np.array([
+    [[_spread(_rotate12(int(mask), sign)) for sign in range(12)] for mask in row]
+    for row in RULE_MASKS
+], dtype=np.uint64)
+
+LANE_SHIFTS = (np.arange(12) * LANE_BITS).astype(np.uint64)
+
+# -------------------------------------------------
+# EVALUATION
+# -------------------------------------------------
+def packed_bav(signs):
+    """
+    (n, 7) uint64 nibble-packed BAVs from (n, 8) 0-based contributor signs
+    in CONTRIBUTORS order
+    """
+    signs = np.asarray(signs, dtype=np.intp)
+    planets = np.arange(len(PLANETS))[None, :, None]
+    contributors = np.arange(len(CONTRIBUTORS))[None, None, :]
+    words = RULE_WORDS[planets, contributors, signs[:, None, :]]  # (n, 7, 8)
+    return words.sum(axis=-1, dtype=np.uint64)
+
+def unpack_bav(packed):
+    """(..., 12) uint8 bindus per sign (Aries first) from packed words"""
+    return ((packed[..., None] >> LANE_SHIFTS) & np.uint64(LANE_MASK)).astype(np.uint8)
+
+def ashtakavarga_batch(longitudes):
+    """
+    BAV (n, 7, 12) and SAV (n, 12) for sidereal longitudes (n, 8) of the
+    seven planets and the ascendant, in CONTRIBUTORS order.
+    """
+    signs = (np.asarray(longitudes, dtype=np.float64) // 30).astype(np.intp) % 12
+    bav = unpack_bav(packed_bav(signs))
+    return bav, bav.sum(axis=1, dtype=np.uint16)
+
+def ashtakavarga(longitudes):
+    """
+    Bhinnashtakavarga per planet and Sarvashtakavarga for one chart, from a
+    {body: sidereal longitude} mapping covering CONTRIBUTORS. Lists run
+    Aries to Pisces.
+    """
+    bav, sav = ashtakavarga_batch([[longitudes[body] for body in CONTRIBUTORS]])
+    return {
+        "bav": {planet: bav[0, i].tolist() for i, planet in enumerate(PLANETS)},
+        "sav": sav[0].tolist(),
+        "total": int(sav[0].sum())
+    }
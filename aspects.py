@@ -0,0 +1,199 @@
+import numpy as np
+from longitude_tables import table_calc_batch
+from transitions import TIME_TOLERANCE, MAX_ITERATIONS
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+# Western aspects: name -> (angle, default orb in degrees). Pass an orbs dict
+# ({name: orb}) to any function below to override per call.
+ASPECTS = {
+    "conjunction": (0.0, 8.0),
+    "sextile": (60.0, 5.0),
+    "square": (90.0, 6.0),
+    "trine": (120.0, 6.0),
+    "opposition": (180.0, 8.0)
+}
+ASPECT_NAMES = list(ASPECTS)
+
+# Vedic graha drishti: houses (counted from the planet's own sign, whole
+# sign) each body aspects. Everyone aspects the 7th; Mars, Jupiter and
+# Saturn have their special aspects, and the nodes are given Jupiter's.
+DRISHTI_HOUSES = {
+    "Sun": (7,), "Moon": (7,), "Mercury": (7,), "Venus": (7,),
+    "Mars": (4, 7, 8), "Jupiter": (5, 7, 9), "Saturn": (3, 7, 10),
+    "Rahu": (5, 7, 9), "Ketu": (5, 7, 9)
+}
+
+# Grid step (days) used to bracket exact aspects before root finding. Steps
+# containing a station are split at it, so each bracket is monotone and a
+# body that passes an aspect point and comes back is seen twice
+SCAN_STEP_DAYS = {"Moon": 0.5, "Mercury": 1.0, "Venus": 1.0, "Sun": 2.0, "Mars": 2.0}
+DEFAULT_SCAN_STEP_DAYS = 4.0
+
+def _angles_and_orbs(aspects=None, orbs=None):
+    names = ASPECT_NAMES if aspects is None else list(aspects)
+    orbs = orbs or {}
+    angles = np.array([ASPECTS[name][0] for name in names])
+    limits = np.array([float(orbs.get(name, ASPECTS[name][1])) for name in names])
+    return names, angles, limits
+
+def _separation(a, b):
+    """Shortest angular distance, 0-180"""
+    return np.abs((a - b + 180.0) % 360.0 - 180.0)
+
+# -------------------------------------------------
+# WESTERN ASPECTS
+# -------------------------------------------------
+def match_aspects(separation, orbs=None, aspects=None):
+    """
+    Nearest aspect for an array of separations (0-180): (aspect index into
+    the aspect list or -1 when outside its orb, orb). Any shape.
+    """
+    _, angles, limits = _angles_and_orbs(aspects, orbs)
+    deviation = np.abs(separation[..., None] - angles)
+    nearest = deviation.argmin(axis=-1)
+    orb = np.take_along_axis(deviation, nearest[..., None], axis=-1)[..., 0]
+    return np.where(orb <= limits[nearest], nearest, -1), orb
+
+def western_aspects_batch(longitudes, orbs=None, aspects=None):
+    """
+    Pairwise aspects inside each of many charts: longitudes (n, bodies) ->
+    (aspect index (n, bodies, bodies), -1 for none, and orb). The diagonal is -1.
+    """
+    lons = np.asarray(longitudes, dtype=np.float64)
+    index, orb = match_aspects(_separation(lons[:, :, None], lons[:, None, :]), orbs, aspects)
+    diagonal = np.arange(lons.shape[1])
+    index[:, diagonal, diagonal] = -1
+    return index, orb
+
+def western_aspects(positions, orbs=None, aspects=None):
+    """[(body, body, aspect, orb)] for one chart, positions {name: longitude}, each pair once"""
+    names = list(positions)
+    index, orb = western_aspects_batch([[positions[name] for name in names]], orbs, aspects)
+    aspect_names = ASPECT_NAMES if aspects is None else list(aspects)
+    upper = np.triu(index[0] >= 0, k=1)
+    return [(names[i], names[j], aspect_names[index[0, i, j]], float(orb[0, i, j]))
+            for i, j in zip(*np.nonzero(upper))]
+
+def cross_aspects(transit, natal, orbs=None, aspects=None):
+    """
+    Aspects from one set of positions (bodies,) to many charts (n, points):
+    (aspect index (n, bodies, points) or -1, orb)
+    """
+    transit = np.asarray(transit, dtype=np.float64)
+    natal = np.asarray(natal, dtype=np.float64)
+    return match_aspects(_separation(transit[None, :, None], natal[:, None, :]), orbs, aspects)
+
+# -------------------------------------------------
+# VEDIC GRAHA DRISHTI
+# -------------------------------------------------
+def _drishti_masks(names):
+    return np.array([sum(1 << house for house in DRISHTI_HOUSES.get(name, ())) for name in names], dtype=np.int64)
+
+def graha_drishti_batch(longitudes, names):
+    """
+    Sign aspects for many charts: (n, bodies, bodies) bool, [c, i, j] when
+    body i aspects body j's sign. Bodies without drishti (the ascendant)
+    only receive aspects.
+    """
+    signs = (np.asarray(longitudes, dtype=np.float64) // 30).astype(np.int64)
+    houses = (signs[:, None, :] - signs[:, :, None]) % 12 + 1
+    hits = (_drishti_masks(names)[None, :, None] >> houses) & 1
+    return hits.astype(bool)
+
+def graha_drishti(positions):
+    """[(from, to, house)] for one chart, positions {name: sidereal longitude}"""
+    names = list(positions)
+    lons = [positions[name] for name in names]
+    hits = graha_drishti_batch([lons], names)[0]
+    signs = [int(lon // 30) for lon in lons]
+    return [(names[i], names[j], (signs[j] - signs[i]) % 12 + 1) for i, j in zip(*np.nonzero(hits))]
+
+# -------------------------------------------------
+# EXACT ASPECT TIMES
+# -------------------------------------------------
+def _body_positions(jds, body, sid_mode):
+    """Longitude and speed arrays of one body (Ketu is Rahu + 180)"""
+    lons, speeds = table_calc_batch(jds, ["Rahu" if body == "Ketu" else body], sid_mode)
+    lons, speeds = lons[:, 0], speeds[:, 0]
+    if body == "Ketu":
+        lons = (lons + 180.0) % 360.0
+    return lons, speeds
+
+def _stations(lo, hi, body, sid_mode):
+    """Instants where the speed changes sign inside each [lo, hi], by bisection"""
+    _, speed = _body_positions(lo, body, sid_mode)
+    sign_lo = np.sign(speed)
+    while np.max(hi - lo) > TIME_TOLERANCE:
+        mid = (lo + hi) / 2
+        _, speed = _body_positions(mid, body, sid_mode)
+        same_side = np.sign(speed) == sign_lo
+        lo = np.where(same_side, mid, lo)
+        hi = np.where(same_side, hi, mid)
+    return (lo + hi) / 2
+
+def exact_aspect_times(body, natal_longitude, jd_start, jd_end, aspects=None, sid_mode=None):
+    """
+    Every instant in [jd_start, jd_end) when body is exactly at an aspect to
+    natal_longitude, as [(jd, aspect name, retrograde)] sorted by time.
+
+    A coarse grid, split at any station inside it, brackets sign changes of
+    (longitude - target), one target per aspect direction, all in one batch;
+    the brackets are then refined together by Newton steps on the body's
+    speed, falling back to bisection whenever a step leaves its bracket.
+    """
+    names = ASPECT_NAMES if aspects is None else list(aspects)
+    target_names, targets = [], []
+    for name in names:
+        angle = ASPECTS[name][0]
+        for offset in {angle % 360.0, -angle % 360.0}:
+            target_names.append(name)
+            targets.append((natal_longitude + offset) % 360.0)
+    targets = np.array(targets)
+
+    step = SCAN_STEP_DAYS.get(body, DEFAULT_SCAN_STEP_DAYS)
+    grid = np.append(np.arange(jd_start, jd_end, step), jd_end)
+    lons, speeds = _body_positions(grid, body, sid_mode)
+    turning = np.nonzero(np.sign(speeds[:-1]) != np.sign(speeds[1:]))[0]
+    if turning.size:
+        stations = _stations(grid[turning], grid[turning + 1], body, sid_mode)
+        grid = np.concatenate((grid, stations))
+        lons = np.concatenate((lons, _body_positions(stations, body, sid_mode)[0]))
+        order = np.argsort(grid, kind="stable")
+        grid, lons = grid[order], lons[order]
+    f = (lons[:, None] - targets[None, :] + 180.0) % 360.0 - 180.0  # (grid, targets)
+
+    # a root lies where f changes sign without jumping across the +-180 seam
+    crossing = (np.sign(f[:-1]) != np.sign(f[1:])) & (np.abs(f[1:] - f[:-1]) < 180.0)
+    steps, which = np.nonzero(crossing)
+    if steps.size == 0:
+        return []
+    lo, hi = grid[steps], grid[steps + 1]
+    f_lo = f[steps, which]
+    target = targets[which]
+
+    x = (lo + hi) / 2
+    for _ in range(MAX_ITERATIONS * 4):
+        value, speed = _body_positions(x, body, sid_mode)
+        value = (value - target + 180.0) % 360.0 - 180.0
+        same_side = np.sign(value) == np.sign(f_lo)
+        lo = np.where(same_side, x, lo)
+        hi = np.where(same_side, hi, x)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = x - value / speed
+        bisect = (lo + hi) / 2
+        x_next = np.where((newton > lo) & (newton < hi), newton, bisect)
+        done = np.abs(x_next - x) < TIME_TOLERANCE
+        x = x_next
+        if np.all(done):
+            break
+
+    _, speed = _body_positions(x, body, sid_mode)
+    events, last = [], {}
+    for jd, w, retro in sorted(zip(x.tolist(), which.tolist(), (speed < 0).tolist())):
+        # a root on a grid point is bracketed from both sides
+        if jd_start <= jd < jd_end and not (w in last and jd - last[w] < TIME_TOLERANCE):
+            events.append((jd, target_names[w], retro))
+        last[w] = jd
+    return events
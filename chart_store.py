@@ -0,0 +1,297 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import swisseph as swe
+from ephemeris import KRISHNAMURTI
+from dasha import DashaTimeline, DASHA_YEAR_DAYS
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+# Natal charts persisted once and queried through SQLite indexes instead of
+# recomputing across the user base. A chart row keeps its birth input, the
+# sidereal longitudes of STORE_BODIES as a float32 blob, and indexed columns
+# for the Moon nakshatra, the lagna and every planet's sign. Vimshottari
+# mahadashas go in their own table, indexed by lord and start.
+CHART_STORE_DB = os.getenv("CHART_STORE_DB", "charts.db")
+
+STORE_BODIES = ["Sun", "Moon", "Mars", "Mercury", "Jupiter", "Venus", "Saturn", "Rahu", "Ketu", "Ascendant"]
+EPHEMERIS_BODIES = STORE_BODIES[:8]  # Ketu and the ascendant are derived
+
+# Every body but the ascendant (that is lagna_rashi) has a sign column; only
+# these get an index, the others are scanned
+SIGN_BODIES = STORE_BODIES[:-1]
+INDEXED_SIGN_BODIES = ["Sun", "Moon", "Mars", "Jupiter", "Saturn", "Rahu"]
+
+# Mahadashas stored per chart, from birth onwards
+STORE_DASHA_YEARS = 120
+
+RASHI_NAMES = ["Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+               "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"]
+NAKSHATRA_NAMES = [
+    "Ashwini", "Bharani", "Krittika", "Rohini", "Mrigashira", "Ardra",
+    "Punarvasu", "Pushya", "Ashlesha", "Magha", "Purva Phalguni", "Uttara Phalguni",
+    "Hasta", "Chitra", "Swati", "Vishakha", "Anuradha", "Jyeshtha",
+    "Mula", "Purva Ashadha", "Uttara Ashadha", "Shravana", "Dhanishta",
+    "Shatabhisha", "Purva Bhadrapada", "Uttara Bhadrapada", "Revati"
+]
+
+# Mahadasha bounds are stored as UTC text in this format, so they sort and
+# compare as strings
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def sign_column(body):
+    return f"{body.lower()}_sign"
+
+def rashi_number(rashi):
+    """1-based sign number from a number, a digit string or an English name"""
+    if isinstance(rashi, int) or str(rashi).strip().isdigit():
+        return int(rashi)
+    names = [name.lower() for name in RASHI_NAMES]
+    if rashi.strip().lower() not in names:
+        raise ValueError(f"Unknown rashi '{rashi}'")
+    return names.index(rashi.strip().lower()) + 1
+
+def nakshatra_number(nakshatra):
+    """1-based nakshatra number from a number, a digit string or a name"""
+    if isinstance(nakshatra, int) or str(nakshatra).strip().isdigit():
+        return int(nakshatra)
+    names = [name.lower() for name in NAKSHATRA_NAMES]
+    if nakshatra.strip().lower() not in names:
+        raise ValueError(f"Unknown nakshatra '{nakshatra}'")
+    return names.index(nakshatra.strip().lower()) + 1
+
+def utc_text(dt):
+    return dt.astimezone(timezone.utc).strftime(TIME_FORMAT)
+
+# -------------------------------------------------
+# BUILD
+# -------------------------------------------------
+def birth_instant(birth_date, birth_time, tz):
+    """UTC-aware birth datetime and its Julian day"""
+    local = datetime.strptime(f"{birth_date.strip()} {birth_time.strip()}", "%Y-%m-%d %H:%M")
+    dt = local.replace(tzinfo=timezone(timedelta(hours=tz))).astimezone(timezone.utc)
+    jd = swe.julday(dt.year, dt.month, dt.day, dt.hour + dt.minute / 60.0 + dt.second / 3600.0)
+    return dt, jd
+
+def compute_longitudes(jds, latitudes, longitudes, context=KRISHNAMURTI):
+    """(len(jds), len(STORE_BODIES)) sidereal longitudes, one batch ephemeris call for all charts"""
+    lons = np.empty((len(jds), len(STORE_BODIES)))
+    lons[:, :len(EPHEMERIS_BODIES)] = context.calc_batch(jds, EPHEMERIS_BODIES)[0]
+    lons[:, STORE_BODIES.index("Ketu")] = (lons[:, STORE_BODIES.index("Rahu")] + 180.0) % 360.0
+    ayanamsas = context.ayanamsa_batch(jds)
+    for i, (jd, lat, lon) in enumerate(zip(jds, latitudes, longitudes)):
+        ascendant = context.houses_ex(jd, lat, lon, b'W')[1][0]
+        lons[i, STORE_BODIES.index("Ascendant")] = (ascendant - ayanamsas[i]) % 360.0
+    return lons
+
+def chart_rows(charts, context=KRISHNAMURTI):
+    """
+    Chart and mahadasha rows for dicts with user_id, date_of_birth,
+    time_of_birth, latitude, longitude and optional tz (default 5.5).
+    """
+    births = [birth_instant(c["date_of_birth"], c["time_of_birth"], float(c.get("tz", 5.5))) for c in charts]
+    jds = np.array([jd for _, jd in births])
+    lons = compute_longitudes(jds, [float(c["latitude"]) for c in charts],
+                              [float(c["longitude"]) for c in charts], context)
+    signs = (lons // 30).astype(int) + 1
+    moon = STORE_BODIES.index("Moon")
+    nakshatras = (lons[:, moon] // (360.0 / 27)).astype(int) + 1
+    now = utc_text(datetime.now(timezone.utc))
+
+    rows, dasha_rows = [], []
+    for i, (c, (dt, jd)) in enumerate(zip(charts, births)):
+        rows.append((
+            str(c["user_id"]), c["date_of_birth"].strip(), c["time_of_birth"].strip(),
+            float(c["latitude"]), float(c["longitude"]), float(c.get("tz", 5.5)), context.name,
+            float(jd), lons[i].astype(np.float32).tobytes(),
+            int(nakshatras[i]), int(signs[i, STORE_BODIES.index("Ascendant")]),
+            *(int(s) for s in signs[i, :len(SIGN_BODIES)]), now
+        ))
+        until = dt + timedelta(days=STORE_DASHA_YEARS * DASHA_YEAR_DAYS)
+        for period in DashaTimeline(dt, float(lons[i, moon])).mahadashas(until):
+            dasha_rows.append((str(c["user_id"]), period.lord, utc_text(period.start), utc_text(period.end)))
+    return rows, dasha_rows
+
+# -------------------------------------------------
+# STORE
+# -------------------------------------------------
+class ChartStore:
+    """Natal charts in SQLite with secondary indexes; one connection per thread"""
+
+    def __init__(self, db_path=CHART_STORE_DB):
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._connect() as conn:
+            self._create(conn)
+
+    def _connect(self):
+        # sqlite connections cannot be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _create(self, conn):
+        sign_columns = ", ".join(f"{sign_column(body)} INTEGER NOT NULL" for body in SIGN_BODIES)
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS charts (
+                user_id TEXT PRIMARY KEY,
+                birth_date TEXT NOT NULL,
+                birth_time TEXT NOT NULL,
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL,
+                tz REAL NOT NULL,
+                ayanamsa TEXT NOT NULL,
+                jd REAL NOT NULL,
+                longitudes BLOB NOT NULL,
+                moon_nakshatra INTEGER NOT NULL,
+                lagna_rashi INTEGER NOT NULL,
+                {sign_columns},
+                updated_at TEXT NOT NULL
+            )""")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS mahadashas (
+                user_id TEXT NOT NULL,
+                lord TEXT NOT NULL,
+                start_at TEXT NOT NULL,
+                end_at TEXT NOT NULL
+            )""")
+        conn.execute("CREATE INDEX IF NOT EXISTS charts_moon_nakshatra ON charts (moon_nakshatra)")
+        conn.execute("CREATE INDEX IF NOT EXISTS charts_lagna_rashi ON charts (lagna_rashi)")
+        for body in INDEXED_SIGN_BODIES:
+            column = sign_column(body)
+            conn.execute(f"CREATE INDEX IF NOT EXISTS charts_{column} ON charts ({column})")
+        conn.execute("CREATE INDEX IF NOT EXISTS mahadashas_lord_start ON mahadashas (lord, start_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS mahadashas_user ON mahadashas (user_id)")
+
+    # ---------------- writes ----------------
+    def add_charts(self, charts, context=KRISHNAMURTI):
+        """Compute and upsert many charts in one ephemeris batch and one transaction"""
+        if not charts:
+            return 0
+        rows, dasha_rows = chart_rows(charts, context)
+        placeholders = ", ".join("?" * len(rows[0]))
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM mahadashas WHERE user_id = ?", [(row[0],) for row in rows])
+            conn.executemany(f"INSERT OR REPLACE INTO charts VALUES ({placeholders})", rows)
+            conn.executemany("INSERT INTO mahadashas VALUES (?, ?, ?, ?)", dasha_rows)
+        return len(rows)
+
+    def add_chart(self, user_id, date_of_birth, time_of_birth, latitude, longitude, tz=5.5):
+        self.add_charts([{
+            "user_id": user_id, "date_of_birth": date_of_birth, "time_of_birth": time_of_birth,
+            "latitude": latitude, "longitude": longitude, "tz": tz
+        }])
+
+    def delete_chart(self, user_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM mahadashas WHERE user_id = ?", (str(user_id),))
+            conn.execute("DELETE FROM charts WHERE user_id = ?", (str(user_id),))
+
+    # ---------------- reads ----------------
+    def get_chart(self, user_id):
+        """Stored chart as a dict with sidereal longitudes by body, or None"""
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            row = conn.execute("SELECT * FROM charts WHERE user_id = ?", (str(user_id),)).fetchone()
+        finally:
+            conn.row_factory = None
+        if row is None:
+            return None
+        chart = {key: row[key] for key in row.keys() if key != "longitudes"}
+        lons = np.frombuffer(row["longitudes"], dtype=np.float32)
+        chart["longitudes"] = {body: round(float(lon), 4) for body, lon in zip(STORE_BODIES, lons)}
+        chart["mahadashas"] = [
+            {"lord": lord, "start": start, "end": end}
+            for lord, start, end in conn.execute(
+                "SELECT lord, start_at, end_at FROM mahadashas WHERE user_id = ? ORDER BY start_at", (str(user_id),))
+        ]
+        return chart
+
+    def find(self, moon_nakshatra=None, lagna=None, signs=None, mahadasha=None, at=None, limit=None):
+        """
+        user_ids matching every given filter, through the indexes:
+        moon_nakshatra (name or 1-27), lagna (name or 1-12), signs
+        ({body: sign}), mahadasha lord running at at (default now).
+        """
+        where, params = [], []
+        if moon_nakshatra is not None:
+            where.append("c.moon_nakshatra = ?")
+            params.append(nakshatra_number(moon_nakshatra))
+        if lagna is not None:
+            where.append("c.lagna_rashi = ?")
+            params.append(rashi_number(lagna))
+        for body, sign in (signs or {}).items():
+            if body not in SIGN_BODIES:
+                raise ValueError(f"Unknown body '{body}'")
+            where.append(f"c.{sign_column(body)} = ?")
+            params.append(rashi_number(sign))
+        sql = "SELECT c.user_id FROM charts c"
+        if mahadasha is not None:
+            when = utc_text(at or datetime.now(timezone.utc))
+            sql += " JOIN mahadashas m ON m.user_id = c.user_id AND m.lord = ? AND m.start_at <= ? AND m.end_at > ?"
+            params = [mahadasha.title(), when, when] + params
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY c.user_id"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [user_id for (user_id,) in self._connect().execute(sql, params)]
+
+    def entering_mahadasha(self, lord, start, end):
+        """(user_id, start) for mahadashas of lord beginning in [start, end)"""
+        return self._connect().execute(
+            "SELECT user_id, start_at FROM mahadashas WHERE lord = ? AND start_at >= ? AND start_at < ? ORDER BY start_at",
+            (lord.title(), utc_text(start), utc_text(end))
+        ).fetchall()
+
+    def moon_longitudes(self, user_ids=None):
+        """(user_ids, Moon longitudes) for the given users, or for every stored chart"""
+        moon = STORE_BODIES.index("Moon")
+        ids, moons = [], []
+        if user_ids is None:
+            for chunk_ids, lons in self.iter_longitudes():
+                ids.extend(chunk_ids)
+                moons.append(lons[:, moon])
+        else:
+            user_ids = [str(user_id) for user_id in user_ids]
+            conn = self._connect()
+            for i in range(0, len(user_ids), 500):
+                chunk = user_ids[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT user_id, longitudes FROM charts WHERE user_id IN ({', '.join('?' * len(chunk))})",
+                    chunk).fetchall()
+                ids.extend(user_id for user_id, _ in rows)
+                moons.append(np.array([np.frombuffer(blob, dtype=np.float32)[moon] for _, blob in rows]))
+        return ids, np.concatenate(moons).astype(np.float64) if moons else np.empty(0)
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM charts").fetchone()[0]
+
+    def iter_longitudes(self, batch_size=10000):
+        """(user_ids, (n, len(STORE_BODIES)) float array) chunks over every stored chart"""
+        cursor = self._connect().execute("SELECT user_id, longitudes FROM charts ORDER BY user_id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            ids = [user_id for user_id, _ in rows]
+            lons = np.frombuffer(b"".join(blob for _, blob in rows), dtype=np.float32)
+            yield ids, lons.reshape(len(rows), len(STORE_BODIES)).astype(np.float64)
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_chart_store():
+    """The process-wide store at CHART_STORE_DB, opened on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ChartStore()
+        return _store
@@ -0,0 +1,147 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+# Named pools for CPU-bound work (ephemeris, panchang, dasha), so the event
+# loop only awaits results. Each pool is configured from the environment:
+#
+#     COMPUTE_<NAME>_KIND     thread | process
+#     COMPUTE_<NAME>_WORKERS  worker count
+#     COMPUTE_<NAME>_QUEUE    tasks allowed to wait beyond the running ones
+#
+# A pool that already holds WORKERS + QUEUE tasks rejects new ones with
+# ComputeQueueFull instead of letting latency grow without bound.
+CPU_COUNT = os.cpu_count() or 1
+
+POOL_DEFAULTS = {
+    "chart": ("thread", CPU_COUNT),
+    "panchang": ("thread", CPU_COUNT),
+    "batch": ("process", CPU_COUNT)
+}
+QUEUE_PER_WORKER = 8
+
+class ComputeQueueFull(Exception):
+    """Raised when a pool is at capacity; endpoints turn it into a 503"""
+
+# -------------------------------------------------
+# EXECUTOR
+# -------------------------------------------------
+class ComputeExecutor:
+    """A thread or process pool with a bounded queue and utilisation counters"""
+
+    def __init__(self, name, kind="thread", max_workers=CPU_COUNT, max_queue=None):
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_workers * QUEUE_PER_WORKER if max_queue is None else max_queue
+        self.capacity = self.max_workers + self.max_queue
+        self._executor = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _pool(self):
+        if self._executor is None:
+            pool_class = ProcessPoolExecutor if self.kind == "process" else ThreadPoolExecutor
+            self._executor = pool_class(max_workers=self.max_workers)
+        return self._executor
+
+    def _done(self, future):
+        with self._lock:
+            self.in_flight -= 1
+            if future.exception() is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def try_submit(self, fn, *args):
+        """concurrent.futures.Future for fn(*args), or None when the pool is full"""
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                return None
+            self.in_flight += 1
+        try:
+            future = self._pool().submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self.in_flight -= 1
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def submit(self, fn, *args):
+        future = self.try_submit(fn, *args)
+        if future is None:
+            with self._lock:
+                self.rejected += 1
+            raise ComputeQueueFull(f"compute pool '{self.name}' is full ({self.capacity} tasks)")
+        return future
+
+    async def run(self, fn, *args):
+        """Await fn(*args) on the pool without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def run_sync(self, fn, *args):
+        """Run fn(*args) on the pool from synchronous code and wait for it"""
+        return self.submit(fn, *args).result()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self):
+        with self._lock:
+            in_flight = self.in_flight
+            running = min(in_flight, self.max_workers)
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": running,
+                "queued": in_flight - running,
+                "utilisation": round(running / self.max_workers, 3),
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected
+            }
+
+# -------------------------------------------------
+# REGISTRY
+# -------------------------------------------------
+_executors = {}
+_registry_lock = threading.Lock()
+
+def get_executor(name):
+    """The named pool, created from POOL_DEFAULTS and the environment on first use"""
+    with _registry_lock:
+        if name not in _executors:
+            kind, workers = POOL_DEFAULTS.get(name, ("thread", CPU_COUNT))
+            prefix = f"COMPUTE_{name.upper()}_"
+            kind = os.getenv(prefix + "KIND", kind)
+            workers = int(os.getenv(prefix + "WORKERS", workers))
+            queue = os.getenv(prefix + "QUEUE")
+            _executors[name] = ComputeExecutor(name, kind, workers, int(queue) if queue else None)
+        return _executors[name]
+
+async def run_compute(name, fn, *args):
+    return await get_executor(name).run(fn, *args)
+
+def run_compute_sync(name, fn, *args):
+    return get_executor(name).run_sync(fn, *args)
+
+def executor_stats():
+    with _registry_lock:
+        executors = list(_executors.values())
+    return {executor.name: executor.stats() for executor in executors}
+
+def shutdown_executors():
+    with _registry_lock:
+        for executor in _executors.values():
+            executor.shutdown()
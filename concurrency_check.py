@@ -0,0 +1,100 @@
+"""
+Concurrency self-check for the ephemeris context layer.
+
+Computes a mix of Krishnamurti charts (kundali_app) and Lahiri charts (app.py)
+one at a time, then again from many threads at once, and checks that every
+concurrent result is identical to its serial one. A thread picking up another
+thread's sidereal mode shows up as a mismatch.
+
+    python concurrency_check.py [charts] [threads]
+"""
+import io
+import sys
+import json
+import time
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+def _birth_records(count):
+    rng = np.random.default_rng(12)
+    records = []
+    for i in range(count):
+        year = int(rng.integers(1950, 2030))
+        month = int(rng.integers(1, 13))
+        day = int(rng.integers(1, 29))
+        hour = int(rng.integers(0, 24))
+        minute = int(rng.integers(0, 60))
+        records.append({
+            "date": f"{year:04d}-{month:02d}-{day:02d}",
+            "time": f"{hour:02d}:{minute:02d}",
+            "lat": round(float(rng.uniform(8, 35)), 4),
+            "lon": round(float(rng.uniform(68, 97)), 4)
+        })
+    return records
+
+def _krishnamurti_chart(record):
+    import kundali_app
+    request = kundali_app.KundliRequest(
+        date_of_birth=record["date"], time_of_birth=record["time"],
+        latitude=record["lat"], longitude=record["lon"])
+    return kundali_app.build_kundli(request, use_cache=False)
+
+_lahiri_client = None
+
+def _lahiri_chart(record):
+    global _lahiri_client
+    if _lahiri_client is None:
+        import app
+        _lahiri_client = app.app.test_client()
+    response = _lahiri_client.post("/kundali", json={
+        "dob": record["date"], "time": record["time"],
+        "lat": record["lat"], "lon": record["lon"], "tz": 5.5})
+    return response.get_json()
+
+def _context_positions(record):
+    from ephemeris import KRISHNAMURTI, LAHIRI
+    import swisseph as swe
+    jd = swe.julday(*map(int, record["date"].split("-")), 12.0)
+    bodies = ['Sun', 'Moon', 'Jupiter', 'Saturn', 'Rahu']
+    return {
+        "kp": KRISHNAMURTI.calc_batch([jd], bodies)[0].tolist(),
+        "lahiri": LAHIRI.calc_batch([jd], bodies)[0].tolist(),
+        "kp_ayanamsa": KRISHNAMURTI.get_ayanamsa(jd),
+        "lahiri_ayanamsa": LAHIRI.get_ayanamsa(jd)
+    }
+
+JOBS = [_krishnamurti_chart, _lahiri_chart, _context_positions]
+
+def run_check(charts=60, threads=16):
+    """Returns the number of mismatching jobs (0 means the check passed)"""
+    records = _birth_records(charts)
+    jobs = [(JOBS[i % len(JOBS)], record) for i, record in enumerate(records)]
+
+    # the chart code prints progress; silence it once for every thread
+    with contextlib.redirect_stdout(io.StringIO()):
+        # warm imports and lazily loaded tables before timing anything
+        for job in JOBS:
+            job(records[0])
+
+        started = time.perf_counter()
+        serial = [json.dumps(job(record), sort_keys=True) for job, record in jobs]
+        serial_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            futures = [pool.submit(job, record) for job, record in jobs]
+            concurrent = [json.dumps(f.result(), sort_keys=True) for f in futures]
+        concurrent_time = time.perf_counter() - started
+
+    mismatches = [i for i, (a, b) in enumerate(zip(serial, concurrent)) if a != b]
+    print(f"{len(jobs)} jobs: serial {serial_time:.2f}s, {threads} threads {concurrent_time:.2f}s")
+    for i in mismatches:
+        job, record = jobs[i]
+        print(f"  MISMATCH {job.__name__} {record}")
+    print("OK" if not mismatches else f"FAILED: {len(mismatches)} mismatches")
+    return len(mismatches)
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    sys.exit(1 if run_check(*args) else 0)
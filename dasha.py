@@ -0,0 +1,247 @@
+import bisect
+import math
+from datetime import timedelta
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+# Dasha years are converted to days with the Julian year, as elsewhere in
+# the codebase
+DASHA_YEAR_DAYS = 365.25
+NAKSHATRA_SPAN = 360.0 / 27
+
+DASHA_LEVELS = ["maha", "antar", "pratyantar", "sookshma", "prana"]
+
+# -------------------------------------------------
+# SYSTEMS
+# -------------------------------------------------
+class DashaSystem:
+    """
+    A nakshatra dasha: lords in order with their years, and the lord ruling
+    each of the 27 nakshatras. A lord may rule a run of consecutive
+    nakshatras (Ashtottari); the balance at birth is the unelapsed part of
+    the whole run.
+
+    Every level divides its parent the same way: sub-periods start from the
+    parent's lord, follow the system order and take years / total of it.
+    """
+
+    def __init__(self, name, lords, years, nakshatra_lords):
+        self.name = name
+        self.lords = list(lords)
+        self.years = list(years)
+        self.total_years = sum(self.years)
+        self.nakshatra_lords = [self.lords.index(lord) for lord in nakshatra_lords]
+
+        # cumulative start fractions of the sub-periods under each lord
+        self.sub_order = []
+        self.sub_starts = []
+        for first in range(len(self.lords)):
+            order = [(first + i) % len(self.lords) for i in range(len(self.lords))]
+            starts = [0.0]
+            for lord in order[:-1]:
+                starts.append(starts[-1] + self.years[lord] / self.total_years)
+            self.sub_order.append(order)
+            self.sub_starts.append(starts)
+
+    def birth_balance(self, moon_longitude):
+        """(ruling lord index, fraction of its mahadasha already elapsed) at birth"""
+        moon_longitude %= 360.0
+        nakshatra = min(int(moon_longitude / NAKSHATRA_SPAN), 26)
+        lord = self.nakshatra_lords[nakshatra]
+        # widen to the whole run of nakshatras under this lord (may wrap past Revati)
+        first = last = nakshatra
+        while first > nakshatra - 26 and self.nakshatra_lords[(first - 1) % 27] == lord:
+            first -= 1
+        while last < first + 26 and self.nakshatra_lords[(last + 1) % 27] == lord:
+            last += 1
+        run_start = first * NAKSHATRA_SPAN
+        run_length = (last - first + 1) * NAKSHATRA_SPAN
+        elapsed = ((moon_longitude - run_start) % 360.0) / run_length
+        return lord, min(max(elapsed, 0.0), 1.0)
+
+VIMSHOTTARI_LORDS = ["Ketu", "Venus", "Sun", "Moon", "Mars", "Rahu", "Jupiter", "Saturn", "Mercury"]
+
+VIMSHOTTARI = DashaSystem(
+    "vimshottari",
+    VIMSHOTTARI_LORDS,
+    [7, 20, 6, 10, 7, 18, 16, 19, 17],
+    [VIMSHOTTARI_LORDS[i % 9] for i in range(27)]
+)
+
+# Yogini: Ashwini starts Bhramari, then the eight yoginis repeat
+YOGINI_LORDS = ["Mangala", "Pingala", "Dhanya", "Bhramari", "Bhadrika", "Ulka", "Siddha", "Sankata"]
+
+YOGINI = DashaSystem(
+    "yogini",
+    YOGINI_LORDS,
+    [1, 2, 3, 4, 5, 6, 7, 8],
+    [YOGINI_LORDS[(i + 3) % 8] for i in range(27)]
+)
+
+# Ashtottari: runs of 4 and 3 nakshatras from Ardra. Abhijit is not one of
+# the 27 equal nakshatras used here, so Saturn's run is Purva Ashadha to
+# Shravana.
+ASHTOTTARI_RUNS = [("Sun", 4), ("Moon", 3), ("Mars", 4), ("Mercury", 3),
+                   ("Saturn", 3), ("Jupiter", 3), ("Rahu", 4), ("Venus", 3)]
+
+def _ashtottari_nakshatra_lords():
+    lords = [None] * 27
+    nakshatra = 5  # Ardra
+    for lord, count in ASHTOTTARI_RUNS:
+        for _ in range(count):
+            lords[nakshatra % 27] = lord
+            nakshatra += 1
+    return lords
+
+ASHTOTTARI = DashaSystem(
+    "ashtottari",
+    [lord for lord, _ in ASHTOTTARI_RUNS],
+    [6, 15, 8, 17, 10, 19, 12, 21],
+    _ashtottari_nakshatra_lords()
+)
+
+DASHA_SYSTEMS = {system.name: system for system in (VIMSHOTTARI, YOGINI, ASHTOTTARI)}
+
+# -------------------------------------------------
+# PERIOD TREE
+# -------------------------------------------------
+class DashaPeriod:
+    """
+    One node of the dasha tree. Sub-periods are generated on demand, so a
+    timeline never holds more than the nodes a caller actually visits.
+    """
+    __slots__ = ("system", "path", "start", "end")
+
+    def __init__(self, system, path, start, end):
+        self.system = system
+        self.path = path  # lord indices from mahadasha down; () for a full cycle
+        self.start = start
+        self.end = end
+
+    @property
+    def level(self):
+        return DASHA_LEVELS[len(self.path) - 1]
+
+    @property
+    def lord(self):
+        return self.system.lords[self.path[-1]]
+
+    @property
+    def lords(self):
+        return [self.system.lords[i] for i in self.path]
+
+    @property
+    def years(self):
+        return (self.end - self.start) / timedelta(days=DASHA_YEAR_DAYS)
+
+    def _first_lord(self):
+        return self.path[-1]
+
+    def _child(self, i, first):
+        length = self.end - self.start
+        starts = self.system.sub_starts[first]
+        start = self.start + length * starts[i]
+        end = self.start + length * starts[i + 1] if i + 1 < len(starts) else self.end
+        return DashaPeriod(self.system, self.path + (self.system.sub_order[first][i],), start, end)
+
+    def children(self):
+        """Sub-periods in order, or [] below prana level"""
+        if len(self.path) >= len(DASHA_LEVELS):
+            return []
+        first = self._first_lord()
+        return [self._child(i, first) for i in range(len(self.system.lords))]
+
+    def child_at(self, at):
+        """The sub-period containing at, by bisection over the start fractions"""
+        if len(self.path) >= len(DASHA_LEVELS) or not self.start <= at < self.end:
+            return None
+        first = self._first_lord()
+        fraction = (at - self.start) / (self.end - self.start)
+        i = bisect.bisect_right(self.system.sub_starts[first], fraction) - 1
+        return self._child(i, first)
+
+    def to_dict(self):
+        return {
+            "lord": self.lord,
+            "level": self.level,
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "years": round(self.years, 6)
+        }
+
+class _DashaCycle(DashaPeriod):
+    """One full round of mahadashas, starting from the lord ruling at birth"""
+    __slots__ = ("first",)
+
+    def __init__(self, system, first, start, end):
+        super().__init__(system, (), start, end)
+        self.first = first
+
+    def _first_lord(self):
+        return self.first
+
+# -------------------------------------------------
+# TIMELINE
+# -------------------------------------------------
+class DashaTimeline:
+    """
+    The dasha tree of one native. Mahadashas repeat in cycles of
+    total_years from the (pre-birth) start of the dasha running at birth;
+    nothing below them is built until asked for.
+    """
+
+    def __init__(self, birth_dt, moon_longitude, system="vimshottari"):
+        self.system = DASHA_SYSTEMS[system] if isinstance(system, str) else system
+        self.birth = birth_dt
+        self.first_lord, elapsed = self.system.birth_balance(moon_longitude)
+        self.balance_years = (1.0 - elapsed) * self.system.years[self.first_lord]
+        elapsed_days = elapsed * self.system.years[self.first_lord] * DASHA_YEAR_DAYS
+        self.origin = birth_dt - timedelta(days=elapsed_days)
+        self.cycle = timedelta(days=self.system.total_years * DASHA_YEAR_DAYS)
+
+    def _cycle(self, k):
+        start = self.origin + self.cycle * k
+        return _DashaCycle(self.system, self.first_lord, start, start + self.cycle)
+
+    def mahadashas(self, until=None):
+        """Mahadashas from the one running at birth onwards, up to the one containing until (or forever)"""
+        k = 0
+        while True:
+            for period in self._cycle(k).children():
+                yield period
+                if until is not None and period.end > until:
+                    return
+            k += 1
+
+    def active(self, at, depth=3):
+        """
+        Periods containing at, from mahadasha down to depth levels
+        (5 = prana); [] before birth. O(depth): each level is one bisection.
+        """
+        if at < self.birth:
+            return []
+        node = self._cycle(math.floor((at - self.origin) / self.cycle))
+        chain = []
+        for _ in range(min(depth, len(DASHA_LEVELS))):
+            node = node.child_at(at)
+            if node is None:
+                break
+            chain.append(node)
+        return chain
+
+    def period(self, lords):
+        """
+        The node reached by following lord names down from the first such
+        mahadasha after birth, e.g. ["Venus", "Sun"] for the Sun antardasha
+        of the Venus mahadasha; None if the path does not exist.
+        """
+        if not lords or len(lords) > len(DASHA_LEVELS):
+            return None
+        # every lord rules once in the first cycle, so an unknown one ends the search there
+        node = next((m for m in self._cycle(0).children() if m.lord == lords[0]), None)
+        for name in lords[1:]:
+            if node is None:
+                return None
+            node = next((c for c in node.children() if c.lord == name), None)
+        return node
@@ -0,0 +1,123 @@
+import os
+from datetime import timedelta
+import numpy as np
+from ttl_cache import TTLCache
+from sun_times import day_sun_times_range, tile
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+# Rahu Kalam, Yamaganda, Gulika, Choghadiya and Hora are all fixed fractions
+# of daytime (sunrise to sunset) and night (sunset to next sunrise), chosen
+# by weekday. A day's table is pure arithmetic on its sun-times triple, so a
+# range of days is one sun-times pass plus array operations, cached per
+# (local date, sun-times tile, tz).
+DAY_DIVISIONS_CACHE_SIZE = int(os.getenv("DAY_DIVISIONS_CACHE_SIZE", 50000))
+
+# Vedic weekdays run sunrise to sunrise, Sunday first
+WEEKDAYS = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+# Inauspicious eighths of daytime, 1-based, by weekday
+KAAL_OCTANTS = {
+    "rahu_kalam": [8, 2, 7, 5, 6, 4, 3],
+    "yamaganda": [5, 4, 3, 2, 1, 7, 6],
+    "gulika": [7, 6, 5, 4, 3, 2, 1]
+}
+KAALS = list(KAAL_OCTANTS)
+
+# Choghadiya: eight parts of the day and eight of the night. The day cycle
+# steps forward through CHOGHADIYA_NAMES from the weekday's first part; the
+# night cycle starts five places on and steps back by two.
+CHOGHADIYA_NAMES = ["Udveg", "Char", "Labh", "Amrit", "Kaal", "Shubh", "Rog"]
+CHOGHADIYA_QUALITY = {"Udveg": "bad", "Char": "neutral", "Labh": "good", "Amrit": "good",
+                      "Kaal": "bad", "Shubh": "good", "Rog": "bad"}
+CHOGHADIYA_DAY_START = [0, 3, 6, 2, 5, 1, 4]  # Sunday: Udveg, Monday: Amrit, ...
+
+# Hora: twelve parts of the day and twelve of the night, the first ruled by
+# the weekday lord and the rest in descending Chaldean order
+HORA_ORDER = ["Sun", "Venus", "Mercury", "Moon", "Saturn", "Jupiter", "Mars"]
+WEEKDAY_LORDS = ["Sun", "Moon", "Mars", "Mercury", "Jupiter", "Venus", "Saturn"]
+
+day_divisions_cache = TTLCache(DAY_DIVISIONS_CACHE_SIZE)
+
+# -------------------------------------------------
+# TABLES
+# -------------------------------------------------
+def _parts(start, end, count):
+    """(days, count + 1) boundaries splitting each [start, end) into equal parts"""
+    return start[:, None] + (end - start)[:, None] * np.arange(count + 1) / count
+
+def _tables(dates, records):
+    """Division tables for days whose sunrise, sunset and next sunrise all exist"""
+    sunrise = np.array([r["sunrise_jd"] for r in records])
+    sunset = np.array([r["sunset_jd"] for r in records])
+    next_sunrise = np.array([r["next_sunrise_jd"] for r in records])
+    weekday = np.array([(day.weekday() + 1) % 7 for day in dates])
+
+    octants = _parts(sunrise, sunset, 8)
+    chogh = np.concatenate((_parts(sunrise, sunset, 8)[:, :-1], _parts(sunset, next_sunrise, 8)), axis=1)
+    horas = np.concatenate((_parts(sunrise, sunset, 12)[:, :-1], _parts(sunset, next_sunrise, 12)), axis=1)
+
+    day_start = np.array(CHOGHADIYA_DAY_START)[weekday]
+    chogh_names = np.concatenate((
+        (day_start[:, None] + np.arange(8)) % 7,
+        (day_start[:, None] + 5 - 2 * np.arange(8)) % 7
+    ), axis=1)
+    first_hora = np.array([HORA_ORDER.index(lord) for lord in WEEKDAY_LORDS])[weekday]
+    hora_lords = (first_hora[:, None] + np.arange(24)) % 7
+
+    tables = []
+    for d, (day, record) in enumerate(zip(dates, records)):
+        table = {
+            "date": day.isoformat(),
+            "weekday": WEEKDAYS[weekday[d]],
+            "sunrise_jd": record["sunrise_jd"],
+            "sunset_jd": record["sunset_jd"],
+            "next_sunrise_jd": record["next_sunrise_jd"]
+        }
+        for kaal, by_weekday in KAAL_OCTANTS.items():
+            part = by_weekday[weekday[d]] - 1
+            table[kaal] = (float(octants[d, part]), float(octants[d, part + 1]))
+        table["choghadiya"] = [
+            {"name": CHOGHADIYA_NAMES[n], "quality": CHOGHADIYA_QUALITY[CHOGHADIYA_NAMES[n]],
+             "period": "day" if i < 8 else "night", "start": float(chogh[d, i]), "end": float(chogh[d, i + 1])}
+            for i, n in enumerate(chogh_names[d].tolist())
+        ]
+        table["hora"] = [
+            {"lord": HORA_ORDER[n], "period": "day" if i < 12 else "night",
+             "start": float(horas[d, i]), "end": float(horas[d, i + 1])}
+            for i, n in enumerate(hora_lords[d].tolist())
+        ]
+        tables.append(table)
+    return tables
+
+def day_division_tables(start_day, days, lat, lon, tz=5.5):
+    """
+    Division tables for `days` consecutive local dates, Julian days (UT)
+    throughout. Computed in one batch for the uncached days; a day is None
+    where the Sun does not rise or set.
+    """
+    lat, lon = tile(lat, lon)
+    dates = [start_day + timedelta(days=i) for i in range(days)]
+    keys = [(day.isoformat(), lat, lon, tz) for day in dates]
+    tables = [day_divisions_cache.get(key) for key in keys]
+    missing = [i for i, table in enumerate(tables) if table is None]
+    if not missing:
+        return tables
+
+    records = day_sun_times_range(dates[missing[0]], missing[-1] - missing[0] + 1, lat, lon, tz)
+    offset = missing[0]
+    usable = [i for i in missing
+              if None not in (records[i - offset]["sunrise_jd"], records[i - offset]["sunset_jd"],
+                              records[i - offset]["next_sunrise_jd"])]
+    computed = _tables([dates[i] for i in usable], [records[i - offset] for i in usable]) if usable else []
+    for i, table in zip(usable, computed):
+        tables[i] = table
+        day_divisions_cache.set(keys[i], table)
+    return tables
+
+def day_division_table(day, lat, lon, tz=5.5):
+    return day_division_tables(day, 1, lat, lon, tz)[0]
+
+def cache_stats():
+    return day_divisions_cache.stats()
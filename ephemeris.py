@@ -0,0 +1,308 @@
+import os
+import time
+import logging
+import threading
+import numpy as np
+import swisseph as swe
+
+logger = logging.getLogger("ephemeris")
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+# Which backend answers calc_batch: "swisseph" (default), "skyfield" or "table".
+# Nothing is loaded until the first ephemeris call.
+EPHEMERIS_BACKEND = os.getenv("EPHEMERIS_BACKEND", "swisseph")
+SKYFIELD_BSP = os.getenv("SKYFIELD_BSP", "de421.bsp")
+EPHE_PATH = os.getenv("SE_EPHE_PATH", r"D:\python\astro-py\ephe")
+
+# -------------------------------------------------
+# SWISS EPHEMERIS STATE
+# -------------------------------------------------
+# swisseph keeps the sidereal mode and the ephemeris path in global C state.
+# Depending on how the library was built that state is either per process or
+# per thread (TLS builds: a new thread starts with the default mode and path,
+# whatever the main thread set). Everything that depends on it is therefore
+# applied and called through an EphemerisContext or the helpers below, under
+# SWE_LOCK, with the applied settings remembered per thread. Do not call
+# swe.set_sid_mode or swe.set_ephe_path directly.
+SWE_LOCK = threading.RLock()
+_applied = threading.local()
+
+def apply_ephe_path(path):
+    """Point swisseph at path unless this thread already has; call with SWE_LOCK held"""
+    if path and getattr(_applied, "ephe_path", None) != path:
+        swe.set_ephe_path(path)
+        _applied.ephe_path = path
+
+def apply_sid_mode(sid_mode):
+    """Select a sidereal mode unless this thread already has; call with SWE_LOCK held"""
+    if sid_mode is not None and getattr(_applied, "sid_mode", None) != sid_mode:
+        swe.set_sid_mode(sid_mode)
+        _applied.sid_mode = sid_mode
+
+# -------------------------------------------------
+# BODIES
+# -------------------------------------------------
+BODIES = {
+    'Sun': swe.SUN,
+    'Moon': swe.MOON,
+    'Mars': swe.MARS,
+    'Mercury': swe.MERCURY,
+    'Venus': swe.VENUS,
+    'Jupiter': swe.JUPITER,
+    'Saturn': swe.SATURN,
+    'Uranus': swe.URANUS,
+    'Neptune': swe.NEPTUNE,
+    'Pluto': swe.PLUTO,
+    'Rahu': swe.MEAN_NODE
+}
+BODY_NAMES = {code: name for name, code in BODIES.items()}
+
+def body_code(body):
+    """Accept either a name from BODIES or a raw swisseph body number."""
+    return BODIES[body] if isinstance(body, str) else body
+
+def body_name(body):
+    return body if isinstance(body, str) else BODY_NAMES[body]
+
+# -------------------------------------------------
+# PROVIDERS
+# -------------------------------------------------
+class EphemerisProvider:
+    """
+    Backend interface: calc_batch(jds, bodies) -> (longitudes, speeds), both of
+    shape (len(jds), len(bodies)), tropical, speeds in degrees/day.
+    load() does any expensive setup and is called once, on first use.
+    """
+    name = "base"
+
+    def load(self):
+        pass
+
+    def calc_batch(self, jds, bodies):
+        raise NotImplementedError
+
+class SwissEphemerisProvider(EphemerisProvider):
+    name = "swisseph"
+
+    def __init__(self, ephe_path=EPHE_PATH, flags=swe.FLG_SWIEPH):
+        self.ephe_path = ephe_path
+        self.flags = flags
+
+    def calc_batch(self, jds, bodies):
+        with SWE_LOCK:
+            apply_ephe_path(self.ephe_path)
+            return swiss_calc_batch(jds, bodies, self.flags)
+
+class SkyfieldProvider(EphemerisProvider):
+    """JPL ephemeris through skyfield/jplephem. The mean node is computed analytically."""
+    name = "skyfield"
+
+    TARGETS = {
+        'Sun': 'sun', 'Moon': 'moon', 'Mercury': 'mercury', 'Venus': 'venus',
+        'Mars': 'mars barycenter', 'Jupiter': 'jupiter barycenter',
+        'Saturn': 'saturn barycenter', 'Uranus': 'uranus barycenter',
+        'Neptune': 'neptune barycenter', 'Pluto': 'pluto barycenter'
+    }
+    SPEED_STEP = 1.0 / 24  # days, for central-difference speeds
+
+    def __init__(self, bsp=SKYFIELD_BSP):
+        self.bsp = bsp
+        self._ts = None
+        self._eph = None
+
+    def load(self):
+        from skyfield.api import load
+        self._ts = load.timescale()
+        self._eph = load(self.bsp)
+
+    def _longitudes(self, jds, target):
+        from skyfield.framelib import ecliptic_frame
+        t = self._ts.ut1_jd(jds)
+        apparent = self._eph['earth'].at(t).observe(self._eph[target]).apparent()
+        _, lon, _ = apparent.frame_latlon(ecliptic_frame)
+        return lon.degrees
+
+    def calc_batch(self, jds, bodies):
+        jds = np.atleast_1d(np.asarray(jds, dtype=np.float64))
+        lons = np.empty((jds.size, len(bodies)))
+        speeds = np.empty_like(lons)
+        h = self.SPEED_STEP
+        for j, body in enumerate(bodies):
+            name = body_name(body)
+            if name == 'Rahu':
+                lons[:, j], speeds[:, j] = mean_node(jds)
+                continue
+            target = self.TARGETS[name]
+            lons[:, j] = self._longitudes(jds, target)
+            ahead = self._longitudes(jds + h, target)
+            behind = self._longitudes(jds - h, target)
+            speeds[:, j] = ((ahead - behind + 180) % 360 - 180) / (2 * h)
+        return lons, speeds
+
+class TableProvider(EphemerisProvider):
+    """Precomputed Chebyshev tables (see longitude_tables.py), Swiss Ephemeris outside them."""
+    name = "table"
+
+    def load(self):
+        from longitude_tables import load_table, TABLE_PATH
+        if load_table() is None:
+            logger.warning("Longitude table %s not built; falling back to Swiss Ephemeris", TABLE_PATH)
+
+    def calc_batch(self, jds, bodies):
+        from longitude_tables import table_lookup
+        result = table_lookup(jds, [body_name(b) for b in bodies])
+        if result is None:
+            return SwissEphemerisProvider().calc_batch(jds, bodies)
+        return result
+
+PROVIDERS = {
+    SwissEphemerisProvider.name: SwissEphemerisProvider,
+    SkyfieldProvider.name: SkyfieldProvider,
+    TableProvider.name: TableProvider
+}
+
+_provider = None
+
+def get_provider():
+    """The configured backend, created and loaded on first use"""
+    global _provider
+    if _provider is None:
+        set_provider(PROVIDERS[EPHEMERIS_BACKEND]())
+    return _provider
+
+def set_provider(provider):
+    """Install and load a backend explicitly (e.g. from tests or a startup hook)"""
+    global _provider
+    started = time.perf_counter()
+    provider.load()
+    logger.info("Ephemeris backend '%s' loaded in %.1f ms",
+                provider.name, (time.perf_counter() - started) * 1000)
+    _provider = provider
+    return provider
+
+# -------------------------------------------------
+# BATCH EPHEMERIS
+# -------------------------------------------------
+def swiss_calc_batch(jds, bodies, flags=swe.FLG_SWIEPH):
+    """Tropical longitudes and speeds straight from Swiss Ephemeris"""
+    jds = np.atleast_1d(np.asarray(jds, dtype=np.float64))
+    codes = [body_code(b) for b in bodies]
+    jd_list = jds.tolist()
+
+    lons = np.empty((len(jd_list), len(codes)))
+    speeds = np.empty_like(lons)
+
+    # pyswisseph has no vector entry point, so keep the inner loop as lean as
+    # possible: bound method, plain floats, no per-call tuple unpacking in callers.
+    calc = swe.calc_ut
+    flags = flags | swe.FLG_SPEED
+    for j, code in enumerate(codes):
+        col_lon = lons[:, j]
+        col_speed = speeds[:, j]
+        for i, jd in enumerate(jd_list):
+            xx = calc(jd, code, flags)[0]
+            col_lon[i] = xx[0]
+            col_speed[i] = xx[3]
+    return lons, speeds
+
+def calc_batch(jds, bodies, sid_mode=None):
+    """
+    Compute longitudes and speeds for many Julian days (UT) and bodies in one call.
+
+    Returns (longitudes, speeds) as float arrays of shape (len(jds), len(bodies)),
+    speeds in degrees/day. When sid_mode is given (e.g. swe.SIDM_KRISHNAMURTI)
+    the ayanamsa is subtracted, otherwise longitudes are tropical.
+    """
+    jds = np.atleast_1d(np.asarray(jds, dtype=np.float64))
+    lons, speeds = get_provider().calc_batch(jds, bodies)
+
+    if sid_mode is not None:
+        lons -= ayanamsa_batch(jds, sid_mode)[:, None]
+        np.mod(lons, 360.0, out=lons)
+
+    return lons, speeds
+
+def ayanamsa_batch(jds, sid_mode):
+    """Ayanamsa for every Julian day in jds under the given sidereal mode."""
+    jds = np.atleast_1d(np.asarray(jds, dtype=np.float64))
+    get_ayanamsa = swe.get_ayanamsa
+    with SWE_LOCK:
+        apply_sid_mode(sid_mode)
+        return np.fromiter((get_ayanamsa(jd) for jd in jds.tolist()), dtype=np.float64, count=jds.size)
+
+def calc_longitudes(jds, body, sid_mode=None):
+    """Longitudes of a single body over an array of Julian days."""
+    return calc_batch(jds, [body], sid_mode)[0][:, 0]
+
+def mean_node(jds):
+    """Mean lunar node (Meeus 47.7) and its speed, for backends without one"""
+    t = (np.asarray(jds, dtype=np.float64) - 2451545.0) / 36525.0
+    lon = 125.0445479 - 1934.1362891 * t + 0.0020754 * t**2 + t**3 / 467441 - t**4 / 60616000
+    speed = (-1934.1362891 + 2 * 0.0020754 * t + 3 * t**2 / 467441 - 4 * t**3 / 60616000) / 36525.0
+    return np.mod(lon, 360.0), speed
+
+# -------------------------------------------------
+# CONTEXT
+# -------------------------------------------------
+SID_MODE_NAMES = {
+    None: "Tropical",
+    swe.SIDM_KRISHNAMURTI: "Krishnamurti",
+    swe.SIDM_LAHIRI: "Lahiri"
+}
+
+class EphemerisContext:
+    """
+    Ayanamsa (sid_mode, None for tropical), ephemeris path and calc flags that
+    one computation carries explicitly instead of relying on global swe state.
+
+    Methods mirror the swisseph calls they wrap and apply this context's
+    settings under SWE_LOCK first, so contexts with different modes can be
+    used from many threads at once. Treat instances as immutable.
+    """
+
+    def __init__(self, sid_mode=None, ephe_path=EPHE_PATH, flags=swe.FLG_SWIEPH | swe.FLG_SPEED):
+        self.sid_mode = sid_mode
+        self.ephe_path = ephe_path
+        self.flags = flags
+
+    @property
+    def name(self):
+        return SID_MODE_NAMES.get(self.sid_mode, f"sidm-{self.sid_mode}")
+
+    def __repr__(self):
+        return f"EphemerisContext({self.name}, ephe_path={self.ephe_path!r}, flags={self.flags})"
+
+    def call(self, fn, *args):
+        """Run any swisseph function under this context's mode and path"""
+        with SWE_LOCK:
+            apply_ephe_path(self.ephe_path)
+            apply_sid_mode(self.sid_mode)
+            return fn(*args)
+
+    def calc_ut(self, jd, body, flags=None):
+        """swe.calc_ut with the context's flags; add swe.FLG_SIDEREAL for sidereal output"""
+        return self.call(swe.calc_ut, jd, body, self.flags if flags is None else flags)
+
+    def get_ayanamsa(self, jd):
+        return self.call(swe.get_ayanamsa, jd)
+
+    def houses(self, jd, lat, lon, hsys=b'P'):
+        return self.call(swe.houses, jd, lat, lon, hsys)
+
+    def houses_ex(self, jd, lat, lon, hsys=b'P', flags=0):
+        return self.call(swe.houses_ex, jd, lat, lon, hsys, flags)
+
+    def ayanamsa_batch(self, jds):
+        return ayanamsa_batch(jds, self.sid_mode)
+
+    def calc_batch(self, jds, bodies):
+        """ephemeris.calc_batch in this context's ayanamsa"""
+        with SWE_LOCK:
+            apply_ephe_path(self.ephe_path)
+            return calc_batch(jds, bodies, self.sid_mode)
+
+TROPICAL = EphemerisContext()
+KRISHNAMURTI = EphemerisContext(swe.SIDM_KRISHNAMURTI)
+LAHIRI = EphemerisContext(swe.SIDM_LAHIRI)
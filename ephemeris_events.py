@@ -0,0 +1,240 @@
+import os
+import sys
+import time
+import numpy as np
+import swisseph as swe
+from ephemeris import calc_batch, swiss_calc_batch, ayanamsa_batch, apply_ephe_path, SWE_LOCK
+from longitude_tables import EPHE_DIR, TABLE_START_JD, TABLE_END_JD
+from transitions import TIME_TOLERANCE
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+# Retrograde/direct stations and sidereal sign ingresses of every body over
+# 1900-2100, found once by root finding and shipped in a small compressed
+# file. Rebuild with:
+#
+#     python ephemeris_events.py build
+#
+# Lookups are a bisection over sorted event times, so "is Saturn retrograde"
+# or "which sign is Mars in" costs no ephemeris call inside the span.
+EVENTS_PATH = os.getenv("EPHEMERIS_EVENTS_PATH", os.path.join(EPHE_DIR, "events.npz"))
+
+EVENT_BODIES = ['Sun', 'Moon', 'Mars', 'Mercury', 'Venus', 'Jupiter',
+                'Saturn', 'Uranus', 'Neptune', 'Pluto', 'Rahu']
+# Sun and Moon never station. The nodes are the mean node (as in the
+# longitude tables), which is always retrograde; callers using the true node
+# must check its speed instead.
+STATION_BODIES = ['Mars', 'Mercury', 'Venus', 'Jupiter', 'Saturn', 'Uranus', 'Neptune', 'Pluto']
+ALWAYS_RETROGRADE = ('Rahu', 'Ketu')
+
+# Ingresses are tabulated per ayanamsa used by the apps
+EVENT_SID_MODES = {"lahiri": swe.SIDM_LAHIRI, "krishnamurti": swe.SIDM_KRISHNAMURTI}
+
+# Samples per day while bracketing; every body stays under 30 degrees a step
+# and no retrograde loop is shorter than a step
+SCAN_STEP_DAYS = 1.0
+
+# Event times are stored as whole-second gaps from the previous event (the
+# first from TABLE_START_JD) in uint32, which roughly halves the file; the
+# rounding matches the root-finding tolerance
+SECONDS_PER_DAY = 86400
+
+# Station directions: the motion after the station
+DIRECT = 1
+RETROGRADE = -1
+
+_events = None
+_events_checked = False
+
+# -------------------------------------------------
+# BUILD
+# -------------------------------------------------
+def _refine(fn, lo, hi, f_lo, with_slope):
+    """
+    Vectorised bracketed root finding: fn(jds) -> (value, slope). Newton steps
+    when the slope is meaningful, bisection whenever a step leaves its bracket.
+    """
+    x = (lo + hi) / 2
+    while True:
+        value, slope = fn(x)
+        same_side = np.sign(value) == np.sign(f_lo)
+        lo = np.where(same_side, x, lo)
+        hi = np.where(same_side, hi, x)
+        x_next = (lo + hi) / 2
+        if with_slope:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                newton = x - value / slope
+            x_next = np.where((newton > lo) & (newton < hi), newton, x_next)
+        done = np.all(np.abs(x_next - x) < TIME_TOLERANCE) or np.all(hi - lo < TIME_TOLERANCE)
+        x = x_next
+        if done:
+            return x
+
+def _find_stations(body, grid, speeds):
+    """(jds, directions) where the tropical speed changes sign"""
+    steps = np.nonzero(np.sign(speeds[:-1]) != np.sign(speeds[1:]))[0]
+    if steps.size == 0:
+        return np.empty(0), np.empty(0, dtype=np.int8)
+
+    def speed(jds):
+        return swiss_calc_batch(jds, [body])[1][:, 0], None
+
+    jds = _refine(speed, grid[steps], grid[steps + 1], speeds[steps], with_slope=False)
+    return jds, np.where(speeds[steps + 1] > 0, DIRECT, RETROGRADE).astype(np.int8)
+
+def _calc_sidereal(jds, body, sid_mode):
+    lons, speeds = swiss_calc_batch(jds, [body])
+    return (lons[:, 0] - ayanamsa_batch(jds, sid_mode)) % 360.0, speeds[:, 0]
+
+def _find_ingresses(body, grid, lons, sid_mode):
+    """(jds, signs entered) where the sidereal sign changes"""
+    signs = (lons // 30).astype(np.int64)
+    steps = np.nonzero(signs[:-1] != signs[1:])[0]
+    before, after = signs[steps], signs[steps + 1]
+    # forward motion crosses the start of the new sign, retrograde the start of the old one
+    boundary = np.where((after - before) % 12 == 1, after, before) * 30.0
+
+    def offset(jds):
+        lons, speeds = _calc_sidereal(jds, body, sid_mode)
+        return (lons - boundary + 180.0) % 360.0 - 180.0, speeds
+
+    f_lo = (lons[steps] - boundary + 180.0) % 360.0 - 180.0
+    jds = _refine(offset, grid[steps], grid[steps + 1], f_lo, with_slope=True)
+    return jds, after.astype(np.int8)
+
+def build_events(path=EVENTS_PATH):
+    """Root-find every station and ingress over the table span and write the file"""
+    with SWE_LOCK:
+        apply_ephe_path(EPHE_DIR)
+    started = time.time()
+    grid = np.arange(TABLE_START_JD, TABLE_END_JD + SCAN_STEP_DAYS, SCAN_STEP_DAYS)
+    ayanamsas = {name: ayanamsa_batch(grid, mode) for name, mode in EVENT_SID_MODES.items()}
+
+    arrays = {}
+    for body in EVENT_BODIES:
+        lons, speeds = swiss_calc_batch(grid, [body])
+        lons, speeds = lons[:, 0], speeds[:, 0]
+        if body in STATION_BODIES:
+            jds, directions = _find_stations(body, grid, speeds)
+            # leading sentinel row: the motion in force at the start of the span
+            arrays[f"stations/{body}"] = np.append(TABLE_START_JD, jds)
+            arrays[f"directions/{body}"] = np.append(np.int8(DIRECT if speeds[0] > 0 else RETROGRADE), directions)
+        for name, mode in EVENT_SID_MODES.items():
+            sidereal = (lons - ayanamsas[name]) % 360.0
+            jds, signs = _find_ingresses(body, grid, sidereal, mode)
+            arrays[f"ingresses/{name}/{body}"] = np.append(TABLE_START_JD, jds)
+            arrays[f"signs/{name}/{body}"] = np.append(np.int8(sidereal[0] // 30), signs)
+        print(f"  {body:<8} {arrays[f'ingresses/lahiri/{body}'].size - 1} ingresses"
+              + (f", {arrays[f'stations/{body}'].size - 1} stations" if body in STATION_BODIES else ""))
+
+    for name in arrays:
+        if name.startswith(("stations/", "ingresses/")):
+            seconds = np.rint((arrays[name] - TABLE_START_JD) * SECONDS_PER_DAY).astype(np.int64)
+            arrays[name] = np.diff(seconds, prepend=0).astype(np.uint32)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(path, **arrays)
+    print(f"Wrote {path} ({os.path.getsize(path) / 1e3:.0f} kB) in {time.time() - started:.1f}s")
+
+# -------------------------------------------------
+# LOOKUP
+# -------------------------------------------------
+def load_events(path=EVENTS_PATH):
+    """{name: array} of the event file, or None when it is missing"""
+    global _events, _events_checked
+    if not _events_checked:
+        _events_checked = True
+        try:
+            with np.load(path) as data:
+                _events = {name: _decode(name, data[name]) for name in data.files}
+        except (OSError, ValueError):
+            _events = None
+    return _events
+
+def _decode(name, array):
+    if name.startswith(("stations/", "ingresses/")):
+        return TABLE_START_JD + np.cumsum(array, dtype=np.int64) / SECONDS_PER_DAY
+    return array
+
+def _mode_name(sid_mode):
+    for name, mode in EVENT_SID_MODES.items():
+        if mode == sid_mode:
+            return name
+    raise ValueError(f"no ingress table for sid_mode {sid_mode}")
+
+def _covered(jd):
+    return TABLE_START_JD <= jd < TABLE_END_JD
+
+def is_retrograde(body, jd):
+    """Retrograde at jd: one bisection of the station table, ephemeris outside it"""
+    if body in ALWAYS_RETROGRADE:
+        return True
+    if body not in STATION_BODIES:
+        return False
+    events = load_events()
+    if events is None or not _covered(jd):
+        return bool(calc_batch([jd], [body])[1][0, 0] < 0)
+    i = np.searchsorted(events[f"stations/{body}"], jd, side="right") - 1
+    return bool(events[f"directions/{body}"][i] == RETROGRADE)
+
+def retrograde_batch(body, jds):
+    """Bool array for many instants (all inside 1900-2100)"""
+    jds = np.atleast_1d(np.asarray(jds, dtype=np.float64))
+    if body in ALWAYS_RETROGRADE:
+        return np.ones(jds.shape, dtype=bool)
+    if body not in STATION_BODIES:
+        return np.zeros(jds.shape, dtype=bool)
+    events = load_events()
+    if events is None or not all(_covered(jd) for jd in (jds.min(), jds.max())):
+        return calc_batch(jds, [body])[1][:, 0] < 0
+    i = np.searchsorted(events[f"stations/{body}"], jds, side="right") - 1
+    return events[f"directions/{body}"][i] == RETROGRADE
+
+def _ingress_arrays(body, sid_mode):
+    events = load_events()
+    if events is None:
+        raise FileNotFoundError(f"{EVENTS_PATH} missing; run 'python ephemeris_events.py build'")
+    name = _mode_name(sid_mode)
+    # Ketu changes sign with Rahu, six signs away
+    jds = events[f"ingresses/{name}/{'Rahu' if body == 'Ketu' else body}"]
+    signs = events[f"signs/{name}/{'Rahu' if body == 'Ketu' else body}"]
+    return jds, (signs + 6) % 12 if body == 'Ketu' else signs
+
+def sign_at(body, jd, sid_mode):
+    """0-based sidereal sign of body at jd"""
+    if not _covered(jd):
+        lon = calc_batch([jd], ['Rahu' if body == 'Ketu' else body], sid_mode)[0][0, 0]
+        return (int(lon // 30) + (6 if body == 'Ketu' else 0)) % 12
+    jds, signs = _ingress_arrays(body, sid_mode)
+    return int(signs[np.searchsorted(jds, jd, side="right") - 1])
+
+def ingresses(body, jd_start, jd_end, sid_mode):
+    """[(jd, 0-based sign entered)] in [jd_start, jd_end)"""
+    jds, signs = _ingress_arrays(body, sid_mode)
+    lo, hi = np.searchsorted(jds[1:], [jd_start, jd_end]) + 1
+    return list(zip(jds[lo:hi].tolist(), signs[lo:hi].tolist()))
+
+def next_ingress(body, jd, sid_mode):
+    """(jd, sign entered) of the first ingress after jd, or None past the table"""
+    jds, signs = _ingress_arrays(body, sid_mode)
+    i = np.searchsorted(jds, jd, side="right")
+    return (float(jds[i]), int(signs[i])) if i < jds.size else None
+
+def stations(body, jd_start, jd_end):
+    """[(jd, 'retrograde' | 'direct')] in [jd_start, jd_end), the motion after each station"""
+    if body not in STATION_BODIES:
+        return []
+    events = load_events()
+    if events is None:
+        raise FileNotFoundError(f"{EVENTS_PATH} missing; run 'python ephemeris_events.py build'")
+    jds, directions = events[f"stations/{body}"], events[f"directions/{body}"]
+    lo, hi = np.searchsorted(jds[1:], [jd_start, jd_end]) + 1
+    return [(jd, "direct" if d == DIRECT else "retrograde")
+            for jd, d in zip(jds[lo:hi].tolist(), directions[lo:hi].tolist())]
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["build"]:
+        build_events()
+    else:
+        print("usage: python ephemeris_events.py build")
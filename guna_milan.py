@@ -0,0 +1,185 @@
+import numpy as np
+
+# -------------------------------------------------
+# ATTRIBUTES
+# -------------------------------------------------
+# Ashtakoota (36-guna) matching. Every koota depends only on the Moon's
+# nakshatra and rashi, and a nakshatra pada (3°20') fixes both, so all
+# 108 x 108 groom/bride pada pairs are scored once into tables and a match
+# is a lookup. Varna, yoni, gan and nadi follow the values
+# calculate_avakhada_details reports; vashya uses the standard koota groups,
+# so Mithuna and Kanya score as Manav where the avakhada shows Dwi-swabhav.
+PADA_SPAN = 360.0 / 108
+PADAS = 108
+
+RASHIS = ['Mesha', 'Vrishabha', 'Mithuna', 'Karka', 'Simha', 'Kanya',
+          'Tula', 'Vrishchika', 'Dhanu', 'Makara', 'Kumbha', 'Meena']
+NAKSHATRAS = [
+    'Ashwini', 'Bharani', 'Krittika', 'Rohini', 'Mrigashira', 'Ardra',
+    'Punarvasu', 'Pushya', 'Ashlesha', 'Magha', 'Purva Phalguni', 'Uttara Phalguni',
+    'Hasta', 'Chitra', 'Swati', 'Vishakha', 'Anuradha', 'Jyeshtha',
+    'Mula', 'Purva Ashadha', 'Uttara Ashadha', 'Shravana', 'Dhanishta',
+    'Shatabhisha', 'Purva Bhadrapada', 'Uttara Bhadrapada', 'Revati'
+]
+
+VARNA_RANK = {'Brahmin': 4, 'Kshatriya': 3, 'Vaishya': 2, 'Shudra': 1}
+RASHI_VARNA = ['Kshatriya', 'Vaishya', 'Shudra', 'Brahmin', 'Kshatriya', 'Vaishya',
+               'Shudra', 'Brahmin', 'Kshatriya', 'Vaishya', 'Shudra', 'Brahmin']
+
+VASHYA_GROUPS = ['Chatushpad', 'Manav', 'Jalchar', 'Vanachari', 'Keet']
+RASHI_VASHYA = ['Chatushpad', 'Chatushpad', 'Manav', 'Jalchar', 'Vanachari', 'Manav',  # avakhada: Dwi-swabhav
+                'Manav', 'Keet', 'Manav', 'Jalchar', 'Manav', 'Jalchar']
+VASHYA_POINTS = [  # groom group (row) x bride group (column)
+    [2, 1, 1, 0.5, 1],
+    [1, 2, 0.5, 0, 1],
+    [1, 0.5, 2, 1, 1],
+    [0.5, 0, 1, 2, 0],
+    [1, 1, 1, 0, 2]
+]
+
+YONIS = ['Horse', 'Elephant', 'Goat', 'Serpent', 'Dog', 'Cat', 'Rat',
+         'Cow', 'Buffalo', 'Tiger', 'Deer', 'Monkey', 'Mongoose', 'Lion']
+NAKSHATRA_YONI = ['Horse', 'Elephant', 'Goat', 'Serpent', 'Serpent', 'Dog',
+                  'Cat', 'Goat', 'Cat', 'Rat', 'Rat', 'Cow',
+                  'Buffalo', 'Tiger', 'Buffalo', 'Tiger', 'Deer', 'Deer',  # Jyeshtha's "Hare" is the deer yoni
+                  'Dog', 'Monkey', 'Mongoose', 'Monkey', 'Lion',
+                  'Horse', 'Lion', 'Cow', 'Elephant']
+YONI_POINTS = [
+    [4, 2, 2, 3, 2, 2, 2, 1, 0, 1, 3, 3, 2, 1],
+    [2, 4, 3, 3, 2, 2, 2, 2, 3, 1, 2, 3, 2, 0],
+    [2, 3, 4, 2, 1, 2, 1, 3, 3, 1, 2, 0, 3, 1],
+    [3, 3, 2, 4, 2, 1, 1, 1, 1, 2, 2, 2, 0, 2],
+    [2, 2, 1, 2, 4, 2, 1, 2, 2, 1, 0, 2, 1, 1],
+    [2, 2, 2, 1, 2, 4, 0, 2, 2, 1, 3, 3, 2, 1],
+    [2, 2, 1, 1, 1, 0, 4, 2, 2, 2, 2, 2, 1, 2],
+    [1, 2, 3, 1, 2, 2, 2, 4, 3, 0, 3, 2, 2, 1],
+    [0, 3, 3, 1, 2, 2, 2, 3, 4, 1, 2, 2, 2, 1],
+    [1, 1, 1, 2, 1, 1, 2, 0, 1, 4, 1, 1, 2, 1],
+    [3, 2, 2, 2, 0, 3, 2, 3, 2, 1, 4, 2, 2, 1],
+    [3, 3, 0, 2, 2, 3, 2, 2, 2, 1, 2, 4, 3, 2],
+    [2, 2, 3, 0, 1, 2, 1, 2, 2, 2, 2, 3, 4, 2],
+    [1, 0, 1, 2, 1, 1, 2, 1, 1, 1, 1, 2, 2, 4]
+]
+
+RASHI_LORD = ['Mars', 'Venus', 'Mercury', 'Moon', 'Sun', 'Mercury',
+              'Venus', 'Mars', 'Jupiter', 'Saturn', 'Saturn', 'Jupiter']
+FRIENDS = {
+    'Sun': ({'Moon', 'Mars', 'Jupiter'}, {'Venus', 'Saturn'}),
+    'Moon': ({'Sun', 'Mercury'}, set()),
+    'Mars': ({'Sun', 'Moon', 'Jupiter'}, {'Mercury'}),
+    'Mercury': ({'Sun', 'Venus'}, {'Moon'}),
+    'Jupiter': ({'Sun', 'Moon', 'Mars'}, {'Mercury', 'Venus'}),
+    'Venus': ({'Mercury', 'Saturn'}, {'Sun', 'Moon'}),
+    'Saturn': ({'Mercury', 'Venus'}, {'Sun', 'Moon', 'Mars'})
+}
+# (relation of groom's lord to bride's, and back) -> points; 2 friend, 1 neutral, 0 enemy
+MAITRI_POINTS = {(2, 2): 5, (2, 1): 4, (1, 2): 4, (1, 1): 3, (2, 0): 1, (0, 2): 1,
+                 (1, 0): 0.5, (0, 1): 0.5, (0, 0): 0}
+
+GANAS = ['Deva', 'Manushya', 'Rakshasa']
+NAKSHATRA_GAN = ['Deva', 'Manushya', 'Rakshasa', 'Manushya', 'Deva', 'Manushya',
+                 'Deva', 'Deva', 'Rakshasa', 'Rakshasa', 'Manushya', 'Manushya',
+                 'Deva', 'Rakshasa', 'Deva', 'Rakshasa', 'Deva', 'Rakshasa',
+                 'Rakshasa', 'Manushya', 'Manushya', 'Deva', 'Rakshasa',
+                 'Rakshasa', 'Manushya', 'Manushya', 'Deva']
+GAN_POINTS = [  # groom gana (row) x bride gana (column)
+    [6, 6, 1],
+    [5, 6, 0],
+    [1, 0, 6]
+]
+
+NAKSHATRA_NADI = ['Adi', 'Madhya', 'Antya', 'Antya', 'Madhya', 'Adi',
+                  'Adi', 'Madhya', 'Antya', 'Antya', 'Madhya', 'Adi',
+                  'Adi', 'Madhya', 'Antya', 'Antya', 'Madhya', 'Adi',
+                  'Adi', 'Madhya', 'Antya', 'Antya', 'Madhya', 'Adi',
+                  'Adi', 'Madhya', 'Antya']
+
+# Taras 3, 5 and 7 (Vipat, Pratyari, Vadha) counted from the other's nakshatra are inauspicious
+BAD_TARAS = (3, 5, 7)
+# Moon signs 2/12, 5/9 and 6/8 from each other lose Bhakoot
+BAD_BHAKOOT = (2, 12, 5, 9, 6, 8)
+
+KOOTAS = ['varna', 'vashya', 'tara', 'yoni', 'graha_maitri', 'gan', 'bhakoot', 'nadi']
+KOOTA_MAX = {'varna': 1, 'vashya': 2, 'tara': 3, 'yoni': 4, 'graha_maitri': 5, 'gan': 6, 'bhakoot': 7, 'nadi': 8}
+
+# -------------------------------------------------
+# TABLES
+# -------------------------------------------------
+def _relation(lord, other):
+    friends, enemies = FRIENDS[lord]
+    return 2 if other in friends else 0 if other in enemies else 1
+
+def _koota_points(groom_nak, groom_rashi, bride_nak, bride_rashi):
+    """Points per koota for one groom/bride Moon nakshatra and rashi (0-based)"""
+    varna = 1 if VARNA_RANK[RASHI_VARNA[groom_rashi]] >= VARNA_RANK[RASHI_VARNA[bride_rashi]] else 0
+    vashya = VASHYA_POINTS[VASHYA_GROUPS.index(RASHI_VASHYA[groom_rashi])][VASHYA_GROUPS.index(RASHI_VASHYA[bride_rashi])]
+
+    tara = 0
+    for start, end in ((bride_nak, groom_nak), (groom_nak, bride_nak)):
+        if ((end - start) % 27 + 1) % 9 not in BAD_TARAS:
+            tara += 1.5
+
+    yoni = YONI_POINTS[YONIS.index(NAKSHATRA_YONI[groom_nak])][YONIS.index(NAKSHATRA_YONI[bride_nak])]
+
+    groom_lord, bride_lord = RASHI_LORD[groom_rashi], RASHI_LORD[bride_rashi]
+    if groom_lord == bride_lord:
+        maitri = 5
+    else:
+        maitri = MAITRI_POINTS[(_relation(groom_lord, bride_lord), _relation(bride_lord, groom_lord))]
+
+    gan = GAN_POINTS[GANAS.index(NAKSHATRA_GAN[groom_nak])][GANAS.index(NAKSHATRA_GAN[bride_nak])]
+    bhakoot = 0 if (groom_rashi - bride_rashi) % 12 + 1 in BAD_BHAKOOT else 7
+    nadi = 0 if NAKSHATRA_NADI[groom_nak] == NAKSHATRA_NADI[bride_nak] else 8
+    return [varna, vashya, tara, yoni, maitri, gan, bhakoot, nadi]
+
+def _build_tables():
+    padas = np.arange(PADAS)
+    naks = padas // 4
+    rashis = padas * 4 // 36  # nine padas per rashi
+    kootas = np.empty((len(KOOTAS), PADAS, PADAS), dtype=np.float32)
+    for g in padas:
+        for b in padas:
+            kootas[:, g, b] = _koota_points(naks[g], rashis[g], naks[b], rashis[b])
+    return kootas, kootas.sum(axis=0)
+
+# KOOTA_TABLE[koota, groom pada, bride pada] and TOTAL_TABLE[groom pada, bride pada]
+KOOTA_TABLE, TOTAL_TABLE = _build_tables()
+
+def moon_pada(moon_longitude):
+    """0-107 pada index (array or scalar) from sidereal Moon longitude"""
+    return (np.asarray(moon_longitude, dtype=np.float64) % 360.0 // PADA_SPAN).astype(np.intp)
+
+# -------------------------------------------------
+# QUERIES
+# -------------------------------------------------
+def guna_milan(groom_moon, bride_moon):
+    """Ashtakoota breakdown and total for one couple from their sidereal Moon longitudes"""
+    g, b = int(moon_pada(groom_moon)), int(moon_pada(bride_moon))
+    kootas = {
+        koota: {"points": float(KOOTA_TABLE[i, g, b]), "max": KOOTA_MAX[koota]}
+        for i, koota in enumerate(KOOTAS)
+    }
+    return {
+        "groom": {"nakshatra": NAKSHATRAS[g // 4], "pada": g % 4 + 1, "rashi": RASHIS[g // 9]},
+        "bride": {"nakshatra": NAKSHATRAS[b // 4], "pada": b % 4 + 1, "rashi": RASHIS[b // 9]},
+        "kootas": kootas,
+        "total": float(TOTAL_TABLE[g, b]),
+        "max": 36
+    }
+
+def match_scores(moon, candidate_moons, as_groom=True):
+    """Total guna for one profile against many candidates, one row gather"""
+    pada = int(moon_pada(moon))
+    row = TOTAL_TABLE[pada] if as_groom else TOTAL_TABLE[:, pada]
+    return row[moon_pada(candidate_moons)]
+
+def top_matches(moon, candidate_moons, k=10, as_groom=True, min_score=0.0):
+    """(candidate indices, scores) of the k best candidates, best first"""
+    if k < 1:
+        raise ValueError("k must be at least 1")
+    scores = match_scores(moon, candidate_moons, as_groom)
+    eligible = np.flatnonzero(scores >= min_score)
+    if eligible.size > k:
+        eligible = eligible[np.argpartition(-scores[eligible], k - 1)[:k]]
+    order = eligible[np.argsort(-scores[eligible], kind="stable")]
+    return order, scores[order]
@@ -0,0 +1,71 @@
+import numpy as np
+from ephemeris import KRISHNAMURTI
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+# House system name -> (Swiss Ephemeris hsys code, forced context). KP uses
+# Placidus cusps in the Krishnamurti ayanamsa whatever the caller's context;
+# the others follow the context passed in. Whole Sign and Equal are derived
+# from the sidereal ascendant so Whole Sign cusps fall on sidereal sign starts.
+HOUSE_SYSTEMS = {
+    "whole_sign": (b'W', None),
+    "equal": (b'E', None),
+    "placidus": (b'P', None),
+    "kp": (b'P', KRISHNAMURTI),
+    "sripati": (b'S', None)
+}
+DEFAULT_HOUSE_SYSTEM = "whole_sign"
+
+# -------------------------------------------------
+# CUSPS
+# -------------------------------------------------
+def _house_system(system):
+    try:
+        return HOUSE_SYSTEMS[system]
+    except KeyError:
+        raise ValueError(f"house_system must be one of {list(HOUSE_SYSTEMS)}") from None
+
+def house_cusps(jd, lat, lon, system=DEFAULT_HOUSE_SYSTEM, context=KRISHNAMURTI):
+    """(12 cusps, ascendant, MC), sidereal in the context's ayanamsa (tropical without one)"""
+    hsys, forced = _house_system(system)
+    context = forced or context
+    cusps, ascmc = context.houses_ex(jd, lat, lon, b'P' if hsys in (b'W', b'E') else hsys)
+    ayanamsa = context.get_ayanamsa(jd) if context.sid_mode is not None else 0.0
+    ascendant = (ascmc[0] - ayanamsa) % 360.0
+    mc = (ascmc[1] - ayanamsa) % 360.0
+    if hsys == b'W':
+        cusps = (ascendant // 30) * 30.0 + 30.0 * np.arange(12)
+    elif hsys == b'E':
+        cusps = ascendant + 30.0 * np.arange(12)
+    else:
+        cusps = np.asarray(cusps[:12]) - ayanamsa
+    return np.mod(cusps, 360.0), ascendant, mc
+
+def house_cusps_batch(jds, lats, lons, system=DEFAULT_HOUSE_SYSTEM, context=KRISHNAMURTI):
+    """(n, 12) cusps and (n,) ascendants for many charts"""
+    rows = [house_cusps(jd, lat, lon, system, context) for jd, lat, lon in zip(jds, lats, lons)]
+    return np.array([row[0] for row in rows]).reshape(-1, 12), np.array([row[1] for row in rows])
+
+# -------------------------------------------------
+# ASSIGNMENT
+# -------------------------------------------------
+def assign_houses(longitudes, cusps):
+    """
+    Houses 1-12 of bodies (n, bodies) against cusps (n, 12) in one searchsorted.
+
+    Cusps are unwrapped to offsets from the first cusp (0 to 360), and each
+    chart is shifted by 360 * its row so all rows form one sorted array.
+    """
+    lons = np.atleast_2d(np.asarray(longitudes, dtype=np.float64))
+    cusps = np.atleast_2d(np.asarray(cusps, dtype=np.float64))
+    rows = np.arange(cusps.shape[0])[:, None] * 360.0
+    unwrapped = (cusps - cusps[:, :1]) % 360.0 + rows
+    offsets = (lons - cusps[:, :1]) % 360.0 + rows
+    index = np.searchsorted(unwrapped.ravel(), offsets.ravel(), side="right").reshape(lons.shape)
+    return index - np.arange(cusps.shape[0])[:, None] * 12
+
+def house_positions(positions, cusps):
+    """{body: house} for one chart, positions {body: longitude}"""
+    houses = assign_houses([list(positions.values())], [cusps])[0]
+    return dict(zip(positions, houses.tolist()))
@@ -1,13 +1,39 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Dict, Any
-from skyfield.api import load, Topos
-from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+import asyncio
+import csv
+import io
+import json
+import logging
+from datetime import datetime, timedelta, timezone
 from dateutil.relativedelta import relativedelta
 import pytz
-from math import degrees
+from math import degrees, floor
 import swisseph as swe
+from ephemeris import calc_batch, KRISHNAMURTI
+from longitude_tables import table_longitude
+from vargas import varga_charts
+from ashtakavarga import ashtakavarga, CONTRIBUTORS as ASHTAKAVARGA_BODIES
+from dasha import DashaTimeline, DASHA_SYSTEMS
+from guna_milan import guna_milan, top_matches
+from panchang_cache import cached_panchang_transitions, jd_to_local_date
+from panchang_cache import cache_stats as panchang_cache_stats
+from sun_times import day_sun_times, local_hours
+from sun_times import cache_stats as sun_times_cache_stats
+from day_divisions import day_division_tables, KAALS
+from day_divisions import cache_stats as day_divisions_cache_stats
+from lagna import lagna_runs, RASHI_NAMES as LAGNA_SIGNS
+from lagna import cache_stats as lagna_cache_stats
+from kundli_cache import kundli_cache, kundli_cache_key
+from compute_executor import get_executor, run_compute, ComputeQueueFull
+from chart_store import get_chart_store, compute_longitudes, STORE_BODIES
+from aspects import western_aspects, graha_drishti, exact_aspect_times
+from houses import house_cusps, house_positions, DEFAULT_HOUSE_SYSTEM
+
+logger = logging.getLogger("kundali_app")
 
 app = FastAPI()
 
@@ -50,18 +76,6 @@ DASHA_YEARS = {
     'Mercury': 17
 }
 
-# Load planetary data
-eph = load('de421.bsp')
-planets = {
-    'Sun': eph['sun'],
-    'Moon': eph['moon'],
-    'Mercury': eph['mercury'],
-    'Venus': eph['venus'],
-    'Mars': eph['mars'],
-    'Jupiter': eph['jupiter barycenter'],
-    'Saturn': eph['saturn barycenter']
-}
-
 # Mapping of Sanskrit Rashis to English names
 RASHI_TRANSLATION = {
     'Mesha': 'Aries',
@@ -78,21 +92,10 @@ RASHI_TRANSLATION = {
     'Meena': 'Pisces'
 }
 
-# Mapping of Rashis to their numbers
-ZODIAC_TO_NUMBER = {
-    'Aries': 1,
-    'Taurus': 2,
-    'Gemini': 3,
-    'Cancer': 4,
-    'Leo': 5,
-    'Virgo': 6,
-    'Libra': 7,
-    'Scorpio': 8,
-    'Sagittarius': 9,
-    'Capricorn': 10,
-    'Aquarius': 11,
-    'Pisces': 12
-}
+# Divisional charts returned per body (signs numbered Aries=1 .. Pisces=12).
+# All sixteen in vargas.VARGAS come out of the same lookup, so adding one here
+# costs nothing extra per request.
+KUNDLI_VARGAS = ['D2', 'D4', 'D9', 'D10', 'D60']
 
 # Mapping of Rashis and their lords (using English names)
 rashis = {
@@ -123,15 +126,6 @@ nakshatras = [
     ('Purva Bhadrapada', 'Jupiter', 320), ('Uttara Bhadrapada', 'Saturn', 333.20), ('Revati', 'Mercury', 346.40)
 ]
 
-def convert_divisional_charts_to_numbers(charts):
-    """
-    Convert zodiac signs in divisional charts to their corresponding numbers
-    """
-    return {
-        chart_type: ZODIAC_TO_NUMBER[sign]
-        for chart_type, sign in charts.items()
-    }
-
 def get_nakshatra(longitude):
     nak_span = 13.333333333333334  # 360/27
     nakshatra_index = int(longitude / nak_span)
@@ -181,143 +175,21 @@ def calculate_planetary_states(planet, rashi, degrees_in_rashi, speed, sun_posit
 
     return {'retro': retro, 'combust': combust, 'status': status}
 
-def calculate_house_positions(jd, lat, lon):
+def calculate_house_positions(jd, lat, lon, context=KRISHNAMURTI):
     flags = swe.FLG_SWIEPH
     hsys = b'W'  # Whole Sign system
-    cusps, asc_mc = swe.houses_ex(jd, lat, lon, hsys, flags)
+    cusps, asc_mc = context.houses_ex(jd, lat, lon, hsys, flags)
     return list(cusps), asc_mc[0]
 
-def calculate_d2(total_degrees, planet=None):
-    """
-    Classical Parashara D2 (Hora) chart:
-    - Odd Rashis: 0-15° = Leo, 15-30° = Cancer
-    - Even Rashis: 0-15° = Cancer, 15-30° = Leo
-    """
-    base_rashi = int(total_degrees / 30)  # 0-based index
-    degree_in_rashi = total_degrees % 30
-    is_odd_rashi = (base_rashi % 2 == 0)  # 0-based index, so even index means odd rashi
-
-    # Leo = 4, Cancer = 3 (0-based: Aries=0, Taurus=1, Gemini=2, Cancer=3, Leo=4, ...)
-    if is_odd_rashi:
-        # Odd: 0-15° Leo, 15-30° Cancer
-        final_rashi = 4 if degree_in_rashi < 15 else 3
-    else:
-        # Even: 0-15° Cancer, 15-30° Leo
-        final_rashi = 3 if degree_in_rashi < 15 else 4
-
-    fixed_rashi_order = [
-        'Aries', 'Taurus', 'Gemini', 'Cancer', 'Leo', 'Virgo',
-        'Libra', 'Scorpio', 'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces'
-    ]
-    return fixed_rashi_order[final_rashi]
-
-def calculate_d4(total_degrees):
-    base_rashi = int(total_degrees / 30)
-    degree_in_rashi = total_degrees % 30
-    quarter = int(degree_in_rashi / 7.5)
-
-    final_rashi_num = (base_rashi + (quarter * 3)) % 12
-
-    fixed_rashi_order = [
-        'Aries', 'Taurus', 'Gemini', 'Cancer', 'Leo', 'Virgo',
-        'Libra', 'Scorpio', 'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces'
-    ]
-
-    return fixed_rashi_order[final_rashi_num]
-
-def calculate_d9(total_degrees, is_ascendant=False):
-    """
-    Calculate D9 (Navamsa) chart position
-    For odd signs: Start from same sign
-    For even signs: Start from 9th sign
-    Then count forward by navamsa number
-    """
-    base_rashi = int(total_degrees / 30)
-    degree_in_rashi = total_degrees % 30
-    navamsa = int(degree_in_rashi / 3.333333)  # 30/9 = 3.333333
-
-    is_odd_sign = (base_rashi % 2 == 0)  # 0-based index, so even index means odd sign
-
-    if is_odd_sign:
-        start_rashi = base_rashi
-    else:
-        start_rashi = (base_rashi + 8) % 12  # 9th sign (8 in 0-based index)
-
-    final_rashi = (start_rashi + navamsa) % 12
-
-    fixed_rashi_order = [
-        'Aries', 'Taurus', 'Gemini', 'Cancer', 'Leo', 'Virgo',
-        'Libra', 'Scorpio', 'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces'
-    ]
-
-    return fixed_rashi_order[final_rashi]
-
-def calculate_d10(total_degrees):
-    base_rashi = int(total_degrees / 30)
-    degree_in_rashi = total_degrees % 30
-    division = int(degree_in_rashi / 3)
-
-    is_odd_sign = (base_rashi % 2 == 0)
-
-    if is_odd_sign:
-        start_rashi = base_rashi
-    else:
-        start_rashi = (base_rashi + 8) % 12
-
-    final_rashi_num = (start_rashi + division) % 12
-
-    fixed_rashi_order = [
-        'Aries', 'Taurus', 'Gemini', 'Cancer', 'Leo', 'Virgo',
-        'Libra', 'Scorpio', 'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces'
-    ]
-
-    return fixed_rashi_order[final_rashi_num]
-
-def calculate_d60(total_degrees, planet=None):
-    """
-    Calculate D60 (Shashtiamsa) chart position
-    For movable signs (Aries, Cancer, Libra, Capricorn): Start from same sign
-    For fixed signs (Taurus, Leo, Scorpio, Aquarius): Start from 5th sign
-    For dual signs (Gemini, Virgo, Sagittarius, Pisces): Start from 9th sign
-    Then count forward by shashtiamsa number
-    """
-    base_rashi = int(total_degrees / 30)
-    degree_in_rashi = total_degrees % 30
-    shashtiamsa = int(degree_in_rashi / 0.5)  # 30/60 = 0.5
-
-    rashi_type = base_rashi % 3  # 0: movable, 1: fixed, 2: dual
-
-    if rashi_type == 0:  # Movable signs
-        start_rashi = base_rashi
-    elif rashi_type == 1:  # Fixed signs
-        start_rashi = (base_rashi + 4) % 12  # 5th sign
-    else:  # Dual signs
-        start_rashi = (base_rashi + 8) % 12  # 9th sign
-
-    # Calculate zodiac rounds and remaining divisions
-    zodiac_rounds = shashtiamsa // 5
-    remaining_divisions = shashtiamsa % 5
-
-    final_rashi = (start_rashi + zodiac_rounds + remaining_divisions) % 12
-
-    fixed_rashi_order = [
-        'Aries', 'Taurus', 'Gemini', 'Cancer', 'Leo', 'Virgo',
-        'Libra', 'Scorpio', 'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces'
-    ]
-
-    return fixed_rashi_order[final_rashi]
-
 def solar_longitude(jd):
     """Solar longitude at given instant (julian day) jd"""
-    data = swe.calc_ut(jd, swe.SUN, swe.FLG_SWIEPH)
-    return data[0][0]   # Access the longitude value from the tuple
+    return table_longitude(jd, 'Sun')
 
 def lunar_longitude(jd):
     """Lunar longitude at given instant (julian day) jd"""
-    data = swe.calc_ut(jd, swe.MOON, swe.FLG_SWIEPH)
-    return data[0][0]   # Access the longitude value from the tuple
+    return table_longitude(jd, 'Moon')
 
-def calculate_tithi_yog_karan(sun_longitude, moon_longitude, julian_day, lat, lon, tz):
+def calculate_tithi_yog_karan(sun_longitude, moon_longitude, julian_day, lat, lon, tz, context=KRISHNAMURTI):
     """
     Calculate Tithi, Yog, and Karan based on Sun and Moon longitudes using drik-panchanga logic
     """
@@ -365,76 +237,54 @@ def calculate_tithi_yog_karan(sun_longitude, moon_longitude, julian_day, lat, lo
         "Kimstughna"
     ]
 
-    # Calculate end times using Swiss Ephemeris
-    def calculate_end_time(start_jd, target_angle, is_tithi=True):
-        offsets = [0.25, 0.5, 0.75, 1.0]
-        if is_tithi:
-            # For tithi, we track moon-sun difference
-            angles = [(lunar_longitude(start_jd + t) - solar_longitude(start_jd + t)) % 360 for t in offsets]
-        else:
-            # For yoga, we track moon+sun sum
-            angles = [(lunar_longitude(start_jd + t) + solar_longitude(start_jd + t)) % 360 for t in offsets]
+    # End times and the following divisions, from the panchang cached for this
+    # day (filled from the transition index or the solver)
+    transitions = cached_panchang_transitions(julian_day, tz, context.sid_mode)
 
-        # Use inverse Lagrange interpolation to find end time
-        x = offsets
-        y = angles
-        approx_end = inverse_lagrange(x, y, target_angle)
-        return (start_jd + approx_end - julian_day) * 24 + tz
+    # Hours are counted from local midnight of the birth date, so values past
+    # 24 fall on the next day (drik-panchanga convention)
+    local_midnight = floor(julian_day + tz / 24 - 0.5) + 0.5 - tz / 24
 
-    # Calculate tithi end time
-    tithi_end_angle = tithi_number * 12
-    tithi_end_time = calculate_end_time(julian_day, tithi_end_angle, True)
-
-    # Calculate yoga end time
-    yoga_end_angle = yog_number * 13.333333
-    yoga_end_time = calculate_end_time(julian_day, yoga_end_angle, False)
-
-    # Calculate karana end time
-    karana_end_angle = karan_number * 6
-    karana_end_time = calculate_end_time(julian_day, karana_end_angle, True)
+    def end_details(kind, number_of, names):
+        _, upcoming = transitions[kind]
+        (end_jd, next_index), (next_end_jd, _) = upcoming[:2]
+        next_number = number_of(next_index)
+        return {
+            "end_time": round((end_jd - local_midnight) * 24, 2),  # End time in hours from midnight
+            "end_timestamp": jd_to_local_iso(end_jd, tz),
+            "next": {
+                "number": next_number,
+                "name": names[next_number - 1],
+                "end_timestamp": jd_to_local_iso(next_end_jd, tz)
+            }
+        }
 
     return {
         "tithi": {
             "number": tithi_number,
             "name": tithi_names[tithi_number - 1],
             "degrees": round(tithi % 1 * 12, 2),  # Remaining degrees in current tithi
-            "end_time": round(tithi_end_time, 2)  # End time in hours from midnight
+            **end_details("tithi", lambda index: index + 1, tithi_names)
         },
         "yog": {
             "number": yog_number,
             "name": yog_names[yog_number - 1],
             "degrees": round(yog % 13.333333, 2),  # Remaining degrees in current yog
-            "end_time": round(yoga_end_time, 2)  # End time in hours from midnight
+            **end_details("yoga", lambda index: index + 1, yog_names)
         },
         "karan": {
             "number": karan_number,
             "name": karan_names[karan_number - 1],  # 11 karans repeat
             "degrees": round(karan_degrees % 1 * 6, 2),  # Remaining degrees in current karan
-            "end_time": round(karana_end_time, 2)  # End time in hours from midnight
+            **end_details("karana", lambda index: index % 11 + 1, karan_names)
         }
     }
 
-def inverse_lagrange(x, y, ya):
-    """Given two lists x and y, find the value of x = xa when y = ya, i.e., f(xa) = ya"""
-    assert(len(x) == len(y))
-    total = 0
-    for i in range(len(x)):
-        numer = 1
-        denom = 1
-        for j in range(len(x)):
-            if j != i:
-                numer *= (ya - y[j])
-                denom *= (y[i] - y[j])
-        total += numer * x[i] / denom
-    return total
-
-def unwrap_angles(angles):
-    """Add 360 to those elements in the input list so that all elements are sorted in ascending order."""
-    result = angles.copy()
-    for i in range(1, len(angles)):
-        if result[i] < result[i-1]:
-            result[i] += 360
-    return result
+def jd_to_local_iso(jd, tz):
+    """Julian day (UT) as an ISO timestamp at a fixed UTC offset in hours"""
+    year, month, day, hour = swe.revjul(jd)
+    local = datetime(year, month, day, tzinfo=timezone.utc) + timedelta(hours=hour)
+    return local.astimezone(timezone(timedelta(hours=tz))).isoformat(timespec="seconds")
 
 def calculate_avakhada_details(moon_longitude, nakshatra):
     """
@@ -574,14 +424,13 @@ def calculate_avakhada_details(moon_longitude, nakshatra):
         "paya": paya_map[nakshatra]
     }
 
-def calculate_extended_planetary_info(julian_day, lat, lon, tz):
-    swe.set_sid_mode(swe.SIDM_KRISHNAMURTI)
-    ayanamsa = swe.get_ayanamsa(julian_day)
+def calculate_extended_planetary_info(julian_day, lat, lon, tz, context=KRISHNAMURTI):
+    ayanamsa = context.get_ayanamsa(julian_day)
 
     # Calculate sunrise and sunset times
     sun_times = calculate_sunrise_sunset(julian_day, lat, lon, tz)
 
-    houses, ascendant = calculate_house_positions(julian_day, lat, lon)
+    houses, ascendant = calculate_house_positions(julian_day, lat, lon, context)
     ascendant = (ascendant - ayanamsa) % 360
     houses = [(h - ayanamsa) % 360 for h in houses]
 
@@ -589,30 +438,42 @@ def calculate_extended_planetary_info(julian_day, lat, lon, tz):
     lagna_rashi = RASHI_TRANSLATION[sanskrit_lagna_rashi]
 
     planetary_info = {}
+    varga_longitudes = {}
 
-    sun_flags = swe.FLG_SWIEPH | swe.FLG_SPEED
-    sun_info = swe.calc_ut(julian_day, swe.SUN, sun_flags)
-    sun_longitude = (sun_info[0][0] - ayanamsa) % 360
+    planet_mappings = [
+        ('Sun', swe.SUN), ('Moon', swe.MOON), ('Mars', swe.MARS),
+        ('Mercury', swe.MERCURY), ('Venus', swe.VENUS),
+        ('Jupiter', swe.JUPITER), ('Saturn', swe.SATURN),
+        # Add these new planets
+        ('Neptune', swe.NEPTUNE),
+        ('Uranus', swe.URANUS),
+        ('Pluto', swe.PLUTO)
+    ]
+
+    # All bodies (plus Rahu) in a single batch ephemeris call
+    batch_bodies = [planet_num for _, planet_num in planet_mappings] + [swe.MEAN_NODE]
+    batch_lons, batch_speeds = calc_batch([julian_day], batch_bodies)
+    positions = {
+        planet_num: (float(batch_lons[0, i]), float(batch_speeds[0, i]))
+        for i, planet_num in enumerate(batch_bodies)
+    }
+
+    sun_longitude = (positions[swe.SUN][0] - ayanamsa) % 360
     sun_position = sun_longitude % 30
 
     # Calculate Moon's position for Tithi, Yog, Karan
-    moon_flags = swe.FLG_SWIEPH | swe.FLG_SPEED
-    moon_info = swe.calc_ut(julian_day, swe.MOON, moon_flags)
-    moon_longitude = (moon_info[0][0] - ayanamsa) % 360
+    moon_longitude = (positions[swe.MOON][0] - ayanamsa) % 360
 
     # Calculate Tithi, Yog, Karan
-    panchang_details = calculate_tithi_yog_karan(sun_longitude, moon_longitude, julian_day, lat, lon, tz)
+    panchang_details = calculate_tithi_yog_karan(sun_longitude, moon_longitude, julian_day, lat, lon, tz, context)
 
     # Calculate Avakhada details
     moon_nakshatra = get_nakshatra(moon_longitude)[0]
     avakhada_details = calculate_avakhada_details(moon_longitude, moon_nakshatra)
 
     def get_planet_info(planet_num, planet, julian_day, ayanamsa):
-        flags = swe.FLG_SWIEPH | swe.FLG_SPEED
-        planet_info = swe.calc_ut(julian_day, planet_num, flags)
-
-        longitude = (planet_info[0][0] - ayanamsa) % 360
-        speed = planet_info[0][3]
+        tropical_longitude, speed = positions[planet_num]
+        longitude = (tropical_longitude - ayanamsa) % 360
 
         rashi_index = int(longitude / 30)
         sanskrit_rashi = list(RASHI_TRANSLATION.keys())[rashi_index]
@@ -636,32 +497,12 @@ def calculate_extended_planetary_info(julian_day, lat, lon, tz):
 
         }
 
-    planet_mappings = [
-        ('Sun', swe.SUN), ('Moon', swe.MOON), ('Mars', swe.MARS),
-        ('Mercury', swe.MERCURY), ('Venus', swe.VENUS),
-        ('Jupiter', swe.JUPITER), ('Saturn', swe.SATURN),
-        # Add these new planets
-        ('Neptune', swe.NEPTUNE),
-        ('Uranus', swe.URANUS),
-        ('Pluto', swe.PLUTO)
-    ]
-
     for planet, planet_num in planet_mappings:
         planet_info = get_planet_info(planet_num, planet, julian_day, ayanamsa)
         rashi = planet_info['rashi']
         house_position = get_house_from_rashi(rashi, lagna_rashi)
 
-        total_degrees = planet_info['total_degrees']
-        divisional_charts = {
-            'D2': calculate_d2(total_degrees, planet),
-            'D4': calculate_d4(total_degrees),
-            'D9': calculate_d9(total_degrees),
-            'D10': calculate_d10(total_degrees),
-            'D60': calculate_d60(total_degrees, planet)
-        }
-
-        # Convert divisional charts to numbers
-        divisional_charts = convert_divisional_charts_to_numbers(divisional_charts)
+        varga_longitudes[planet] = planet_info['total_degrees']
 
         planetary_info[planet] = {
             'rashi': rashi,
@@ -675,24 +516,14 @@ def calculate_extended_planetary_info(julian_day, lat, lon, tz):
             'combust': planet_info['combust'],
             'status': planet_info['status'],
             'house': house_position,
-            'divisional_charts': divisional_charts
+            'divisional_charts': None
         }
 
     # Calculate Rahu and Ketu
     rahu_info = get_planet_info(swe.MEAN_NODE, 'Rahu', julian_day, ayanamsa)
     rahu_house = get_house_from_rashi(rahu_info['rashi'], lagna_rashi)
 
-    # Calculate divisional charts for Rahu
-    rahu_divisional_charts = {
-        'D2': calculate_d2(rahu_info['total_degrees'], 'Rahu'),
-        'D4': calculate_d4(rahu_info['total_degrees']),
-        'D9': calculate_d9(rahu_info['total_degrees']),
-        'D10': calculate_d10(rahu_info['total_degrees']),
-        'D60': calculate_d60(rahu_info['total_degrees'], 'Rahu')
-    }
-
-    # Convert Rahu's divisional charts to numbers
-    rahu_divisional_charts = convert_divisional_charts_to_numbers(rahu_divisional_charts)
+    varga_longitudes['Rahu'] = rahu_info['total_degrees']
 
     planetary_info['Rahu'] = {
         'rashi': rahu_info['rashi'],
@@ -706,7 +537,7 @@ def calculate_extended_planetary_info(julian_day, lat, lon, tz):
         'combust': False,
         'status': 'Neutral',
         'house': rahu_house,
-        'divisional_charts': rahu_divisional_charts
+        'divisional_charts': None
     }
 
     # Calculate Ketu position
@@ -718,17 +549,7 @@ def calculate_extended_planetary_info(julian_day, lat, lon, tz):
     ketu_degrees = ketu_longitude % 30
     ketu_nakshatra = get_nakshatra(ketu_longitude)
 
-    # Calculate divisional charts for Ketu
-    ketu_divisional_charts = {
-        'D2': calculate_d2(ketu_longitude, 'Ketu'),
-        'D4': calculate_d4(ketu_longitude),
-        'D9': calculate_d9(ketu_longitude),
-        'D10': calculate_d10(ketu_longitude),
-        'D60': calculate_d60(ketu_longitude, 'Ketu')
-    }
-
-    # Convert Ketu's divisional charts to numbers
-    ketu_divisional_charts = convert_divisional_charts_to_numbers(ketu_divisional_charts)
+    varga_longitudes['Ketu'] = ketu_longitude
 
     planetary_info['Ketu'] = {
         'rashi': ketu_rashi,
@@ -742,7 +563,7 @@ def calculate_extended_planetary_info(julian_day, lat, lon, tz):
         'combust': False,
         'status': 'Neutral',
         'house': ketu_house,
-        'divisional_charts': ketu_divisional_charts
+        'divisional_charts': None
     }
 
     # Ascendant Details
@@ -750,17 +571,7 @@ def calculate_extended_planetary_info(julian_day, lat, lon, tz):
     ascendant_rashi = RASHI_TRANSLATION[sanskrit_ascendant_rashi]
     ascendant_nakshatra = get_nakshatra(ascendant)
 
-    # Calculate divisional charts for Ascendant
-    ascendant_divisional_charts = {
-        'D2': calculate_d2(ascendant, 'Ascendant'),
-        'D4': calculate_d4(ascendant),
-        'D9': calculate_d9(ascendant, is_ascendant=True),
-        'D10': calculate_d10(ascendant),
-        'D60': calculate_d60(ascendant, 'Ascendant')
-    }
-
-    # Convert Ascendant's divisional charts to numbers
-    ascendant_divisional_charts = convert_divisional_charts_to_numbers(ascendant_divisional_charts)
+    varga_longitudes['Ascendant'] = ascendant
 
     planetary_info['Ascendant'] = {
         'rashi': ascendant_rashi,
@@ -771,9 +582,14 @@ def calculate_extended_planetary_info(julian_day, lat, lon, tz):
         'nakshatra': ascendant_nakshatra[0],
         'nakshatra_lord': ascendant_nakshatra[1],
         'house': get_house_from_rashi(ascendant_rashi, lagna_rashi),
-        'divisional_charts': ascendant_divisional_charts
+        'divisional_charts': None
     }
 
+    # Divisional charts for every body in one table lookup
+    bodies = list(varga_longitudes)
+    for body, charts in zip(bodies, varga_charts([varga_longitudes[b] for b in bodies], KUNDLI_VARGAS)):
+        planetary_info[body]['divisional_charts'] = charts
+
     # After planetary_info is built and contains all planets including 'Ascendant'
     ascendant_house = planetary_info['Ascendant']['house']
 
@@ -790,27 +606,16 @@ def calculate_extended_planetary_info(julian_day, lat, lon, tz):
 
 def calculate_sunrise_sunset(julian_day, lat, lon, tz):
     """
-    Calculate sunrise and sunset times using a simpler approach
+    Sunrise and sunset on the local birth date, in hours from local midnight
+    (swe.rise_trans, cached per date and location tile)
     """
-    # Convert degrees to float to ensure we're working with proper numbers
-    lat_float = float(lat)
-    lon_float = float(lon)
-
-    # Create a day-long array of times to check for sunrise/sunset
-    sunrise_hour = 6.0  # Approximate sunrise time
-    sunset_hour = 18.0  # Approximate sunset time
-
-    # Calculate approximate sunrise/sunset Julian days
-    sunrise_jd = julian_day + (sunrise_hour - tz) / 24.0
-    sunset_jd = julian_day + (sunset_hour - tz) / 24.0
-
-    # Convert times to local time
-    sunrise_time = sunrise_hour
-    sunset_time = sunset_hour
+    times = day_sun_times(jd_to_local_date(julian_day, tz), lat, lon, tz)
+    sunrise_time = local_hours(times["sunrise_jd"], times["midnight_jd"])
+    sunset_time = local_hours(times["sunset_jd"], times["midnight_jd"])
 
     return {
-        "sunrise": round(sunrise_time, 2),
-        "sunset": round(sunset_time, 2)
+        "sunrise": round(sunrise_time, 2) if sunrise_time is not None else None,
+        "sunset": round(sunset_time, 2) if sunset_time is not None else None
     }
 
 nakshatra_length = 13.333333  # 360 / 27
@@ -911,14 +716,9 @@ def calculate_mahadasha_periods(birth_date, moon_longitude):
     full_dasha_years = DASHA_YEARS[start_lord]
     balance_years = (remaining_deg / nak_span) * full_dasha_years
 
-    # Debug logs for verification
-    print(f"🌕 Moon Longitude: {moon_longitude}")
-    print(f"📌 Nakshatra Index: {nakshatra_index}")
-    print(f"📌 Nakshatra: {nakshatra_name}")
-    print(f"🌟 Lord: {start_lord}")
-    print(f"🔢 Nakshatra start degree: {nakshatra_start}")
-    print(f"🔢 Remaining degrees in nakshatra: {remaining_deg}")
-    print(f"⏳ Balance Mahadasha years at birth: {balance_years}")
+    logger.debug("Moon %s in %s (index %d, lord %s, starts %s): %s degrees left, balance %s years",
+                 moon_longitude, nakshatra_name, nakshatra_index, start_lord, nakshatra_start,
+                 remaining_deg, balance_years)
 
     # Generate mahadasha timeline according to the fixed Vimshottari order
     return generate_mahadasha(birth_date, start_lord, balance_years)
@@ -930,63 +730,479 @@ class KundliRequest(BaseModel):
     latitude: float
     longitude: float
 
+def birth_moment(birth_date, birth_time):
+    """(IST-aware datetime, Julian day UT, tz offset in hours) for a local birth date and time"""
+    ist = pytz.timezone('Asia/Kolkata')
+    dt = datetime.strptime(f"{birth_date} {birth_time}", "%Y-%m-%d %H:%M")
+    dt = ist.localize(dt)
+    utc_time = dt.astimezone(pytz.UTC)
+
+    julian_day = swe.julday(utc_time.year, utc_time.month, utc_time.day,
+                           utc_time.hour + utc_time.minute/60.0)
+
+    # Get timezone offset in hours
+    tz_offset = dt.utcoffset().total_seconds() / 3600
+    return dt, julian_day, tz_offset
+
+def sidereal_moon(julian_day, context=KRISHNAMURTI):
+    """Sidereal Moon longitude alone, for endpoints that need no full chart"""
+    lons, _ = calc_batch([julian_day], [swe.MOON])
+    return (float(lons[0, 0]) - context.get_ayanamsa(julian_day)) % 360
+
+def build_kundli(request: KundliRequest, use_cache=True):
+    """Full kundli response for one birth record; raises on invalid input"""
+    birth_date = request.date_of_birth
+    birth_time = request.time_of_birth
+    lat = request.latitude
+    lon = request.longitude
+    # ayanamsa, ephemeris path and flags travel with the computation
+    context = KRISHNAMURTI
+
+    # Identical birth details are answered from the chart cache without
+    # touching the ephemeris
+    cache_key = kundli_cache_key(birth_date, birth_time, lat, lon, context.name)
+    cached = kundli_cache.get(cache_key) if use_cache else None
+    if cached is not None:
+        return cached
+
+    dt, julian_day, tz_offset = birth_moment(birth_date, birth_time)
+
+    planetary_info, panchang_details, avakhada_details, sun_times = calculate_extended_planetary_info(julian_day, lat, lon, tz_offset, context)
+
+    # Calculate Mahadasha periods
+    moon_longitude = planetary_info['Moon']['total_degrees']
+    mahadasha_periods = calculate_mahadasha_periods(dt, moon_longitude)
+
+    # Build vedic4 section with Purusharthas; populate dharma using Ascendant's nakshatra lord
+    vedic4 = {"dharma": {}, "artha": {}, "kama": {}, "moksha": {}}
+    asc_nakshatra_lord = planetary_info.get('Ascendant', {}).get('nakshatra_lord')
+    if asc_nakshatra_lord and asc_nakshatra_lord in planetary_info:
+        lord_obj = planetary_info[asc_nakshatra_lord]
+        vedic4["dharma"] = {
+            "Asc_nakshatra_lord": asc_nakshatra_lord,
+            "houseNumber": lord_obj.get("houseNumber"),
+            "nakshatra": lord_obj.get("nakshatra")
+        }
+
+    response = {
+        "meta": {
+            "status": "success",
+            "message": "Kundli generated successfully",
+            "ayanamsa": {
+                "value": context.get_ayanamsa(julian_day),
+                "type": context.name
+            }
+        },
+        "panchang": panchang_details,
+        "avakhada": avakhada_details,
+        "sun_times": sun_times,
+        "kundli": planetary_info,
+        "ashtakavarga": ashtakavarga({
+            body: planetary_info[body]['total_degrees'] for body in ASHTAKAVARGA_BODIES
+        }),
+        "mahadasha": mahadasha_periods,
+        "vedic4": vedic4
+    }
+    if use_cache:
+        kundli_cache.set(cache_key, response)
+    return response
+
 # --- FastAPI Route ---
 @app.post("/generate_kundli")
 async def generate_kundli(request: KundliRequest):
     try:
-        birth_date = request.date_of_birth
-        birth_time = request.time_of_birth
-        lat = request.latitude
-        lon = request.longitude
-
-        # Local time conversion to UTC
-        ist = pytz.timezone('Asia/Kolkata')
-        dt = datetime.strptime(f"{birth_date} {birth_time}", "%Y-%m-%d %H:%M")
-        dt = ist.localize(dt)
-        utc_time = dt.astimezone(pytz.UTC)
-
-        julian_day = swe.julday(utc_time.year, utc_time.month, utc_time.day,
-                               utc_time.hour + utc_time.minute/60.0)
-
-        # Get timezone offset in hours
-        tz_offset = dt.utcoffset().total_seconds() / 3600
-
-        planetary_info, panchang_details, avakhada_details, sun_times = calculate_extended_planetary_info(julian_day, lat, lon, tz_offset)
-
-        # Calculate Mahadasha periods
-        moon_longitude = planetary_info['Moon']['total_degrees']
-        mahadasha_periods = calculate_mahadasha_periods(dt, moon_longitude)
-
-        # Build vedic4 section with Purusharthas; populate dharma using Ascendant's nakshatra lord
-        vedic4 = {"dharma": {}, "artha": {}, "kama": {}, "moksha": {}}
-        asc_nakshatra_lord = planetary_info.get('Ascendant', {}).get('nakshatra_lord')
-        if asc_nakshatra_lord and asc_nakshatra_lord in planetary_info:
-            lord_obj = planetary_info[asc_nakshatra_lord]
-            vedic4["dharma"] = {
-                "Asc_nakshatra_lord": asc_nakshatra_lord,
-                "houseNumber": lord_obj.get("houseNumber"),
-                "nakshatra": lord_obj.get("nakshatra")
-            }
+        # chart work runs on the "chart" compute pool, not on the event loop
+        return await run_compute("chart", build_kundli, request)
+    except ComputeQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        return {
-            "meta": {
-                "status": "success",
-                "message": "Kundli generated successfully",
-                "ayanamsa": {
-                    "value": swe.get_ayanamsa(julian_day),
-                    "type": "Krishnamurti"
-                }
-            },
-            "panchang": panchang_details,
-            "avakhada": avakhada_details,
-            "sun_times": sun_times,
-            "kundli": planetary_info,
-            "mahadasha": mahadasha_periods,
-            "vedic4": vedic4
+# --- Batch Route ---
+def build_kundli_record(index, record):
+    """One batch line: the kundli or the error for this record, never an exception"""
+    line = {"index": index}
+    if isinstance(record, dict) and record.get("id") not in (None, ""):
+        line["id"] = record["id"]
+    try:
+        if not isinstance(record, dict):
+            raise ValueError("record must be an object with date_of_birth, time_of_birth, latitude and longitude")
+        line["status"] = "success"
+        line["result"] = build_kundli(KundliRequest(**record))
+    except Exception as e:
+        line["status"] = "error"
+        line["error"] = str(e)
+    return line
+
+async def stream_kundli_batch(records):
+    """
+    NDJSON lines in completion order. Records are fed to the "batch" compute
+    pool only as it has room, so a 50k-record import never sits in memory as
+    futures; when the pool is full the stream waits for its own records.
+    """
+    executor = get_executor("batch")
+    pending = {}
+    records = iter(enumerate(records))
+    next_record = next(records, None)
+    while pending or next_record is not None:
+        while next_record is not None:
+            index, record = next_record
+            future = executor.try_submit(build_kundli_record, index, record)
+            if future is None:
+                break
+            pending[asyncio.wrap_future(future)] = index
+            next_record = next(records, None)
+        if not pending:
+            # the pool is full with other callers' work
+            await asyncio.sleep(0.05)
+            continue
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            index = pending.pop(future)
+            try:
+                line = future.result()
+            except Exception as e:
+                # the worker itself died (e.g. BrokenProcessPool)
+                line = {"index": index, "status": "error", "error": str(e)}
+            yield json.dumps(line) + "\n"
+
+@app.post("/generate_kundli/batch")
+async def generate_kundli_batch(request: Request):
+    """
+    Many kundlis in one call: a JSON array of KundliRequest objects, or a
+    multipart upload with a CSV `file` whose header has date_of_birth,
+    time_of_birth, latitude and longitude (and optionally id). Streams one
+    NDJSON line per record as it completes, tagged with its input index.
+    """
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None:
+                raise ValueError("multipart batch needs a CSV 'file' field")
+            text = (await upload.read()).decode("utf-8-sig")
+            records = list(csv.DictReader(io.StringIO(text)))
+        else:
+            records = await request.json()
+            if not isinstance(records, list):
+                raise ValueError("batch body must be a JSON array of kundli requests")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(stream_kundli_batch(records), media_type="application/x-ndjson")
+
+# --- Dasha ---
+class DashaRequest(KundliRequest):
+    system: str = "vimshottari"  # vimshottari | yogini | ashtottari
+    at: Optional[str] = None  # "YYYY-MM-DD HH:MM" local time, default now
+    depth: int = 5  # 1 = maha ... 5 = prana
+    expand: Optional[List[str]] = None  # lord path whose sub-periods to list, e.g. ["Venus", "Sun"]
+
+def build_dasha(request: DashaRequest):
+    """Running dasha chain at one instant, plus the sub-periods of one node if asked"""
+    if request.system not in DASHA_SYSTEMS:
+        raise ValueError(f"Unknown dasha system '{request.system}', expected one of {sorted(DASHA_SYSTEMS)}")
+    dt, julian_day, _ = birth_moment(request.date_of_birth, request.time_of_birth)
+    moon_longitude = sidereal_moon(julian_day)
+
+    timeline = DashaTimeline(dt, moon_longitude, request.system)
+    if request.at:
+        at, _, _ = birth_moment(*request.at.strip().split(" ", 1))
+    else:
+        at = datetime.now(pytz.UTC)
+
+    response = {
+        "system": request.system,
+        "balance_at_birth": {
+            "lord": timeline.system.lords[timeline.first_lord],
+            "years": round(timeline.balance_years, 6)
+        },
+        "at": at.isoformat(),
+        "active": [period.to_dict() for period in timeline.active(at, request.depth)]
+    }
+    if request.expand:
+        node = timeline.period(request.expand)
+        if node is None:
+            raise ValueError(f"No dasha period {' > '.join(request.expand)}")
+        response["expanded"] = dict(node.to_dict(), periods=[child.to_dict() for child in node.children()])
+    return response
+
+@app.post("/dasha")
+async def dasha(request: DashaRequest):
+    try:
+        return await run_compute("chart", build_dasha, request)
+    except ComputeQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# --- Chart store ---
+class StoredChartRequest(KundliRequest):
+    user_id: str
+
+@app.post("/charts")
+async def store_charts(charts: List[StoredChartRequest]):
+    """Compute and persist natal charts (one ephemeris batch for the whole list)"""
+    try:
+        records = [chart.model_dump() for chart in charts]
+        stored = await run_compute("chart", get_chart_store().add_charts, records)
+        return {"stored": stored}
+    except ComputeQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/charts/search")
+def search_charts(request: Request, moon_nakshatra: Optional[str] = None, lagna: Optional[str] = None,
+                  mahadasha: Optional[str] = None, at: Optional[str] = None, limit: int = 1000):
+    """
+    user_ids matching all given filters; planet signs as <planet>_sign=<rashi>,
+    e.g. /charts/search?moon_nakshatra=Rohini&saturn_sign=Aquarius
+    """
+    try:
+        signs = {
+            key[:-len("_sign")].title(): value
+            for key, value in request.query_params.items() if key.endswith("_sign")
+        }
+        when = birth_moment(*at.strip().split(" ", 1))[0] if at else None
+        user_ids = get_chart_store().find(moon_nakshatra, lagna, signs, mahadasha, when, limit)
+        return {"count": len(user_ids), "user_ids": user_ids}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/charts/entering_mahadasha")
+def charts_entering_mahadasha(lord: str, start: Optional[str] = None, end: Optional[str] = None):
+    """Users whose mahadasha of lord begins between start and end (YYYY-MM-DD, default this month)"""
+    try:
+        today = datetime.now(pytz.UTC)
+        start_dt = datetime.strptime(start, "%Y-%m-%d").replace(tzinfo=timezone.utc) if start \
+            else today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        end_dt = datetime.strptime(end, "%Y-%m-%d").replace(tzinfo=timezone.utc) if end \
+            else start_dt + relativedelta(months=1)
+        rows = get_chart_store().entering_mahadasha(lord, start_dt, end_dt)
+        return {"lord": lord.title(), "users": [{"user_id": user_id, "start": begins} for user_id, begins in rows]}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/charts/{user_id}")
+def get_stored_chart(user_id: str):
+    chart = get_chart_store().get_chart(user_id)
+    if chart is None:
+        raise HTTPException(status_code=404, detail=f"No stored chart for '{user_id}'")
+    return chart
+
+# --- Guna Milan ---
+class MatchRequest(BaseModel):
+    groom: KundliRequest
+    bride: KundliRequest
+
+class MatchSearchRequest(BaseModel):
+    profile: KundliRequest
+    gender: str  # "male" | "female": the profile's side of the match
+    k: int = 10
+    min_score: float = 0
+    user_ids: Optional[List[str]] = None  # candidates among stored charts, default all
+
+def build_match(request: MatchRequest):
+    moons = [sidereal_moon(birth_moment(person.date_of_birth, person.time_of_birth)[1])
+             for person in (request.groom, request.bride)]
+    return guna_milan(*moons)
+
+def search_matches(request: MatchSearchRequest):
+    """Top-k stored charts by guna score against one profile"""
+    if request.gender not in ("male", "female"):
+        raise ValueError("gender must be 'male' or 'female'")
+    moon = sidereal_moon(birth_moment(request.profile.date_of_birth, request.profile.time_of_birth)[1])
+    user_ids, candidate_moons = get_chart_store().moon_longitudes(request.user_ids)
+    order, scores = top_matches(moon, candidate_moons, request.k, request.gender == "male", request.min_score)
+    return {
+        "candidates": len(user_ids),
+        "matches": [{"user_id": user_ids[i], "score": float(score)} for i, score in zip(order, scores)]
+    }
+
+@app.post("/match")
+async def match(request: MatchRequest):
+    try:
+        return await run_compute("chart", build_match, request)
+    except ComputeQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/match/search")
+async def match_search(request: MatchSearchRequest):
+    try:
+        return await run_compute("chart", search_matches, request)
+    except ComputeQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+class AspectRequest(KundliRequest):
+    orbs: Optional[Dict[str, float]] = None  # {aspect: orb} overrides of aspects.ASPECTS
+
+class AspectTimesRequest(KundliRequest):
+    body: str          # transiting body, e.g. "Saturn"
+    natal_point: str   # natal body or "Ascendant"
+    start_date: str    # YYYY-MM-DD, local
+    end_date: str
+    aspects: Optional[List[str]] = None
+
+def natal_positions(request: KundliRequest):
+    """{body: sidereal longitude} for STORE_BODIES and the tz offset of the birth"""
+    _, julian_day, tz = birth_moment(request.date_of_birth, request.time_of_birth)
+    lons = compute_longitudes([julian_day], [request.latitude], [request.longitude])[0]
+    return dict(zip(STORE_BODIES, lons.tolist())), tz
+
+def build_aspects(request: AspectRequest):
+    positions, _ = natal_positions(request)
+    return {
+        "western": [{"from": a, "to": b, "aspect": aspect, "orb": round(orb, 2)}
+                    for a, b, aspect, orb in western_aspects(positions, request.orbs)],
+        "drishti": [{"from": a, "to": b, "house": house} for a, b, house in graha_drishti(positions)]
+    }
+
+def build_aspect_times(request: AspectTimesRequest):
+    """Exact instants the transiting body aspects a natal point between two dates"""
+    if request.natal_point not in STORE_BODIES:
+        raise ValueError(f"natal_point must be one of {STORE_BODIES}")
+    positions, tz = natal_positions(request)
+    jd_start = birth_moment(request.start_date, "00:00")[1]
+    jd_end = birth_moment(request.end_date, "00:00")[1]
+    if jd_end <= jd_start:
+        raise ValueError("end_date must be after start_date")
+    events = exact_aspect_times(request.body, positions[request.natal_point], jd_start, jd_end,
+                                request.aspects, KRISHNAMURTI.sid_mode)
+    return [{"time": jd_to_local_iso(jd, tz), "jd": jd, "aspect": aspect, "retrograde": retrograde}
+            for jd, aspect, retrograde in events]
+
+@app.post("/aspects")
+async def aspects(request: AspectRequest):
+    try:
+        return await run_compute("chart", build_aspects, request)
+    except ComputeQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/aspects/transits")
+async def aspect_times(request: AspectTimesRequest):
+    try:
+        return await run_compute("chart", build_aspect_times, request)
+    except ComputeQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+class HouseRequest(KundliRequest):
+    house_system: str = DEFAULT_HOUSE_SYSTEM  # whole_sign | equal | placidus | kp | sripati
+
+def build_houses(request: HouseRequest):
+    """Cusps and the house of every natal body under one house system"""
+    _, julian_day, _ = birth_moment(request.date_of_birth, request.time_of_birth)
+    cusps, ascendant, mc = house_cusps(julian_day, request.latitude, request.longitude, request.house_system)
+    positions, _ = natal_positions(request)
+    return {
+        "house_system": request.house_system,
+        "ascendant": round(ascendant, 4),
+        "mc": round(mc, 4),
+        "cusps": [round(c, 4) for c in cusps.tolist()],
+        "houses": house_positions(positions, cusps)
+    }
+
+@app.post("/houses")
+async def houses(request: HouseRequest):
+    try:
+        return await run_compute("chart", build_houses, request)
+    except ComputeQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+class DayDivisionRequest(BaseModel):
+    date: str        # YYYY-MM-DD, first local date
+    days: int = 1    # consecutive dates, up to MAX_DAY_DIVISION_DAYS
+    latitude: float
+    longitude: float
+    tz: float = 5.5
+
+MAX_DAY_DIVISION_DAYS = 366
+
+def build_day_divisions(request: DayDivisionRequest):
+    """Rahu Kalam, Yamaganda, Gulika, Choghadiya and Hora per day, local ISO times"""
+    if not 1 <= request.days <= MAX_DAY_DIVISION_DAYS:
+        raise ValueError(f"days must be between 1 and {MAX_DAY_DIVISION_DAYS}")
+    start = datetime.strptime(request.date, "%Y-%m-%d").date()
+    tz = request.tz
+    result = []
+    for offset, table in enumerate(day_division_tables(start, request.days, request.latitude, request.longitude, tz)):
+        if table is None:
+            result.append({"date": (start + timedelta(days=offset)).isoformat(), "error": "no sunrise or sunset"})
+            continue
+        day = {
+            "date": table["date"],
+            "weekday": table["weekday"],
+            "sunrise": jd_to_local_iso(table["sunrise_jd"], tz),
+            "sunset": jd_to_local_iso(table["sunset_jd"], tz),
+            "next_sunrise": jd_to_local_iso(table["next_sunrise_jd"], tz)
         }
+        for kaal in KAALS:
+            day[kaal] = {"start": jd_to_local_iso(table[kaal][0], tz), "end": jd_to_local_iso(table[kaal][1], tz)}
+        for division in ("choghadiya", "hora"):
+            day[division] = [
+                dict(part, start=jd_to_local_iso(part["start"], tz), end=jd_to_local_iso(part["end"], tz))
+                for part in table[division]
+            ]
+        result.append(day)
+    return result
+
+@app.post("/day_divisions")
+async def day_divisions(request: DayDivisionRequest):
+    try:
+        return await run_compute("chart", build_day_divisions, request)
+    except ComputeQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+class LagnaCalendarRequest(BaseModel):
+    date: str        # YYYY-MM-DD, first local date
+    days: int = 1    # consecutive dates, up to MAX_DAY_DIVISION_DAYS
+    latitude: float
+    longitude: float
+    tz: float = 5.5
+
+def build_lagna_calendar(request: LagnaCalendarRequest):
+    """Rising sign windows at a location, local ISO times"""
+    if not 1 <= request.days <= MAX_DAY_DIVISION_DAYS:
+        raise ValueError(f"days must be between 1 and {MAX_DAY_DIVISION_DAYS}")
+    start = datetime.strptime(request.date, "%Y-%m-%d").date()
+    end = start + timedelta(days=request.days - 1)
+    return [
+        {"lagna": LAGNA_SIGNS[sign], "start": jd_to_local_iso(run_start, request.tz), "end": jd_to_local_iso(run_end, request.tz)}
+        for run_start, run_end, sign in lagna_runs(start, end, request.latitude, request.longitude, request.tz)
+    ]
+
+@app.post("/lagna_calendar")
+async def lagna_calendar(request: LagnaCalendarRequest):
+    try:
+        return await run_compute("chart", build_lagna_calendar, request)
+    except ComputeQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        "kundli": kundli_cache.stats(),
+        "panchang": panchang_cache_stats(),
+        "sun_times": sun_times_cache_stats(),
+        "day_divisions": day_divisions_cache_stats(),
+        "lagna": lagna_cache_stats()
+    }
+
 # --- Run the app ---
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,75 @@
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from ttl_cache import TTLCache
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+# Finished /generate_kundli responses keyed by normalised birth input. The
+# in-memory tier is a bounded LRU; set KUNDLI_CACHE_DB to a file path to add
+# an SQLite tier that survives restarts and is shared by worker processes.
+KUNDLI_CACHE_SIZE = int(os.getenv("KUNDLI_CACHE_SIZE", 2048))
+KUNDLI_CACHE_DB = os.getenv("KUNDLI_CACHE_DB", "")
+
+# Coordinates are rounded to 4 decimals (about 11 m) before keying
+COORD_DECIMALS = 4
+
+def kundli_cache_key(date_of_birth, time_of_birth, latitude, longitude, ayanamsa):
+    """Canonical key: '2024-03-09|07:05|28.6139|77.2090|Krishnamurti' for any spelling of the same input"""
+    dt = datetime.strptime(f"{date_of_birth.strip()} {time_of_birth.strip()}", "%Y-%m-%d %H:%M")
+    lat = round(float(latitude), COORD_DECIMALS) + 0.0  # + 0.0 folds -0.0 into 0.0
+    lon = round(float(longitude), COORD_DECIMALS) + 0.0
+    return f"{dt:%Y-%m-%d|%H:%M}|{lat:.{COORD_DECIMALS}f}|{lon:.{COORD_DECIMALS}f}|{ayanamsa}"
+
+# -------------------------------------------------
+# CACHE
+# -------------------------------------------------
+class ChartCache:
+    """Two-tier cache of JSON-serialisable chart results: LRU in memory, optional SQLite on disk"""
+
+    def __init__(self, maxsize=KUNDLI_CACHE_SIZE, db_path=KUNDLI_CACHE_DB):
+        self.memory = TTLCache(maxsize)
+        self.db_path = db_path or None
+        self.disk_hits = 0
+        self._local = threading.local()
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS charts (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _connect(self):
+        # sqlite connections cannot be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None or not self.db_path:
+            return value
+        row = self._connect().execute("SELECT value FROM charts WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value = json.loads(row[0])
+        self.disk_hits += 1
+        self.memory.set(key, value)
+        return value
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO charts (key, value) VALUES (?, ?)",
+                             (key, json.dumps(value)))
+
+    def stats(self):
+        stats = self.memory.stats()
+        stats["disk_enabled"] = bool(self.db_path)
+        stats["disk_hits"] = self.disk_hits
+        return stats
+
+kundli_cache = ChartCache()
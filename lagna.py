@@ -0,0 +1,116 @@
+import os
+from datetime import timedelta
+import swisseph as swe
+from ttl_cache import TTLCache
+from ephemeris import KRISHNAMURTI
+from panchang_cache import local_midnight_jd
+from sun_times import tile
+from transitions import TIME_TOLERANCE, MAX_ITERATIONS
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+# Sidereal lagna (rising sign) calendar for a location. The ascendant only
+# ever moves forward, so a day is walked boundary by boundary from the sign
+# rising at local midnight: each crossing is a Newton solve on the ascendant
+# and its rate from swe.houses_ex2, about a dozen per day. Days are cached
+# per (local date, sun-times tile, tz, ayanamsa); the lagna moves about 4
+# minutes per degree of longitude, so the default tile is good to seconds.
+LAGNA_CACHE_SIZE = int(os.getenv("LAGNA_CACHE_SIZE", 50000))
+
+# Near the polar circles the ascendant can jump and stall; refuse there
+LAGNA_MAX_LATITUDE = 66.0
+
+RASHI_NAMES = ["Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+               "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"]
+MOVABLE_SIGNS = (0, 3, 6, 9)
+FIXED_SIGNS = (1, 4, 7, 10)
+DUAL_SIGNS = (2, 5, 8, 11)
+SIGN_GROUPS = {"movable": MOVABLE_SIGNS, "fixed": FIXED_SIGNS, "dual": DUAL_SIGNS}
+
+lagna_cache = TTLCache(LAGNA_CACHE_SIZE)
+
+# -------------------------------------------------
+# ROOT FINDING
+# -------------------------------------------------
+def sidereal_ascendant(jd, lat, lon, context=KRISHNAMURTI):
+    """(sidereal ascendant, its rate in degrees/day)"""
+    _, ascmc, _, speeds = context.call(swe.houses_ex2, jd, lat, lon, b'W')
+    return (ascmc[0] - context.get_ayanamsa(jd)) % 360.0, speeds[0]
+
+def _crossing(boundary, jd, lat, lon, context):
+    """First instant after jd at which the ascendant reaches boundary"""
+    lo = jd
+    asc, rate = sidereal_ascendant(jd, lat, lon, context)
+    x = jd + ((boundary - asc) % 360.0) / rate
+    hi = None
+    for _ in range(MAX_ITERATIONS * 2):
+        asc, rate = sidereal_ascendant(x, lat, lon, context)
+        offset = (asc - boundary + 180.0) % 360.0 - 180.0
+        if offset < 0:
+            lo = x
+        else:
+            hi = x
+        step = offset / rate
+        x_next = x - step
+        # keep Newton inside the bracket once there is one
+        if x_next <= lo or (hi is not None and x_next >= hi):
+            x_next = (lo + hi) / 2 if hi is not None else lo + (x - lo) * 2
+        if abs(x_next - x) < TIME_TOLERANCE:
+            return x_next
+        x = x_next
+    return x
+
+def lagna_changes(jd_start, jd_end, lat, lon, context=KRISHNAMURTI):
+    """(start_jd, end_jd, sign 0-11) runs of the rising sign over [jd_start, jd_end)"""
+    if abs(lat) > LAGNA_MAX_LATITUDE:
+        raise ValueError(f"lagna calendar needs |latitude| <= {LAGNA_MAX_LATITUDE}")
+    asc, _ = sidereal_ascendant(jd_start, lat, lon, context)
+    sign = int(asc // 30)
+    runs = []
+    start = jd_start
+    while start < jd_end:
+        end = min(_crossing((sign + 1) % 12 * 30.0, start, lat, lon, context), jd_end)
+        runs.append((start, end, sign))
+        start, sign = end, (sign + 1) % 12
+    return runs
+
+# -------------------------------------------------
+# CACHED CALENDAR
+# -------------------------------------------------
+def day_lagnas(day, lat, lon, tz=5.5, context=KRISHNAMURTI):
+    """Lagna runs from local midnight to the next, cached per day and location tile"""
+    lat, lon = tile(lat, lon)
+    key = (day.isoformat(), lat, lon, tz, context.name)
+    midnight = local_midnight_jd(day, tz)
+    return lagna_cache.get_or_compute(key, lambda: lagna_changes(midnight, midnight + 1, lat, lon, context))
+
+def lagna_runs(start_day, end_day, lat, lon, tz=5.5, context=KRISHNAMURTI):
+    """Runs from start_day to end_day inclusive, with runs split at midnight merged"""
+    runs = []
+    day = start_day
+    while day <= end_day:
+        for start, end, sign in day_lagnas(day, lat, lon, tz, context):
+            if runs and runs[-1][2] == sign and runs[-1][1] == start:
+                runs[-1] = (runs[-1][0], end, sign)
+            else:
+                runs.append((start, end, sign))
+        day += timedelta(days=1)
+    return runs
+
+def sign_indices(values):
+    """0-based signs from names, numbers 1-12, or the groups movable/fixed/dual"""
+    signs = set()
+    for value in values:
+        if isinstance(value, str) and value.lower() in SIGN_GROUPS:
+            signs.update(SIGN_GROUPS[value.lower()])
+        elif isinstance(value, str) and not value.isdigit():
+            if value not in RASHI_NAMES:
+                raise ValueError(f"unknown sign {value!r}")
+            signs.add(RASHI_NAMES.index(value))
+        else:
+            signs.add(int(value) - 1)
+    return sorted(signs)
+
+def cache_stats():
+    return lagna_cache.stats()
@@ -0,0 +1,171 @@
+import os
+import sys
+import time
+import numpy as np
+from ephemeris import calc_batch, swiss_calc_batch, ayanamsa_batch, apply_ephe_path, SWE_LOCK
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+# Chebyshev fits of tropical longitudes, one row of coefficients per body per
+# fixed-length segment. Build once with:
+#
+#     python longitude_tables.py build
+#
+# The file is memory-mapped read-only, so every worker process shares the same
+# pages through the OS page cache.
+EPHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ephe")
+TABLE_PATH = os.getenv("LONGITUDE_TABLE_PATH", os.path.join(EPHE_DIR, "longitudes.npy"))
+
+TABLE_BODIES = ['Sun', 'Moon', 'Mars', 'Mercury', 'Venus', 'Jupiter',
+                'Saturn', 'Uranus', 'Neptune', 'Pluto', 'Rahu']
+TABLE_START_JD = 2415020.5   # 1900-01-01 00:00 UT
+TABLE_END_JD = 2488069.5     # 2100-01-01 00:00 UT
+SEGMENT_DAYS = 16.0
+N_COEF = 18
+N_SEGMENTS = int(np.ceil((TABLE_END_JD - TABLE_START_JD) / SEGMENT_DAYS))
+
+# Typical fit error is well under 0.01 arcsec; the worst case over 1900-2100 is
+# a few arcsec for the outer planets. Anything needing more than this should go
+# to Swiss Ephemeris directly.
+TABLE_PRECISION_DEG = 5.0 / 3600
+
+BODY_INDEX = {body: i for i, body in enumerate(TABLE_BODIES)}
+
+_table = None
+_table_checked = False
+
+# -------------------------------------------------
+# BUILD
+# -------------------------------------------------
+def _chebyshev_nodes(n):
+    k = np.arange(n)
+    return np.cos(np.pi * (k + 0.5) / n)
+
+def build_table(path=TABLE_PATH):
+    """Fit every body over the whole span and write the coefficient table"""
+    with SWE_LOCK:
+        apply_ephe_path(EPHE_DIR)
+    nodes = _chebyshev_nodes(N_COEF)
+    # Interpolating at the Chebyshev nodes is exact, so the fit is one matrix product
+    inv_vander = np.linalg.inv(np.polynomial.chebyshev.chebvander(nodes, N_COEF - 1))
+
+    seg_starts = TABLE_START_JD + SEGMENT_DAYS * np.arange(N_SEGMENTS)
+    jds = (seg_starts[:, None] + (nodes[None, :] + 1) * SEGMENT_DAYS / 2).ravel()
+
+    started = time.time()
+    lons, _ = swiss_calc_batch(jds, TABLE_BODIES)
+    table = np.empty((len(TABLE_BODIES), N_SEGMENTS, N_COEF))
+    for b in range(len(TABLE_BODIES)):
+        samples = np.unwrap(lons[:, b].reshape(N_SEGMENTS, N_COEF), period=360, axis=1)
+        table[b] = samples @ inv_vander.T
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(path, table)
+    print(f"Wrote {path} ({table.nbytes / 1e6:.1f} MB) in {time.time() - started:.1f}s")
+
+    # Check the fit between the nodes against Swiss Ephemeris
+    check_jds = seg_starts + SEGMENT_DAYS * np.random.default_rng(0).random(N_SEGMENTS)
+    truth, _ = swiss_calc_batch(check_jds, TABLE_BODIES)
+    for b, body in enumerate(TABLE_BODIES):
+        fitted = _evaluate(table, b, check_jds)[0]
+        err = np.abs((fitted - truth[:, b] + 180) % 360 - 180).max() * 3600
+        print(f"  {body:<8} max error {err:.4f} arcsec")
+
+# -------------------------------------------------
+# LOOKUP
+# -------------------------------------------------
+def load_table(path=TABLE_PATH):
+    """Memory-map the coefficient table, or return None when it is missing or stale"""
+    global _table, _table_checked
+    if not _table_checked:
+        _table_checked = True
+        try:
+            table = np.load(path, mmap_mode="r")
+            if table.shape == (len(TABLE_BODIES), N_SEGMENTS, N_COEF):
+                # plain ndarray view over the same mapped pages; indexing a
+                # np.memmap is several times slower on the scalar path
+                _table = np.asarray(table)
+        except (OSError, ValueError):
+            _table = None
+    return _table
+
+def table_covers(jds):
+    jds = np.asarray(jds)
+    return bool(np.all((jds >= TABLE_START_JD) & (jds < TABLE_END_JD)))
+
+def _evaluate(table, body_index, jds):
+    """Vectorised Clenshaw recurrence; returns (longitudes, speeds)"""
+    jds = np.atleast_1d(np.asarray(jds, dtype=np.float64))
+    offset = (jds - TABLE_START_JD) / SEGMENT_DAYS
+    seg = np.minimum(offset.astype(np.int64), N_SEGMENTS - 1)
+    x = 2.0 * (offset - seg) - 1.0
+    coef = np.asarray(table[body_index, seg])
+
+    b1 = np.zeros_like(x)
+    b2 = np.zeros_like(x)
+    d1 = np.zeros_like(x)
+    d2 = np.zeros_like(x)
+    for k in range(N_COEF - 1, 0, -1):
+        # value and derivative recurrences share the same pass
+        d1, d2 = 2 * b1 + 2 * x * d1 - d2, d1
+        b1, b2 = coef[:, k] + 2 * x * b1 - b2, b1
+    lons = coef[:, 0] + x * b1 - b2
+    speeds = (b1 + x * d1 - d2) * (2.0 / SEGMENT_DAYS)
+
+    lons = np.mod(lons, 360.0)
+    lons[lons >= 360.0] -= 360.0
+    return lons, speeds
+
+def table_longitude(jd, body):
+    """Single tropical longitude: one polynomial evaluation when the table covers jd"""
+    table = load_table()
+    if table is None or not TABLE_START_JD <= jd < TABLE_END_JD or body not in BODY_INDEX:
+        return calc_batch([jd], [body])[0][0, 0]
+
+    offset = (jd - TABLE_START_JD) / SEGMENT_DAYS
+    seg = min(int(offset), N_SEGMENTS - 1)
+    x = 2.0 * (offset - seg) - 1.0
+    coef = table[BODY_INDEX[body], seg].tolist()
+    b1 = b2 = 0.0
+    for c in coef[:0:-1]:
+        b1, b2 = c + 2 * x * b1 - b2, b1
+    lon = (coef[0] + x * b1 - b2) % 360.0
+    return lon if lon < 360.0 else 0.0
+
+def table_lookup(jds, bodies):
+    """Tropical (longitudes, speeds) from the table, or None if it cannot answer"""
+    table = load_table()
+    if table is None or not table_covers(jds) or not all(b in BODY_INDEX for b in bodies):
+        return None
+
+    jds = np.atleast_1d(np.asarray(jds, dtype=np.float64))
+    lons = np.empty((jds.size, len(bodies)))
+    speeds = np.empty_like(lons)
+    for j, body in enumerate(bodies):
+        lons[:, j], speeds[:, j] = _evaluate(table, BODY_INDEX[body], jds)
+    return lons, speeds
+
+def table_calc_batch(jds, bodies, sid_mode=None):
+    """
+    Same contract as ephemeris.calc_batch, answered from the Chebyshev table
+    when it is built and covers every requested instant. Falls back to the
+    configured ephemeris backend otherwise, so callers can use it
+    unconditionally wherever TABLE_PRECISION_DEG is good enough.
+    """
+    result = table_lookup(jds, bodies)
+    if result is None:
+        return calc_batch(jds, bodies, sid_mode)
+
+    jds = np.atleast_1d(np.asarray(jds, dtype=np.float64))
+    lons, speeds = result
+    if sid_mode is not None:
+        lons -= ayanamsa_batch(jds, sid_mode)[:, None]
+        np.mod(lons, 360.0, out=lons)
+    return lons, speeds
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["build"]:
+        build_table()
+    else:
+        print("usage: python longitude_tables.py build")
@@ -26,6 +26,7 @@ import os
 from reportlab.lib.colors import HexColor
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
 from pdf2image import convert_from_bytes
 import imagehash
 from PIL import ImageOps, ImageEnhance
@@ -34,6 +35,9 @@ LIGHT_ORANGE = HexColor("#FFF3E0")
 import uuid
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
+from panchang_cache import range_runs
+from muhurat_engine import find_windows, split_at, DEFAULT_EXCLUDED, DEFAULT_LATITUDE, DEFAULT_LONGITUDE
+from compute_executor import run_compute_sync, ComputeQueueFull
 load_dotenv()
 
 
@@ -43,8 +47,6 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("muhurat")
 
-swe.set_ephe_path(r"D:\python\astro-py\ephe")
-
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 if not OPENAI_API_KEY:
@@ -91,6 +93,8 @@ NAKSHATRA_NAMES = [
 # -------------------------------------------------
 # EVENT BASED RULES (GENERIC ENGINE)
 # -------------------------------------------------
+# "allow" lists the nakshatras; a rule may also carry "tithi", "yoga",
+# "weekday" or "lagna" lists, which muhurat_engine.find_windows applies
 EVENT_RULES = {
     "marriage": {
         "allow": {"Rohini","Mrigashirsha","Magha","Uttara Phalguni",
@@ -141,9 +145,6 @@ ABHUJ_MUHURAT_DATES = {
     "Vijayadashami": "2025-10-02"
 }
 
-KHARMAAS_RANGES = [
-    ("2025-12-15", "2026-01-15")
-]
 # -------------------------------------------------
 # PALMISTRY KNOWLEDGE BASE
 # -------------------------------------------------
@@ -197,14 +198,6 @@ def approx_tokens(text: str) -> int:
 
 MAX_MUHURATS = 20
 
-def is_kharmaas(dt):
-    for start, end in KHARMAAS_RANGES:
-        s = datetime.strptime(start, "%Y-%m-%d").date()
-        e = datetime.strptime(end, "%Y-%m-%d").date()
-        if s <= dt.date() <= e:
-            return True
-    return False
-
 # -------------------------------------------------
 # ASTRO HELPERS
 # -------------------------------------------------
@@ -213,82 +206,68 @@ def dt_to_jd(dt):
     t = dt_utc.hour + dt_utc.minute / 60
     return swe.julday(dt_utc.year, dt_utc.month, dt_utc.day, t)
 
-def get_moon_longitude(dt):
-    jd = dt_to_jd(dt)
-    res = swe.calc_ut(jd, swe.MOON)
-    return res[0][0] % 360
-
-def get_nakshatra(moon_lon):
-    idx = int(moon_lon // (360 / 27))
-    return NAKSHATRA_NAMES[idx]
+def jd_to_dt(jd):
+    """Julian day (UT) to an IST datetime, rounded to the minute"""
+    y, m, d, hours = swe.revjul(jd)
+    dt_utc = datetime(y, m, d, tzinfo=pytz.UTC) + timedelta(minutes=round(hours * 60))
+    return dt_utc.astimezone(IST)
 
 # -------------------------------------------------
 # CORE MUHURAT LOGIC (NO SLOT SPAM)
 # -------------------------------------------------
-def generate_muhurats(start_date, end_date, user_request="general"):
-    # Allowed nakshatra according to event type
-    allowed_nak = EVENT_RULES.get(user_request, {}).get("allow", set(NAKSHATRA_NAMES))
-
-    muhurats = []
-    dt = IST.localize(datetime.combine(start_date, datetime.min.time()))
-    end_dt = IST.localize(datetime.combine(end_date, datetime.max.time()))
-
-    last_nak = None
-    window_start = None
-
-    while dt <= end_dt:
-        today_str = dt.strftime("%Y-%m-%d")
+def generate_muhurats(start_date, end_date, user_request="general", lat=None, lon=None, constraints=None):
+    """
+    Muhurat windows for an event: allowed nakshatras from EVENT_RULES (plus any
+    tithi/yoga/weekday/lagna lists a rule carries, and caller constraints),
+    minus Rahu Kalam, Yamaganda, Gulika, Kharmaas and Abhuj days, all
+    combined as interval sets in one pass. lat/lon default to Delhi.
+    """
+    rules = EVENT_RULES.get(user_request, {})
+    lat = DEFAULT_LATITUDE if lat is None else lat
+    lon = DEFAULT_LONGITUDE if lon is None else lon
+
+    muhurats = []  # (start jd, entry), sorted at the end
+
+    # Abhuj days are reported as a single Siddh Muhurat and removed from the
+    # scan; Kharmaas is excluded by the engine from the Sun's exact ingresses
+    blocked = []
+    day = start_date
+    while day <= end_date:
+        day_dt = IST.localize(datetime.combine(day, datetime.min.time()))
+        day_jd = dt_to_jd(day_dt)
+        today_str = day.strftime("%Y-%m-%d")
         if today_str in ABHUJ_MUHURAT_DATES.values():
-            muhurats.append({
-                "start": dt.strftime("%Y-%m-%d 06:00 AM"),
-                "end": dt.strftime("%Y-%m-%d 11:59 PM"),
+            muhurats.append((day_jd, {
+                "start": day_dt.strftime("%Y-%m-%d 06:00 AM"),
+                "end": day_dt.strftime("%Y-%m-%d 11:59 PM"),
                 "nakshatra": "Siddh Muhurat",
                 "event": "All Events",
                 "explanation": f"{[name for name,date in ABHUJ_MUHURAT_DATES.items() if date==today_str][0]} is an Abhuj Muhurat. Any auspicious work can be done today without calculation."
-            })
-            dt += timedelta(days=1)
-            continue
-        #  Skip kharmaas period
-        if is_kharmaas(dt):
-            dt += timedelta(minutes=30)
+            }))
+            blocked.append((day_jd, day_jd + 1))
+        day += timedelta(days=1)
+
+    query = {
+        "nakshatra": sorted(rules.get("allow", NAKSHATRA_NAMES)),
+        "exclude": DEFAULT_EXCLUDED,
+        "blocked": blocked
+    }
+    query.update({factor: rules[factor] for factor in ("tithi", "yoga", "weekday", "lagna") if factor in rules})
+    query.update(constraints or {})
+    windows = find_windows(start_date, end_date, query, lat, lon, nakshatra_names=NAKSHATRA_NAMES)
+
+    # Label each window with its nakshatra, from the per-day panchang cache
+    for win_start, win_end, nak_index in split_at(windows, range_runs(start_date, end_date, "nakshatra")):
+        if win_end - win_start < 1.0 / 1440:
             continue
+        muhurats.append((win_start, {
+            "start": jd_to_dt(win_start).strftime("%Y-%m-%d %I:%M %p"),
+            "end": jd_to_dt(win_end).strftime("%Y-%m-%d %I:%M %p"),
+            "nakshatra": NAKSHATRA_NAMES[nak_index]
+        }))
 
-        moon = get_moon_longitude(dt)
-        nak = get_nakshatra(moon)
-
-        if nak in allowed_nak:
-            # Start new window if nakshatra changed
-            if nak != last_nak:
-                if last_nak and window_start:
-                    muhurats.append({
-                        "start": window_start.strftime("%Y-%m-%d %I:%M %p"),
-                        "end": dt.strftime("%Y-%m-%d %I:%M %p"),
-                        "nakshatra": last_nak
-                    })
-                window_start = dt
-                last_nak = nak
-        else:
-            # Non-allowed nakshatra → close previous window
-            if last_nak and window_start:
-                muhurats.append({
-                    "start": window_start.strftime("%Y-%m-%d %I:%M %p"),
-                    "end": dt.strftime("%Y-%m-%d %I:%M %p"),
-                    "nakshatra": last_nak
-                })
-            last_nak = None
-            window_start = None
-
-        dt += timedelta(minutes=30)
-
-    # Add last open window if exists
-    if last_nak and window_start:
-        muhurats.append({
-            "start": window_start.strftime("%Y-%m-%d %I:%M %p"),
-            "end": end_dt.strftime("%Y-%m-%d %I:%M %p"),
-            "nakshatra": last_nak
-        })
-
-    return muhurats
+    muhurats.sort(key=lambda item: item[0])
+    return [entry for _, entry in muhurats]
 
 # PROMPT SIZE LOG
 
@@ -555,12 +534,13 @@ def generate_muhurat_pdf(muhurats, request_type, start_date, end_date):
 
 # ai-muhurat generator
 @app.get("/ai-muhurat-range")
-def ai_muhurat_range(start_date: str, end_date: str, user_request: str = "general"):
+def ai_muhurat_range(start_date: str, end_date: str, user_request: str = "general",
+                     latitude: Optional[float] = None, longitude: Optional[float] = None):
     try:
         sdt = datetime.strptime(start_date, "%Y-%m-%d").date()
         edt = datetime.strptime(end_date, "%Y-%m-%d").date()
 
-        raw = generate_muhurats(sdt, edt, user_request)
+        raw = run_compute_sync("panchang", generate_muhurats, sdt, edt, user_request, latitude, longitude)
         ai_raw, token_info = call_openai(raw, user_request)
         final = format_muhurats_response(ai_raw, user_request)["recommended_muhurats"]
 
@@ -581,6 +561,8 @@ def ai_muhurat_range(start_date: str, end_date: str, user_request: str = "genera
             "tokens_used": token_info  # <-- NEW FIELD
         }
 
+    except ComputeQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error("Error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -1582,6 +1564,10 @@ class MuhuratRequest(BaseModel):
     start_date: str
     end_date: str
     user_request: str = "general"
+    latitude: Optional[float] = None   # event location, default Delhi
+    longitude: Optional[float] = None
+    # extra muhurat_engine.find_windows constraints, e.g. {"tithi": [2, 3, 5], "weekday": ["Monday"]}
+    constraints: Optional[Dict[str, List[Any]]] = None
 
 @app.post("/generate_muhurat")
 def generate_muhurat_post(request: MuhuratRequest):
@@ -1593,8 +1579,9 @@ def generate_muhurat_post(request: MuhuratRequest):
         sdt = datetime.strptime(start_date, "%Y-%m-%d").date()
         edt = datetime.strptime(end_date, "%Y-%m-%d").date()
 
-        # Existing logic (NO changes)
-        raw = generate_muhurats(sdt, edt, user_request)
+        # Existing logic (NO changes), on the bounded "panchang" compute pool
+        raw = run_compute_sync("panchang", generate_muhurats, sdt, edt, user_request,
+                               request.latitude, request.longitude, request.constraints)
 
         # ---- Capture AI output + token usage safely ----
         ai_response = call_openai(raw, user_request)
@@ -1636,6 +1623,8 @@ def generate_muhurat_post(request: MuhuratRequest):
             "token_usage": token_usage
         }
 
+    except ComputeQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error("POST Muhurat Error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
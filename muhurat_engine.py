@@ -0,0 +1,246 @@
+import os
+from datetime import timedelta
+import numpy as np
+import swisseph as swe
+from ephemeris import KRISHNAMURTI
+from ephemeris_events import ingresses
+from longitude_tables import TABLE_START_JD, TABLE_END_JD
+from panchang_cache import range_runs, local_midnight_jd
+from sun_times import DEFAULT_CITIES
+from lagna import lagna_runs, sign_indices
+from day_divisions import day_division_tables, WEEKDAYS, KAALS, CHOGHADIYA_NAMES, CHOGHADIYA_QUALITY, HORA_ORDER
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+# Muhurat windows as interval algebra. Every factor (nakshatra, tithi, yoga,
+# weekday, lagna, kaal, choghadiya, hora) becomes a sorted set of disjoint
+# [start, end) Julian day intervals; a query is one sweep over all their
+# boundaries, so adding constraints adds boundaries, not passes.
+DEFAULT_LATITUDE, DEFAULT_LONGITUDE, DEFAULT_TZ = DEFAULT_CITIES["Delhi"]
+MIN_WINDOW_DAYS = float(os.getenv("MUHURAT_MIN_WINDOW_MINUTES", 1)) / 1440
+
+DEFAULT_EXCLUDED_KAALS = ("rahu_kalam", "yamaganda", "gulika")
+DEFAULT_EXCLUDED = DEFAULT_EXCLUDED_KAALS + ("kharmaas",)
+
+# Kharmaas: the Sun in sidereal (Lahiri) Sagittarius or Pisces, from its
+# ingress there to its next ingress. Every period over the ingress table's
+# span is indexed once as sorted start/end arrays.
+KHARMAAS_SIGNS = (8, 11)
+KHARMAAS_SID_MODE = swe.SIDM_LAHIRI
+
+_kharmaas_index = None
+
+# -------------------------------------------------
+# INTERVAL ALGEBRA
+# -------------------------------------------------
+def interval_set(pairs):
+    """Sorted, merged (n, 2) array from any iterable of (start, end) pairs"""
+    pairs = np.asarray(list(pairs), dtype=np.float64).reshape(-1, 2)
+    return union(pairs)
+
+def combine(sets, keep):
+    """
+    Generic set operation: keep(covered) receives a (len(sets), segments)
+    bool matrix telling which sets cover each elementary segment between
+    consecutive boundaries and returns the segments to keep, which are then
+    merged. One sort of all boundaries plus a searchsorted per set.
+    """
+    sets = [np.asarray(s, dtype=np.float64).reshape(-1, 2) for s in sets]
+    points = np.unique(np.concatenate([s.ravel() for s in sets]))
+    if points.size < 2:
+        return np.empty((0, 2))
+    starts, ends = points[:-1], points[1:]
+    covered = np.empty((len(sets), starts.size), dtype=bool)
+    for i, s in enumerate(sets):
+        if s.size == 0:
+            covered[i] = False
+            continue
+        order = np.argsort(s[:, 0], kind="stable")
+        begin, finish = s[order, 0], np.maximum.accumulate(s[order, 1])
+        # a segment is covered when the last interval starting at or before it reaches past it
+        last = np.searchsorted(begin, starts, side="right") - 1
+        covered[i] = (last >= 0) & (finish[np.maximum(last, 0)] >= ends)
+    keep_mask = keep(covered)
+    if not keep_mask.any():
+        return np.empty((0, 2))
+    # merge runs of kept segments
+    change = np.diff(np.concatenate(([False], keep_mask, [False])).astype(np.int8))
+    return np.column_stack((starts[change[:-1] == 1], ends[np.nonzero(change[1:] == -1)[0]]))
+
+def union(*sets):
+    return combine(sets, lambda covered: covered.any(axis=0))
+
+def intersect(*sets):
+    return combine(sets, lambda covered: covered.all(axis=0))
+
+def difference(base, *removed):
+    """Parts of base not covered by any of removed"""
+    return combine((base,) + removed, lambda covered: covered[0] & ~covered[1:].any(axis=0))
+
+def select(required, excluded=()):
+    """Intersection of every required set minus the union of every excluded set, in one sweep"""
+    n = len(required)
+    return combine(tuple(required) + tuple(excluded),
+                   lambda covered: covered[:n].all(axis=0) & ~covered[n:].any(axis=0))
+
+def clip(intervals, start, end):
+    return intersect(intervals, [(start, end)])
+
+def split_at(intervals, runs):
+    """[(start, end, index)] pieces of intervals cut at the boundaries of sorted (start, end, index) runs"""
+    if not runs:
+        return []
+    run_starts = np.array([run[0] for run in runs])
+    run_ends = np.array([run[1] for run in runs])
+    pieces = []
+    for start, end in np.asarray(intervals).reshape(-1, 2).tolist():
+        lo = np.searchsorted(run_ends, start, side="right")
+        hi = np.searchsorted(run_starts, end, side="left")
+        for i in range(lo, hi):
+            pieces.append((max(start, runs[i][0]), min(end, runs[i][1]), runs[i][2]))
+    return pieces
+
+# -------------------------------------------------
+# FACTORS
+# -------------------------------------------------
+def panchang_windows(kind, allowed, start_day, end_day, sid_mode=None):
+    """Runs of a panchang division (nakshatra/tithi/yoga, 0-based indices) whose index is allowed"""
+    allowed = set(allowed)
+    return interval_set((start, end) for start, end, index in range_runs(start_day, end_day, kind, sid_mode=sid_mode)
+                        if index in allowed)
+
+def _day_tables(start_day, end_day, lat, lon, tz):
+    days = (end_day - start_day).days + 1
+    return [table for table in day_division_tables(start_day, days, lat, lon, tz) if table is not None]
+
+def weekday_windows(allowed, start_day, end_day, lat, lon, tz):
+    """Sunrise-to-sunrise spans of the allowed weekdays (0=Sunday)"""
+    allowed = {WEEKDAYS[i] for i in allowed}
+    return interval_set((t["sunrise_jd"], t["next_sunrise_jd"]) for t in _day_tables(start_day, end_day, lat, lon, tz)
+                        if t["weekday"] in allowed)
+
+def kaal_windows(kaals, start_day, end_day, lat, lon, tz):
+    """Rahu Kalam / Yamaganda / Gulika spans from the day division tables"""
+    for kaal in kaals:
+        if kaal not in KAALS:
+            raise ValueError(f"unknown kaal {kaal!r}, expected one of {KAALS}")
+    return interval_set(t[kaal] for t in _day_tables(start_day, end_day, lat, lon, tz) for kaal in kaals)
+
+def choghadiya_windows(allowed, start_day, end_day, lat, lon, tz):
+    """Choghadiya parts whose name, or quality ("good", "neutral", "bad"), is allowed"""
+    allowed = set(allowed)
+    return interval_set((c["start"], c["end"]) for t in _day_tables(start_day, end_day, lat, lon, tz)
+                        for c in t["choghadiya"] if c["name"] in allowed or c["quality"] in allowed)
+
+def hora_windows(allowed, start_day, end_day, lat, lon, tz):
+    """Horas ruled by an allowed planet"""
+    allowed = set(allowed)
+    return interval_set((h["start"], h["end"]) for t in _day_tables(start_day, end_day, lat, lon, tz)
+                        for h in t["hora"] if h["lord"] in allowed)
+
+def lagna_windows(allowed, start_day, end_day, lat, lon, tz, context=KRISHNAMURTI):
+    """Spans where the sidereal rising sign (0=Aries) at the location is allowed"""
+    allowed = set(allowed)
+    return interval_set((start, end) for start, end, sign in lagna_runs(start_day, end_day, lat, lon, tz, context)
+                        if sign in allowed)
+
+def kharmaas_index():
+    """(starts, ends) arrays of every Kharmaas period, 1900-2100"""
+    global _kharmaas_index
+    if _kharmaas_index is None:
+        events = ingresses("Sun", TABLE_START_JD, TABLE_END_JD, KHARMAAS_SID_MODE)
+        # a period still running at the end of the table is closed there
+        ends = [jd for jd, _ in events[1:]] + [TABLE_END_JD]
+        periods = [(jd, end) for (jd, sign), end in zip(events, ends) if sign in KHARMAAS_SIGNS]
+        _kharmaas_index = np.array(periods).reshape(-1, 2).T.copy()
+    return _kharmaas_index
+
+def is_kharmaas(jd):
+    """One bisection of the index"""
+    starts, ends = kharmaas_index()
+    i = np.searchsorted(starts, jd, side="right") - 1
+    return bool(i >= 0 and jd < ends[i])
+
+def kharmaas_windows(jd_start, jd_end):
+    """Kharmaas periods overlapping [jd_start, jd_end)"""
+    starts, ends = kharmaas_index()
+    lo = np.searchsorted(ends, jd_start, side="right")
+    hi = np.searchsorted(starts, jd_end, side="left")
+    return np.column_stack((starts[lo:hi], ends[lo:hi]))
+
+# -------------------------------------------------
+# QUERY
+# -------------------------------------------------
+def _indices(values, names, offset=0):
+    """Accept names or numbers (numbers start at offset) and return 0-based indices"""
+    indices = []
+    for value in values:
+        if isinstance(value, str) and not value.isdigit():
+            if value not in names:
+                raise ValueError(f"unknown value {value!r}")
+            indices.append(names.index(value))
+        else:
+            indices.append(int(value) - offset)
+    return indices
+
+def find_windows(start_day, end_day, constraints, lat=DEFAULT_LATITUDE, lon=DEFAULT_LONGITUDE,
+                 tz=DEFAULT_TZ, sid_mode=None, nakshatra_names=None, context=KRISHNAMURTI):
+    """
+    (n, 2) Julian day windows from start_day 00:00 to end_day 24:00 local
+    satisfying every constraint:
+
+        nakshatra  allowed nakshatras (names from nakshatra_names, or 1-27)
+        tithi      allowed tithis 1-30 (16-30 Krishna paksha)
+        yoga       allowed yogas 1-27
+        weekday    allowed weekdays (names or 0=Sunday .. 6)
+        lagna      allowed rising signs at the location (names, 1-12, or
+                   "movable" / "fixed" / "dual")
+        choghadiya allowed choghadiyas (names, or "good" / "neutral" / "bad")
+        hora       allowed hora lords
+        exclude    kaals to avoid (day_divisions.KAALS), and/or "kharmaas"
+        blocked    extra (start, end) spans to avoid
+
+    Missing constraints do not restrict.
+    """
+    jd_start = local_midnight_jd(start_day, tz)
+    jd_end = local_midnight_jd(end_day, tz) + 1
+    # day division spans of the day before reach past midnight into the range
+    first = start_day - timedelta(days=1)
+
+    required = [np.array([[jd_start, jd_end]])]
+    if constraints.get("nakshatra") is not None:
+        required.append(panchang_windows("nakshatra", _indices(constraints["nakshatra"], nakshatra_names or [], 1),
+                                         start_day, end_day, sid_mode))
+    if constraints.get("tithi") is not None:
+        required.append(panchang_windows("tithi", _indices(constraints["tithi"], [], 1), start_day, end_day, sid_mode))
+    if constraints.get("yoga") is not None:
+        required.append(panchang_windows("yoga", _indices(constraints["yoga"], [], 1), start_day, end_day, sid_mode))
+    if constraints.get("weekday") is not None:
+        required.append(weekday_windows(_indices(constraints["weekday"], WEEKDAYS), first, end_day, lat, lon, tz))
+    if constraints.get("choghadiya") is not None:
+        allowed = constraints["choghadiya"]
+        for value in allowed:
+            if value not in CHOGHADIYA_NAMES and value not in CHOGHADIYA_QUALITY.values():
+                raise ValueError(f"unknown choghadiya {value!r}")
+        required.append(choghadiya_windows(allowed, first, end_day, lat, lon, tz))
+    if constraints.get("hora") is not None:
+        for value in constraints["hora"]:
+            if value not in HORA_ORDER:
+                raise ValueError(f"unknown hora lord {value!r}")
+        required.append(hora_windows(constraints["hora"], first, end_day, lat, lon, tz))
+    if constraints.get("lagna") is not None:
+        required.append(lagna_windows(sign_indices(constraints["lagna"]), start_day, end_day, lat, lon, tz, context))
+
+    excluded = []
+    exclude = list(constraints.get("exclude") or ())
+    if "kharmaas" in exclude:
+        exclude.remove("kharmaas")
+        excluded.append(kharmaas_windows(jd_start, jd_end))
+    if exclude:
+        excluded.append(kaal_windows(exclude, first, end_day, lat, lon, tz))
+    if constraints.get("blocked"):
+        excluded.append(interval_set(constraints["blocked"]))
+
+    windows = select(required, excluded)
+    return windows[windows[:, 1] - windows[:, 0] >= MIN_WINDOW_DAYS]
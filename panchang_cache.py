@@ -0,0 +1,101 @@
+import os
+import bisect
+from datetime import date, datetime, timedelta
+import swisseph as swe
+from ttl_cache import TTLCache
+from panchang_index import panchang_intervals, panchang_transitions
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+# Panchang runs are cached per local day, timezone and ayanamsa. Nakshatra,
+# tithi, yoga and karana depend only on the Sun and Moon longitudes, not on
+# the place, so one entry serves every location sharing a timezone.
+PANCHANG_CACHE_SIZE = int(os.getenv("PANCHANG_CACHE_SIZE", 4096))
+PANCHANG_CACHE_TTL = float(os.getenv("PANCHANG_CACHE_TTL", 24 * 3600))  # seconds
+
+# Each day also carries the divisions starting in the next few days, so the
+# end of whatever is running at 23:59 and the one after it are always present
+# (a tithi can last about 26 hours)
+LOOKAHEAD_DAYS = 3
+
+PANCHANG_KINDS = ("nakshatra", "tithi", "yoga", "karana")
+
+panchang_cache = TTLCache(PANCHANG_CACHE_SIZE, PANCHANG_CACHE_TTL)
+
+def local_midnight_jd(day, tz):
+    """Julian day (UT) of 00:00 local time on day, tz in hours east of UTC"""
+    return swe.julday(day.year, day.month, day.day, 0.0) - tz / 24.0
+
+def jd_to_local_date(jd, tz):
+    year, month, day, hour = swe.revjul(jd + tz / 24.0)
+    return date(year, month, day)
+
+# -------------------------------------------------
+# DAY PANCHANG
+# -------------------------------------------------
+def _compute_day(day, tz, sid_mode):
+    jd_start = local_midnight_jd(day, tz)
+    jd_end = jd_start + 1 + LOOKAHEAD_DAYS
+    record = {"day": day.isoformat(), "tz": tz, "jd_start": jd_start, "jd_end": jd_start + 1}
+    for kind in PANCHANG_KINDS:
+        record[kind] = panchang_intervals(kind, jd_start, jd_end, sid_mode)
+    return record
+
+def day_panchang(day, tz=5.5, sid_mode=None):
+    """
+    Nakshatra, tithi, yoga and karana runs for one local day, cached.
+
+    Each kind maps to (start_jd, end_jd, index) runs from local midnight to
+    LOOKAHEAD_DAYS past the day's end; jd_start/jd_end bound the day itself.
+    The first run of each kind starts at midnight rather than at a transition.
+    """
+    if isinstance(day, datetime):
+        day = day.date()
+    key = (day.isoformat(), tz, sid_mode)
+    return panchang_cache.get_or_compute(key, lambda: _compute_day(day, tz, sid_mode))
+
+def day_runs(record, kind):
+    """Runs of one kind clipped to the day itself"""
+    runs = []
+    for start, end, index in record[kind]:
+        if start >= record["jd_end"]:
+            break
+        runs.append((start, min(end, record["jd_end"]), index))
+    return runs
+
+def cached_panchang_transitions(jd, tz, sid_mode=None, count=2):
+    """
+    Same result as panchang_index.panchang_transitions, read from the cached
+    day panchang for the local date of jd.
+    """
+    record = day_panchang(jd_to_local_date(jd, tz), tz, sid_mode)
+    result = {}
+    for kind in ("tithi", "yoga", "karana"):
+        runs = record[kind]
+        i = bisect.bisect_right([start for start, _, _ in runs], jd) - 1
+        if i < 0 or i + count >= len(runs):
+            return panchang_transitions(jd, sid_mode, count)
+        upcoming = [(runs[j][1], runs[j + 1][2]) for j in range(i, i + count)]
+        result[kind] = (runs[i][2], upcoming)
+    return result
+
+def range_runs(start_day, end_day, kind, tz=5.5, sid_mode=None):
+    """
+    (start_jd, end_jd, index) runs of one kind from start_day to end_day
+    inclusive, stitched from cached days with runs split at midnight merged.
+    """
+    runs = []
+    day = start_day
+    while day <= end_day:
+        record = day_panchang(day, tz, sid_mode)
+        for start, end, index in day_runs(record, kind):
+            if runs and runs[-1][2] == index:
+                runs[-1] = (runs[-1][0], end, index)
+            else:
+                runs.append((start, end, index))
+        day += timedelta(days=1)
+    return runs
+
+def cache_stats():
+    return panchang_cache.stats()
@@ -0,0 +1,154 @@
+import os
+import sys
+import time
+import numpy as np
+import swisseph as swe
+from transitions import (
+    moon_phase, elongation_phase, yoga_phase, division_intervals,
+    solve_panchang_transitions, NAKSHATRA_SPAN, TITHI_SPAN, YOGA_SPAN, KARANA_SPAN
+)
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+# Sorted transition instants for nakshatra, tithi, yoga and karana. Build with:
+#
+#     python panchang_index.py build [start_year end_year]
+#
+# Each series is two .npy files: the Julian days (UT) of every transition and
+# the division index entered at each one. Both are memory-mapped, so a range
+# query is two binary searches and an array slice. An instant is answerable
+# when it lies between the first and last stored transition.
+EPHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ephe")
+INDEX_DIR = os.getenv("PANCHANG_INDEX_DIR", os.path.join(EPHE_DIR, "panchang_index"))
+INDEX_START_YEAR = int(os.getenv("PANCHANG_INDEX_START_YEAR", 1950))
+INDEX_END_YEAR = int(os.getenv("PANCHANG_INDEX_END_YEAR", 2100))
+
+# kind -> (phase factory, division span in degrees, depends on ayanamsa)
+KINDS = {
+    "nakshatra": (moon_phase, NAKSHATRA_SPAN, True),
+    "tithi": (elongation_phase, TITHI_SPAN, False),
+    "yoga": (yoga_phase, YOGA_SPAN, True),
+    "karana": (elongation_phase, KARANA_SPAN, False)
+}
+
+# muhurat works on tropical Moon positions, kundali_app on Krishnamurti
+INDEX_MODES = [None, swe.SIDM_KRISHNAMURTI]
+MODE_NAMES = {None: "tropical", swe.SIDM_KRISHNAMURTI: "krishnamurti", swe.SIDM_LAHIRI: "lahiri"}
+
+_cache = {}
+
+def _series_name(kind, sid_mode):
+    _, _, sidereal = KINDS[kind]
+    return f"{kind}_{MODE_NAMES[sid_mode]}" if sidereal else kind
+
+# -------------------------------------------------
+# BUILD
+# -------------------------------------------------
+def build_index(start_year=INDEX_START_YEAR, end_year=INDEX_END_YEAR, index_dir=INDEX_DIR):
+    jd_start = swe.julday(start_year, 1, 1, 0)
+    jd_end = swe.julday(end_year, 1, 1, 0)
+    os.makedirs(index_dir, exist_ok=True)
+
+    built = set()
+    for sid_mode in INDEX_MODES:
+        for kind, (factory, span, _) in KINDS.items():
+            name = _series_name(kind, sid_mode)
+            if name in built:
+                continue
+            started = time.time()
+            intervals = division_intervals(factory(sid_mode), jd_start, jd_end, span)
+            # the first interval starts at jd_start, not at a real transition
+            jds = np.array([start for start, _, _ in intervals[1:]], dtype=np.float64)
+            indices = np.array([index for _, _, index in intervals[1:]], dtype=np.int8)
+            np.save(os.path.join(index_dir, f"{name}_jd.npy"), jds)
+            np.save(os.path.join(index_dir, f"{name}_index.npy"), indices)
+            built.add(name)
+            print(f"{name}: {len(jds)} transitions in {time.time() - started:.1f}s")
+
+# -------------------------------------------------
+# QUERIES
+# -------------------------------------------------
+def load_series(kind, sid_mode=None, index_dir=INDEX_DIR):
+    """(transition jds, division indices) memory-mapped, or None if not built"""
+    name = _series_name(kind, sid_mode)
+    if name not in _cache:
+        try:
+            jds = np.load(os.path.join(index_dir, f"{name}_jd.npy"), mmap_mode="r")
+            indices = np.load(os.path.join(index_dir, f"{name}_index.npy"), mmap_mode="r")
+            _cache[name] = (np.asarray(jds), np.asarray(indices))
+        except (OSError, ValueError):
+            _cache[name] = None
+    return _cache[name]
+
+def lookup(kind, jd, sid_mode=None):
+    """
+    Division in force at jd as (index, start_jd, end_jd), where start/end are
+    the surrounding transitions. None when jd is outside the built span.
+    """
+    series = load_series(kind, sid_mode)
+    if series is None:
+        return None
+    jds, indices = series
+    i = int(np.searchsorted(jds, jd, side="right"))
+    if i == 0 or i == len(jds):
+        return None
+    return int(indices[i - 1]), float(jds[i - 1]), float(jds[i])
+
+def next_transitions(kind, jd, count=1, sid_mode=None):
+    """The next `count` transitions after jd as [(jd, index entered)], or None"""
+    series = load_series(kind, sid_mode)
+    if series is None:
+        return None
+    jds, indices = series
+    i = int(np.searchsorted(jds, jd, side="right"))
+    if i == 0 or i + count > len(jds):
+        return None
+    return list(zip(jds[i:i + count].tolist(), indices[i:i + count].tolist()))
+
+def indexed_intervals(kind, jd_start, jd_end, sid_mode=None):
+    """
+    (start_jd, end_jd, index) runs covering [jd_start, jd_end] straight from
+    the index, or None when the range is not fully covered.
+    """
+    series = load_series(kind, sid_mode)
+    if series is None:
+        return None
+    jds, indices = series
+    lo = int(np.searchsorted(jds, jd_start, side="right"))
+    hi = int(np.searchsorted(jds, jd_end, side="left"))
+    if lo == 0 or hi == len(jds):
+        return None
+    bounds = [jd_start] + jds[lo:hi].tolist() + [jd_end]
+    runs = indices[lo - 1:hi].tolist()
+    return list(zip(bounds[:-1], bounds[1:], runs))
+
+def panchang_intervals(kind, jd_start, jd_end, sid_mode=None):
+    """Index-backed intervals, computed with the transition finder where the index has no data"""
+    intervals = indexed_intervals(kind, jd_start, jd_end, sid_mode)
+    if intervals is None:
+        factory, span, _ = KINDS[kind]
+        intervals = division_intervals(factory(sid_mode), jd_start, jd_end, span)
+    return intervals
+
+def panchang_transitions(jd, sid_mode=None, count=2):
+    """
+    Current tithi, yoga and karana at jd and the next `count` transitions of
+    each, as {kind: (index, [(jd, index entered), ...])}. Read from the index
+    when it covers jd, otherwise solved by Newton iteration.
+    """
+    result = {}
+    for kind in ("tithi", "yoga", "karana"):
+        found = lookup(kind, jd, sid_mode)
+        upcoming = next_transitions(kind, jd, count, sid_mode)
+        if found is None or upcoming is None:
+            return solve_panchang_transitions(jd, sid_mode, count)
+        result[kind] = (found[0], upcoming)
+    return result
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["build"]:
+        years = [int(y) for y in sys.argv[2:4]]
+        build_index(*years)
+    else:
+        print("usage: python panchang_index.py build [start_year end_year]")
@@ -4,8 +4,14 @@ import uvicorn
 from fastapi.staticfiles import StaticFiles
 from kundali_app import app as kundali_app
 from muhurat import app as muhurat_app
+from ephemeris import get_provider
+from sun_times import precompute_cities
+from compute_executor import executor_stats, shutdown_executors
 import os
 
+# Days of sunrise/sunset to precompute for the default cities at startup (0 = off)
+SUN_TIMES_PRECOMPUTE_DAYS = int(os.getenv("SUN_TIMES_PRECOMPUTE_DAYS", 0))
+
 # Create the main FastAPI app
 app = FastAPI(
     title="Astrology APIs",
@@ -28,6 +34,25 @@ app.mount("/kundali", kundali_app)
 # Mount the Muhurat app under `/muhurat` prefix
 app.mount("/muhurat", muhurat_app)
 
+# Load the configured ephemeris backend once per worker (logs backend + load time)
+@app.on_event("startup")
+def load_ephemeris():
+    get_provider()
+
+@app.on_event("startup")
+def warm_sun_times():
+    if SUN_TIMES_PRECOMPUTE_DAYS > 0:
+        precompute_cities(days=SUN_TIMES_PRECOMPUTE_DAYS)
+
+@app.on_event("shutdown")
+def stop_compute_pools():
+    shutdown_executors()
+
+# Per-pool utilisation of the compute executors (see compute_executor.py)
+@app.get("/compute/stats")
+def compute_stats():
+    return executor_stats()
+
 # Health check endpoint
 @app.get("/")
 def health_check():
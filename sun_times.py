@@ -0,0 +1,136 @@
+import os
+import time
+import logging
+from datetime import date, timedelta
+import swisseph as swe
+from ttl_cache import TTLCache
+from ephemeris import TROPICAL
+
+logger = logging.getLogger("sun_times")
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+# Sunrise/sunset are computed once per (local date, location tile, tz) at the
+# tile centre. Sunrise moves about 4 minutes per degree of longitude, so the
+# default 0.05 degree tile is good to roughly 10 seconds.
+SUN_TIMES_GRID_DEG = float(os.getenv("SUN_TIMES_GRID_DEG", 0.05))
+SUN_TIMES_CACHE_SIZE = int(os.getenv("SUN_TIMES_CACHE_SIZE", 200000))
+
+# 0 is upper limb with standard refraction, as in almanacs; set
+# swe.BIT_HINDU_RISING for the centre-of-disc convention some panchangs use.
+RISE_FLAGS = int(os.getenv("SUN_RISE_FLAGS", 0))
+RISE = swe.CALC_RISE | RISE_FLAGS
+SET = swe.CALC_SET | RISE_FLAGS
+
+# Cities warmed by precompute_cities() at startup: name -> (lat, lon, tz)
+DEFAULT_CITIES = {
+    "Delhi": (28.6139, 77.2090, 5.5),
+    "Mumbai": (19.0760, 72.8777, 5.5),
+    "Kolkata": (22.5726, 88.3639, 5.5),
+    "Chennai": (13.0827, 80.2707, 5.5),
+    "Bengaluru": (12.9716, 77.5946, 5.5),
+    "Hyderabad": (17.3850, 78.4867, 5.5),
+    "Ahmedabad": (23.0225, 72.5714, 5.5),
+    "Pune": (18.5204, 73.8567, 5.5),
+    "Jaipur": (26.9124, 75.7873, 5.5),
+    "Lucknow": (26.8467, 80.9462, 5.5),
+    "Varanasi": (25.3176, 82.9739, 5.5),
+    "Ujjain": (23.1765, 75.7885, 5.5)
+}
+
+# deterministic values, so entries never expire
+sun_times_cache = TTLCache(SUN_TIMES_CACHE_SIZE)
+
+def tile(lat, lon, grid=SUN_TIMES_GRID_DEG):
+    """Centre of the grid cell containing (lat, lon)"""
+    return (round(float(lat) / grid) * grid, round(float(lon) / grid) * grid)
+
+# -------------------------------------------------
+# COMPUTATION
+# -------------------------------------------------
+def _next_event(jd, lat, lon, event):
+    """Julian day (UT) of the next sunrise/sunset after jd, or None if the Sun never crosses the horizon"""
+    res, tret = TROPICAL.call(swe.rise_trans, jd, swe.SUN, event, (lon, lat, 0.0))
+    return tret[0] if res == 0 else None
+
+def _compute(day, lat, lon, tz):
+    midnight = swe.julday(day.year, day.month, day.day, 0.0) - tz / 24.0
+    sunrise = _next_event(midnight, lat, lon, RISE)
+    sunset = _next_event(sunrise if sunrise is not None else midnight, lat, lon, SET)
+    next_sunrise = _next_event(midnight + 1, lat, lon, RISE)
+    return {
+        "midnight_jd": midnight,
+        "sunrise_jd": sunrise,
+        "sunset_jd": sunset,
+        "next_sunrise_jd": next_sunrise
+    }
+
+def day_sun_times(day, lat, lon, tz=5.5):
+    """
+    Sunrise, sunset and next day's sunrise (Julian days, UT) for a local date,
+    plus the local midnight they are measured from. Values are None at
+    latitudes where the Sun does not rise or set that day.
+    """
+    lat, lon = tile(lat, lon)
+    key = (day.isoformat(), lat, lon, tz)
+    return sun_times_cache.get_or_compute(key, lambda: _compute(day, lat, lon, tz))
+
+def day_sun_times_range(start_day, days, lat, lon, tz=5.5):
+    """
+    day_sun_times for `days` consecutive dates in one pass: each sunrise is
+    computed once and doubles as the previous day's next sunrise, so a month
+    costs 2 * days + 1 ephemeris calls instead of 3 * days. Cached days are
+    returned as they are.
+    """
+    lat, lon = tile(lat, lon)
+    dates = [start_day + timedelta(days=i) for i in range(days)]
+    keys = [(day.isoformat(), lat, lon, tz) for day in dates]
+    records = [sun_times_cache.get(key) for key in keys]
+    if all(record is not None for record in records):
+        return records
+
+    midnights = [swe.julday(day.year, day.month, day.day, 0.0) - tz / 24.0 for day in dates]
+    midnights.append(midnights[-1] + 1)
+    sunrises = [_next_event(midnight, lat, lon, RISE) for midnight in midnights]
+    for i, key in enumerate(keys):
+        if records[i] is None:
+            sunrise = sunrises[i]
+            records[i] = {
+                "midnight_jd": midnights[i],
+                "sunrise_jd": sunrise,
+                "sunset_jd": _next_event(sunrise if sunrise is not None else midnights[i], lat, lon, SET),
+                "next_sunrise_jd": sunrises[i + 1]
+            }
+            sun_times_cache.set(key, records[i])
+    return records
+
+def local_hours(jd, midnight_jd):
+    """Hours after local midnight, or None"""
+    return None if jd is None else (jd - midnight_jd) * 24.0
+
+def vedic_day(jd, lat, lon, tz=5.5):
+    """The civil date whose sunrise starts the Vedic day containing jd"""
+    year, month, day, _ = swe.revjul(jd + tz / 24.0)
+    civil = date(year, month, day)
+    sunrise = day_sun_times(civil, lat, lon, tz)["sunrise_jd"]
+    if sunrise is not None and jd < sunrise:
+        return civil - timedelta(days=1)
+    return civil
+
+# -------------------------------------------------
+# BULK PRECOMPUTE
+# -------------------------------------------------
+def precompute_cities(cities=None, start_day=None, days=366):
+    """Fill the cache for every city (name -> (lat, lon, tz)) over a run of days"""
+    cities = DEFAULT_CITIES if cities is None else cities
+    start_day = start_day or date.today()
+    started = time.perf_counter()
+    for lat, lon, tz in cities.values():
+        for offset in range(days):
+            day_sun_times(start_day + timedelta(days=offset), lat, lon, tz)
+    logger.info("Precomputed sun times for %d cities x %d days in %.1f s",
+                len(cities), days, time.perf_counter() - started)
+
+def cache_stats():
+    return sun_times_cache.stats()
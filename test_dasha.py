@@ -0,0 +1,13 @@
+from datetime import datetime
+import pytest
+import pytz
+from dasha import DashaTimeline, DASHA_SYSTEMS
+
+
+@pytest.mark.parametrize("system", list(DASHA_SYSTEMS))
+def test_period_unknown_lord(system):
+    timeline = DashaTimeline(datetime(1990, 5, 1, tzinfo=pytz.UTC), 123.4, system)
+    assert timeline.period(["venus"]) is None
+    assert timeline.period(["Nobody", "Sun"]) is None
+    first = timeline.system.lords[timeline.first_lord]
+    assert timeline.period([first]).lord == first
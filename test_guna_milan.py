@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+from guna_milan import top_matches
+
+
+def test_top_matches_caps_at_k():
+    candidates = np.linspace(0.0, 359.9, 5000)
+    order, scores = top_matches(100.0, candidates, k=5)
+    assert len(order) == 5
+    assert np.all(np.diff(scores) <= 0)
+
+
+@pytest.mark.parametrize("k", [0, -1, -5])
+def test_top_matches_rejects_k_below_one(k):
+    with pytest.raises(ValueError):
+        top_matches(100.0, np.linspace(0.0, 359.9, 5000), k=k)
@@ -0,0 +1,21 @@
+from datetime import date
+import numpy as np
+from muhurat_engine import select, find_windows, kharmaas_windows, DEFAULT_EXCLUDED
+from panchang_cache import local_midnight_jd
+
+
+def test_empty_sets():
+    empty = np.empty((0, 2))
+    assert select([[[0, 1]]], [empty]).tolist() == [[0, 1]]
+    assert select([[[0, 1]], empty]).size == 0
+
+
+def test_default_exclusions_outside_kharmaas():
+    start, end = date(2025, 2, 1), date(2025, 2, 10)
+    assert kharmaas_windows(local_midnight_jd(start, 5.5), local_midnight_jd(end, 5.5) + 1).size == 0
+    assert len(find_windows(start, end, {"nakshatra": [4, 10, 13], "exclude": DEFAULT_EXCLUDED})) > 0
+
+
+def test_default_exclusions_inside_kharmaas():
+    windows = find_windows(date(2025, 12, 20), date(2026, 1, 10), {"exclude": DEFAULT_EXCLUDED})
+    assert windows.size == 0
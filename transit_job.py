@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import time
+import logging
+from datetime import date, datetime
+import numpy as np
+import swisseph as swe
+from ephemeris import KRISHNAMURTI
+from chart_store import get_chart_store, STORE_BODIES, RASHI_NAMES
+from ashtakavarga import ashtakavarga_batch, PLANETS as ASHTAKAVARGA_PLANETS, CONTRIBUTORS
+from aspects import cross_aspects
+from ephemeris_events import is_retrograde
+
+logger = logging.getLogger("transit_job")
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+# Daily transits for every stored chart. Today's sidereal positions are
+# computed once; each chunk of natal charts read from the chart store is then
+# evaluated against them with array operations, and its results appended to
+# an NDJSON file before the next chunk is read. Run with:
+#
+#     python transit_job.py [YYYY-MM-DD] [output.ndjson]
+TRANSIT_BODIES = ["Sun", "Moon", "Mars", "Mercury", "Jupiter", "Venus", "Saturn", "Rahu", "Ketu"]
+NATAL_POINTS = STORE_BODIES
+
+# Positions are taken at this local hour of the day (IST by default)
+TRANSIT_HOUR = float(os.getenv("TRANSIT_HOUR", 6.0))
+TRANSIT_TZ = float(os.getenv("TRANSIT_TZ", 5.5))
+
+TRANSIT_ASPECTS = ["conjunction", "sextile", "square", "trine", "opposition"]  # see aspects.ASPECTS
+TRANSIT_ORB = float(os.getenv("TRANSIT_ORB", 3.0))  # degrees
+
+TRANSIT_BATCH_SIZE = int(os.getenv("TRANSIT_BATCH_SIZE", 10000))
+TRANSIT_OUTPUT_DIR = os.getenv("TRANSIT_OUTPUT_DIR", "transits")
+
+# Saturn in the 12th, 1st or 2nd from the natal Moon
+SADE_SATI_HOUSES = (12, 1, 2)
+
+ASPECT_NAMES = list(TRANSIT_ASPECTS)
+
+# -------------------------------------------------
+# TODAY'S POSITIONS
+# -------------------------------------------------
+def transit_jd(day):
+    return swe.julday(day.year, day.month, day.day, TRANSIT_HOUR - TRANSIT_TZ)
+
+def transit_positions(day, context=KRISHNAMURTI):
+    """Sidereal longitudes of TRANSIT_BODIES for the day, one ephemeris call"""
+    lons = context.calc_batch([transit_jd(day)], TRANSIT_BODIES[:-1])[0][0]
+    return np.append(lons, (lons[TRANSIT_BODIES.index("Rahu")] + 180.0) % 360.0)
+
+# -------------------------------------------------
+# VECTORISED EVALUATION
+# -------------------------------------------------
+def evaluate_transits(transit, natal, orb=TRANSIT_ORB):
+    """
+    Transit positions (len(TRANSIT_BODIES),) against natal charts
+    (n, len(NATAL_POINTS)). Returns arrays:
+
+        houses_from_lagna, houses_from_moon  (n, bodies) whole-sign houses 1-12
+        aspect, aspect_orb                   (n, bodies, points) nearest aspect
+                                             index into ASPECT_NAMES and its orb
+        aspect_hit                           (n, bodies, points) orb <= orb
+        sade_sati                            (n,) bool
+        bindus                               (n, 7) natal BAV bindus of each planet
+                                             in its transit sign (Sun..Saturn)
+        sav                                  (n, bodies) natal SAV of each transit sign
+    """
+    transit_signs = (transit // 30).astype(int)
+    lagna_signs = (natal[:, NATAL_POINTS.index("Ascendant")] // 30).astype(int)
+    moon_signs = (natal[:, NATAL_POINTS.index("Moon")] // 30).astype(int)
+    houses_from_lagna = (transit_signs[None, :] - lagna_signs[:, None]) % 12 + 1
+    houses_from_moon = (transit_signs[None, :] - moon_signs[:, None]) % 12 + 1
+
+    aspect, aspect_orb = cross_aspects(transit, natal, {name: 180.0 for name in ASPECT_NAMES}, ASPECT_NAMES)
+
+    saturn_houses = houses_from_moon[:, TRANSIT_BODIES.index("Saturn")]
+
+    # natal Ashtakavarga bindus in the sign each planet is transiting
+    bav, sav = ashtakavarga_batch(natal[:, [NATAL_POINTS.index(body) for body in CONTRIBUTORS]])
+    planet_signs = transit_signs[[TRANSIT_BODIES.index(p) for p in ASHTAKAVARGA_PLANETS]]
+    bindus = bav[:, np.arange(len(ASHTAKAVARGA_PLANETS)), planet_signs]
+    return {
+        "houses_from_lagna": houses_from_lagna,
+        "houses_from_moon": houses_from_moon,
+        "aspect": aspect,
+        "aspect_orb": aspect_orb,
+        "aspect_hit": aspect_orb <= orb,
+        "sade_sati": np.isin(saturn_houses, SADE_SATI_HOUSES),
+        "bindus": bindus,
+        "sav": sav[:, transit_signs]
+    }
+
+def transit_records(user_ids, result):
+    """One JSON-ready record per user from evaluate_transits output"""
+    moon = NATAL_POINTS.index("Moon")
+    aspects = [[] for _ in user_ids]
+    for u, t, p in zip(*np.nonzero(result["aspect_hit"])):
+        aspects[u].append({
+            "transit": TRANSIT_BODIES[t],
+            "natal": NATAL_POINTS[p],
+            "aspect": ASPECT_NAMES[result["aspect"][u, t, p]],
+            "orb": round(float(result["aspect_orb"][u, t, p]), 2)
+        })
+    houses_from_lagna = result["houses_from_lagna"].tolist()
+    houses_from_moon = result["houses_from_moon"].tolist()
+    sade_sati = result["sade_sati"].tolist()
+    bindus = result["bindus"].tolist()
+    sav = result["sav"].tolist()
+
+    records = []
+    for u, user_id in enumerate(user_ids):
+        records.append({
+            "user_id": user_id,
+            "houses": dict(zip(TRANSIT_BODIES, houses_from_lagna[u])),
+            "houses_from_moon": dict(zip(TRANSIT_BODIES, houses_from_moon[u])),
+            "over_natal_moon": [a for a in aspects[u] if a["natal"] == NATAL_POINTS[moon]],
+            "aspects": [a for a in aspects[u] if a["natal"] != NATAL_POINTS[moon]],
+            "sade_sati": sade_sati[u],
+            "bindus": dict(zip(ASHTAKAVARGA_PLANETS, bindus[u])),
+            "sav": dict(zip(TRANSIT_BODIES, sav[u]))
+        })
+    return records
+
+# -------------------------------------------------
+# JOB
+# -------------------------------------------------
+def run_daily_transits(day=None, out_path=None, store=None, batch_size=TRANSIT_BATCH_SIZE, context=KRISHNAMURTI):
+    """
+    Evaluate every stored chart against the day's transits and write one
+    NDJSON line per user. Lines are written chunk by chunk to out_path + '.part',
+    renamed to out_path when the run completes. Returns the number of users.
+    """
+    day = day or date.today()
+    store = store or get_chart_store()
+    if out_path is None:
+        os.makedirs(TRANSIT_OUTPUT_DIR, exist_ok=True)
+        out_path = os.path.join(TRANSIT_OUTPUT_DIR, f"transits-{day.isoformat()}.ndjson")
+
+    started = time.perf_counter()
+    transit = transit_positions(day, context)
+    header = {
+        "date": day.isoformat(),
+        "positions": {
+            body: {"longitude": round(float(lon), 4), "rashi": RASHI_NAMES[int(lon // 30)],
+                   "retrograde": is_retrograde(body, transit_jd(day))}
+            for body, lon in zip(TRANSIT_BODIES, transit)
+        }
+    }
+
+    users = 0
+    part_path = out_path + ".part"
+    with open(part_path, "w", encoding="utf-8") as out:
+        out.write(json.dumps(header) + "\n")
+        for user_ids, natal in store.iter_longitudes(batch_size):
+            for record in transit_records(user_ids, evaluate_transits(transit, natal)):
+                out.write(json.dumps(record) + "\n")
+            out.flush()
+            users += len(user_ids)
+            logger.info("Transits: %d users done", users)
+    os.replace(part_path, out_path)
+
+    logger.info("Transits for %s: %d users in %.1f s -> %s",
+                day.isoformat(), users, time.perf_counter() - started, out_path)
+    return users
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    day = datetime.strptime(sys.argv[1], "%Y-%m-%d").date() if len(sys.argv) > 1 else None
+    run_daily_transits(day, sys.argv[2] if len(sys.argv) > 2 else None)
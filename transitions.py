@@ -0,0 +1,156 @@
+import numpy as np
+from longitude_tables import table_calc_batch
+
+# -------------------------------------------------
+# CONSTANTS
+# -------------------------------------------------
+NAKSHATRA_SPAN = 360.0 / 27
+YOGA_SPAN = 360.0 / 27
+TITHI_SPAN = 12.0
+KARANA_SPAN = 6.0
+
+# tithi and karana follow Moon - Sun, yoga follows Sun + Moon
+PANCHANG_DIVISIONS = [("tithi", TITHI_SPAN, False), ("yoga", YOGA_SPAN, True), ("karana", KARANA_SPAN, False)]
+
+# Newton stops once the correction is below this many days (~1 second)
+TIME_TOLERANCE = 1.0 / 86400
+MAX_ITERATIONS = 8
+
+# -------------------------------------------------
+# PHASE FUNCTIONS
+# -------------------------------------------------
+# A phase function maps a Julian day (UT) to (angle in degrees, rate in
+# degrees/day). The finders below assume the angle only ever increases, which
+# holds for the Moon, the Moon-Sun elongation and the Sun+Moon sum.
+def moon_phase(sid_mode=None):
+    """Moon longitude; tropical unless sid_mode is given"""
+    def phase(jd):
+        lons, speeds = table_calc_batch([jd], ['Moon'], sid_mode)
+        return lons[0, 0], speeds[0, 0]
+    return phase
+
+def elongation_phase(sid_mode=None):
+    """Moon minus Sun: tithi (12 degrees) and karana (6 degrees) divisions; the ayanamsa cancels out"""
+    def phase(jd):
+        lons, speeds = table_calc_batch([jd], ['Sun', 'Moon'])
+        return (lons[0, 1] - lons[0, 0]) % 360.0, speeds[0, 1] - speeds[0, 0]
+    return phase
+
+def yoga_phase(sid_mode=None):
+    """Sun plus Moon: yoga divisions of 360/27 degrees"""
+    def phase(jd):
+        lons, speeds = table_calc_batch([jd], ['Sun', 'Moon'], sid_mode)
+        return (lons[0, 0] + lons[0, 1]) % 360.0, speeds[0, 0] + speeds[0, 1]
+    return phase
+
+# -------------------------------------------------
+# TRANSITION FINDER
+# -------------------------------------------------
+def _wrap(angle):
+    """Map an angle difference into [-180, 180)"""
+    return (angle + 180.0) % 360.0 - 180.0
+
+def find_crossing(phase, jd, target, angle=None, rate=None):
+    """
+    First instant at or after jd where the phase reaches target (degrees).
+
+    The first guess comes from the current rate, then Newton refines it; for
+    the Moon that is usually two evaluations per boundary. Returns the crossing
+    instant and the rate there.
+    """
+    if angle is None:
+        angle, rate = phase(jd)
+    jd += ((target - angle) % 360.0) / rate
+    for _ in range(MAX_ITERATIONS):
+        angle, rate = phase(jd)
+        step = _wrap(angle - target) / rate
+        jd -= step
+        if abs(step) < TIME_TOLERANCE:
+            break
+    return jd, rate
+
+def find_transitions(phase, jd_start, jd_end, span):
+    """
+    Every instant in (jd_start, jd_end) where the phase crosses a multiple of
+    span degrees, as a list of (jd, index entered) with index = angle // span.
+    """
+    angle, rate = phase(jd_start)
+    index = int(angle // span)
+    n_divisions = int(round(360.0 / span))
+    transitions = []
+    jd = jd_start
+    while True:
+        index = (index + 1) % n_divisions
+        jd, rate = find_crossing(phase, jd, index * span, angle, rate)
+        if jd >= jd_end:
+            break
+        transitions.append((jd, index))
+        angle = index * span
+    return transitions
+
+def division_intervals(phase, jd_start, jd_end, span):
+    """
+    Split [jd_start, jd_end] into (start_jd, end_jd, index) runs of constant
+    division, e.g. nakshatra windows with span=NAKSHATRA_SPAN.
+    """
+    angle, _ = phase(jd_start)
+    index = int(angle // span)
+    intervals = []
+    start = jd_start
+    for jd, next_index in find_transitions(phase, jd_start, jd_end, span):
+        intervals.append((start, jd, index))
+        start, index = jd, next_index
+    intervals.append((start, jd_end, index))
+    return intervals
+
+def nakshatra_intervals(jd_start, jd_end, sid_mode=None):
+    """Nakshatra windows (start_jd, end_jd, nakshatra index 0-26) over a range"""
+    return division_intervals(moon_phase(sid_mode), jd_start, jd_end, NAKSHATRA_SPAN)
+
+# -------------------------------------------------
+# PANCHANG SOLVER
+# -------------------------------------------------
+def _sun_moon_phases(jds, sid_mode, is_sum):
+    """Elongation or sum phase (and rate) per jd, from one Sun+Moon batch"""
+    lons, speeds = table_calc_batch(jds, ['Sun', 'Moon'], sid_mode)
+    angles = np.where(is_sum, lons[:, 0] + lons[:, 1], lons[:, 1] - lons[:, 0]) % 360.0
+    rates = np.where(is_sum, speeds[:, 0] + speeds[:, 1], speeds[:, 1] - speeds[:, 0])
+    return angles, rates
+
+def solve_panchang_transitions(jd, sid_mode=None, count=2):
+    """
+    The next `count` tithi, yoga and karana transitions after jd, solved together.
+
+    All targets share one Sun+Moon evaluation per Newton step: one batch at jd,
+    then typically two or three batches of 3 * count instants. Returns
+    {kind: (current index, [(transition jd, index entered), ...])}.
+    """
+    kinds = [kind for kind, _, _ in PANCHANG_DIVISIONS]
+    spans = np.array([span for _, span, _ in PANCHANG_DIVISIONS])
+    sums = np.array([is_sum for _, _, is_sum in PANCHANG_DIVISIONS])
+
+    angles, rates = _sun_moon_phases([jd, jd, jd], sid_mode, sums)
+    current = (angles // spans).astype(int)
+
+    # Unwrapped targets: the k-th boundary ahead of the current angle
+    steps_ahead = np.arange(1, count + 1)
+    targets = (current[:, None] + steps_ahead[None, :]) * spans[:, None]
+    guesses = jd + (targets - angles[:, None]) / rates[:, None]
+
+    flat_targets = (targets % 360.0).ravel()
+    flat_sums = np.repeat(sums, count)
+    jds = guesses.ravel()
+    for _ in range(MAX_ITERATIONS):
+        angles, rates = _sun_moon_phases(jds, sid_mode, flat_sums)
+        step = _wrap(angles - flat_targets) / rates
+        jds = jds - step
+        if np.all(np.abs(step) < TIME_TOLERANCE):
+            break
+
+    jds = jds.reshape(len(kinds), count)
+    result = {}
+    for i, kind in enumerate(kinds):
+        n_divisions = int(round(360.0 / spans[i]))
+        entered = [(int(current[i]) + k) % n_divisions for k in range(1, count + 1)]
+        result[kind] = (int(current[i]), list(zip(jds[i].tolist(), entered)))
+    return result
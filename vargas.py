@@ -0,0 +1,103 @@
+import numpy as np
+
+# -------------------------------------------------
+# SHODASHVARGA TABLES
+# -------------------------------------------------
+# The 16 classical divisional charts. Every varga boundary (including the
+# unequal Trimsamsa ones) falls on a multiple of 30/CELLS_PER_SIGN degrees,
+# so each varga is a precomputed lookup over the zodiac cut into 12 *
+# CELLS_PER_SIGN cells, and any number of bodies x vargas is one gather.
+#
+# D2, D4, D9, D10 and D60 follow the rules kundali_app has always used; the
+# others are Parashara's.
+VARGAS = ['D1', 'D2', 'D3', 'D4', 'D7', 'D9', 'D10', 'D12',
+          'D16', 'D20', 'D24', 'D27', 'D30', 'D40', 'D45', 'D60']
+VARGA_INDEX = {name: i for i, name in enumerate(VARGAS)}
+
+CELLS_PER_SIGN = 15120  # lcm of every division count, 1/504 degree per cell
+
+# Trimsamsa: (upper degree bound, sign) per part, odd and even signs
+TRIMSAMSA_ODD = [(5, 0), (10, 10), (18, 8), (25, 2), (30, 6)]
+TRIMSAMSA_EVEN = [(5, 1), (12, 5), (20, 11), (25, 9), (30, 7)]
+
+def _varga_signs(name, sign, cell):
+    """0-based varga sign for every (sign, cell-within-sign) pair"""
+    n = int(name[1:])
+    part = cell * n // CELLS_PER_SIGN
+    odd = sign % 2 == 0  # 0-based: Aries, Gemini, ... are odd signs
+    modality = sign % 3  # 0 movable, 1 fixed, 2 dual
+
+    if name == 'D1':
+        return sign
+    if name == 'D2':
+        return np.where(odd, np.where(part == 0, 4, 3), np.where(part == 0, 3, 4))
+    if name == 'D3':
+        return sign + 4 * part
+    if name == 'D4':
+        return sign + 3 * part
+    if name == 'D7':
+        return np.where(odd, sign, sign + 6) + part
+    if name in ('D9', 'D10'):
+        return np.where(odd, sign, sign + 8) + part
+    if name == 'D12':
+        return sign + part
+    if name in ('D16', 'D45'):
+        return np.choose(modality, [0, 4, 8]) + part
+    if name == 'D20':
+        return np.choose(modality, [0, 8, 4]) + part
+    if name == 'D24':
+        return np.where(odd, 4, 3) + part
+    if name == 'D27':
+        return np.choose(sign % 4, [0, 3, 6, 9]) + part
+    if name == 'D30':
+        degree = cell * 30 // CELLS_PER_SIGN
+        result = np.empty_like(sign)
+        for rules, mask in ((TRIMSAMSA_ODD, odd), (TRIMSAMSA_EVEN, ~odd)):
+            bounds = np.array([upper for upper, _ in rules])
+            signs = np.array([s for _, s in rules])
+            result[mask] = signs[np.searchsorted(bounds, degree[mask], side='right')]
+        return result
+    if name == 'D40':
+        return np.where(odd, 0, 6) + part
+    if name == 'D60':
+        start = sign + np.choose(modality, [0, 4, 8])
+        return start + part // 5 + part % 5
+    raise ValueError(f"unknown varga {name}")
+
+def _build_table():
+    cells = np.arange(12 * CELLS_PER_SIGN)
+    sign, cell = np.divmod(cells, CELLS_PER_SIGN)
+    table = np.empty((len(VARGAS), cells.size), dtype=np.int8)
+    for i, name in enumerate(VARGAS):
+        table[i] = _varga_signs(name, sign, cell) % 12 + 1
+    return table
+
+_table = None
+
+def varga_table():
+    """(len(VARGAS), 12 * CELLS_PER_SIGN) table of 1-based varga signs, built on first use"""
+    global _table
+    if _table is None:
+        _table = _build_table()
+    return _table
+
+# -------------------------------------------------
+# LOOKUP
+# -------------------------------------------------
+def varga_matrix(longitudes, vargas=None):
+    """
+    Varga signs (1 = Aries ... 12 = Pisces) for an array of sidereal
+    longitudes, as an int8 matrix of shape (len(longitudes), len(vargas)).
+    vargas defaults to all sixteen, in VARGAS order.
+    """
+    lons = np.mod(np.atleast_1d(np.asarray(longitudes, dtype=np.float64)), 360.0)
+    cells = np.minimum((lons * (CELLS_PER_SIGN / 30.0)).astype(np.int64), 12 * CELLS_PER_SIGN - 1)
+    table = varga_table()
+    if vargas is not None:
+        table = table[[VARGA_INDEX[name] for name in vargas]]
+    return table[:, cells].T
+
+def varga_charts(longitudes, vargas):
+    """Per-body {varga name: sign number} dicts, e.g. for JSON responses"""
+    matrix = varga_matrix(longitudes, vargas).tolist()
+    return [dict(zip(vargas, row)) for row in matrix]